@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Poster Rendering Benchmarks
+Times render_poster() stage by stage across canvas sizes and checks the
+output against golden images, so speed-ups can't change the poster's look
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import multiprocessing
+from PIL import Image
+import numpy as np
+
+import PIL
+
+import create_poster
+from create_poster import CompositeStats, render_poster, render_sprite, texture_tile, load_face
+
+# Canvas sizes benchmarked by default: a preview, the design size and a print size
+DEFAULT_SIZES = ("800x600", "1600x1200", "3200x2400")
+
+# Where golden images are kept; they depend on installed fonts, so each machine makes its own
+DEFAULT_GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'poster-goldens')
+
+# Golden images are compared at most this wide; larger canvases are box-filtered down first
+GOLDEN_COMPARE_WIDTH = 1600
+
+# CIE76 color difference a viewer can just notice
+JUST_NOTICEABLE_DELTA_E = 2.3
+
+# Perceptual tolerance: mean color difference, and share of pixels past a just-noticeable one
+DEFAULT_MAX_MEAN_DELTA_E = 0.5
+DEFAULT_MAX_CHANGED = 0.001
+
+# Relative slowdown (or growth in memory and size) that counts as a regression
+DEFAULT_TOLERANCE = 0.15
+
+# sRGB (D65) to XYZ, and the D65 white point
+SRGB_TO_XYZ = np.array([
+    [0.4124, 0.3576, 0.1805],
+    [0.2126, 0.7152, 0.0722],
+    [0.0193, 0.1192, 0.9505],
+])
+D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+
+def parse_size(text):
+    """Parse '1600x1200' into (width, height)"""
+    width, _, height = text.lower().partition('x')
+    return int(width), int(height)
+
+
+def clear_caches():
+    """Forget rasterized sprites, grain tiles and loaded fonts, so the next render draws everything"""
+    render_sprite.cache_clear()
+    texture_tile.cache_clear()
+    load_face.cache_clear()
+
+
+def srgb_to_lab(pixels):
+    """CIELAB coordinates of an (..., 3) uint8 sRGB array"""
+    c = pixels / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ SRGB_TO_XYZ.T / D65_WHITE
+    delta = 6 / 29
+    f = np.where(xyz > delta ** 3, np.cbrt(xyz), xyz / (3 * delta ** 2) + 4 / 29)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])],
+                    axis=-1)
+
+
+def perceptual_diff(image, golden):
+    """
+    Compare two RGB images as a viewer would
+
+    Both are box-filtered to at most GOLDEN_COMPARE_WIDTH wide, which also
+    averages out the grain, then compared per pixel in CIELAB.
+
+    Returns:
+        dict: mean and max CIE76 delta E, and the share of pixels whose
+        difference is at least just noticeable
+    """
+    if image.size != golden.size:
+        return {"size_mismatch": [list(image.size), list(golden.size)]}
+    factor = math.ceil(image.width / GOLDEN_COMPARE_WIDTH)
+    if factor > 1:
+        image, golden = image.reduce(factor), golden.reduce(factor)
+    delta_e = np.linalg.norm(srgb_to_lab(np.asarray(image)) - srgb_to_lab(np.asarray(golden)), axis=-1)
+    return {
+        "mean_delta_e": round(float(delta_e.mean()), 4),
+        "max_delta_e": round(float(delta_e.max()), 2),
+        "changed": round(float((delta_e >= JUST_NOTICEABLE_DELTA_E).mean()), 6),
+    }
+
+
+def golden_path(golden_dir, size, seed, density=1):
+    suffix = f"-density{density:g}" if density != 1 else ""
+    return os.path.join(golden_dir, f"poster-{size[0]}x{size[1]}-seed{seed}{suffix}.png")
+
+
+def _percentile(samples, fraction):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def _peak_rss_bytes():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _timed_renders(config, repeats, cold):
+    """Render repeats times, returning per-stage samples in ms, total samples in s and the last result"""
+    stages, totals = {}, []
+    for _ in range(repeats):
+        if cold:
+            clear_caches()
+        stats = CompositeStats()
+        start = time.perf_counter()
+        image = render_poster(config, stats)
+        totals.append(time.perf_counter() - start)
+        for name, entry in stats.stages.items():
+            stages.setdefault(name, []).append(entry['seconds'] * 1000)
+    return stages, totals, image, stats
+
+
+def _run_case(size, seed, repeats, golden_dir, update, density=1):
+    """
+    Runs in a fresh process so peak RSS belongs to this case alone
+
+    Every stage is timed cold, with sprite, grain and font caches cleared
+    before each render, and warm, with them filled: warm times are the
+    compositing alone, cold minus warm is the drawing.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {'width': size[0], 'height': size[1], 'seed': seed, 'density': density,
+                  'output_path': os.path.join(tmp, 'poster.png')}
+        cold, cold_totals, _, _ = _timed_renders(config, repeats, cold=True)
+        warm, warm_totals, image, stats = _timed_renders(config, repeats, cold=False)
+        png_bytes = stats.exports[0]['bytes']
+    peak_rss = _peak_rss_bytes()
+
+    path = golden_path(golden_dir, size, seed, density)
+    if update:
+        os.makedirs(golden_dir, exist_ok=True)
+        image.save(path, 'PNG')
+        golden = {"updated": path}
+    elif os.path.exists(path):
+        with Image.open(path) as stored:
+            golden = perceptual_diff(image, stored.convert('RGB'))
+    else:
+        golden = {"missing": path}
+
+    return {
+        "stages_ms": {name: {"cold": round(statistics.median(cold.get(name, [0])), 2),
+                             "warm": round(statistics.median(samples), 2)}
+                      for name, samples in warm.items()},
+        "cold_median_s": round(statistics.median(cold_totals), 4),
+        "median_s": round(statistics.median(warm_totals), 4),
+        "p95_s": round(_percentile(warm_totals, 0.95), 4),
+        "peak_rss_bytes": peak_rss,
+        "png_bytes": png_bytes,
+        "golden": golden
+    }
+
+
+def golden_failure(golden, max_mean_delta_e=DEFAULT_MAX_MEAN_DELTA_E, max_changed=DEFAULT_MAX_CHANGED):
+    """Why a case's output no longer matches its golden image, or None if it does"""
+    if "size_mismatch" in golden:
+        return f"size {golden['size_mismatch'][0]} != golden {golden['size_mismatch'][1]}"
+    if "mean_delta_e" not in golden:
+        return None
+    if golden["mean_delta_e"] > max_mean_delta_e or golden["changed"] > max_changed:
+        return (f"mean delta E {golden['mean_delta_e']}, {golden['changed']:.3%} of pixels "
+                f"visibly changed (max delta E {golden['max_delta_e']})")
+    return None
+
+
+def run_suite(sizes=DEFAULT_SIZES, seed=0, repeats=3, golden_dir=DEFAULT_GOLDEN_DIR, update=False,
+              show_stages=False, density=1):
+    """Benchmark every canvas size, each in its own process"""
+    context = multiprocessing.get_context('spawn')
+    cases = {}
+    print(f"{'case':<12} {'cold (s)':>9} {'median (s)':>10} {'p95 (s)':>9} {'peak RSS (MB)':>14} "
+          f"{'PNG (KB)':>9}  golden")
+    for size in sizes:
+        size = parse_size(size)
+        name = f"{size[0]}x{size[1]}"
+        with context.Pool(1) as pool:
+            result = pool.apply(_run_case, (size, seed, repeats, golden_dir, update, density))
+        cases[name] = result
+        golden = result["golden"]
+        if "mean_delta_e" in golden:
+            verdict = f"mean ΔE {golden['mean_delta_e']}, {golden['changed']:.3%} changed"
+        else:
+            verdict = "updated" if "updated" in golden else "missing" if "missing" in golden else "size mismatch"
+        print(f"{name:<12} {result['cold_median_s']:>9.3f} {result['median_s']:>10.3f} {result['p95_s']:>9.3f} "
+              f"{result['peak_rss_bytes'] / 1e6:>14.1f} {result['png_bytes'] / 1024:>9.1f}  {verdict}")
+        if show_stages:
+            for stage, times in result["stages_ms"].items():
+                print(f"  {stage:<12} cold {times['cold']:>9.1f} ms   warm {times['warm']:>9.1f} ms")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "font": [face.path for face in [create_poster.default_index().first(create_poster.FONT_FAMILIES)]
+                     if face],
+            "seed": seed,
+            "density": density,
+            "repeats": repeats
+        },
+        "cases": cases
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    List regressions against a saved run
+
+    Median time, peak RSS and PNG size may each grow by at most tolerance;
+    cases missing from either run are skipped.
+
+    Returns:
+        list: Human-readable regression descriptions
+    """
+    regressions = []
+    for name, current in results["cases"].items():
+        previous = baseline["cases"].get(name)
+        if previous is None:
+            continue
+        for metric in ("median_s", "peak_rss_bytes", "png_bytes"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + tolerance):
+                change = current[metric] / previous[metric] - 1
+                regressions.append(f"{name}: {metric} {previous[metric]} -> {current[metric]} (+{change:.0%})")
+    return regressions
+
+
+def main():
+    """Main entry point for CLI usage"""
+    parser = argparse.ArgumentParser(description="Benchmark poster rendering and check it against golden images")
+    parser.add_argument('--sizes', nargs='+', default=list(DEFAULT_SIZES),
+                        help=f"canvas sizes to render (default: {' '.join(DEFAULT_SIZES)})")
+    parser.add_argument('--seed', type=int, default=0, help="poster seed (default: 0)")
+    parser.add_argument('--density', type=float, default=1,
+                        help="decoration density, e.g. 50 for a crowded poster (default: 1)")
+    parser.add_argument('--repeats', type=int, default=3, help="renders per case, cold and warm (default: 3)")
+    parser.add_argument('--stages', action='store_true', help="print cold and warm time per stage")
+    parser.add_argument('--golden-dir', default=DEFAULT_GOLDEN_DIR,
+                        help="directory of golden images (default: poster-goldens next to this script)")
+    parser.add_argument('--update', action='store_true',
+                        help="store this run's output as the golden images instead of comparing")
+    parser.add_argument('--max-delta-e', type=float, default=DEFAULT_MAX_MEAN_DELTA_E,
+                        help=f"allowed mean CIE76 delta E against a golden image (default: {DEFAULT_MAX_MEAN_DELTA_E})")
+    parser.add_argument('--max-changed', type=float, default=DEFAULT_MAX_CHANGED,
+                        help="allowed share of pixels with a just-noticeable difference "
+                             f"(default: {DEFAULT_MAX_CHANGED})")
+    parser.add_argument('--save', metavar='FILE', help="write results as JSON")
+    parser.add_argument('--baseline', metavar='FILE', help="fail if any case regressed against this JSON")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"allowed relative growth before a regression (default: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.seed, args.repeats, args.golden_dir, args.update, args.stages,
+                        args.density)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+    status = 0
+    mismatches = [(name, golden_failure(case["golden"], args.max_delta_e, args.max_changed))
+                  for name, case in results["cases"].items()]
+    mismatches = [(name, failure) for name, failure in mismatches if failure]
+    missing = [name for name, case in results["cases"].items() if "missing" in case["golden"]]
+    if mismatches:
+        print(f"\n❌ {len(mismatches)} case(s) differ from their golden image:")
+        for name, failure in mismatches:
+            print(f"  {name}: {failure}")
+        status = 1
+    elif missing:
+        # Goldens are made per machine, so a fresh checkout has none; checking nothing is not a pass
+        print(f"\n❌ No golden image for {', '.join(missing)} in {args.golden_dir}; "
+              "run with --update to create them")
+        status = 1
+    elif not args.update:
+        print(f"\n✅ Output matches the golden images in {args.golden_dir}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\n✅ No regressions against {args.baseline}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
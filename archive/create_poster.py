@@ -5,9 +5,29 @@ Based on the Neko Sonic design philosophy
 4:3 ratio, anime-inspired, featuring kawaii cats
 """
 
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+import os
+import sys
+import json
 import math
+import time
+import zlib
+import struct
 import random
+import tempfile
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from collections import namedtuple
+from PIL import Image, ImageDraw, ImageFont, ImageFilter
+import numpy as np
+
+# Font discovery is shared with the research report generator
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'research-report-generator', 'scripts'))
+from font_index import default_index, load_face
 
 # Canvas setup - 4:3 ratio
 WIDTH = 1600
@@ -27,27 +47,159 @@ WHITE = (255, 255, 255)
 CREAM = (255, 253, 240)
 DARK_PINK = (199, 21, 133)
 
-def create_gradient_background(width, height):
-    """Create a vibrant gradient background"""
-    img = Image.new('RGB', (width, height), CREAM)
-    draw = ImageDraw.Draw(img, 'RGBA')
+# Background: lavender to soft pink, top to bottom, over cream. The original
+# per-row drawing painted each row three times at alpha 180, so the gradient
+# covers the cream at 1 - (1 - 180/255)^3 opacity.
+BACKGROUND_STOPS = [(0.0, LAVENDER), (1.0, SOFT_PINK)]
+BACKGROUND_OPACITY = 1 - (1 - 180 / 255) ** 3
 
-    # Create soft gradient zones
-    for y in range(height):
-        progress = y / height
-        # Blend from pink-purple to blue-yellow
-        r = int(LAVENDER[0] * (1 - progress) + SOFT_PINK[0] * progress)
-        g = int(LAVENDER[1] * (1 - progress) + SOFT_PINK[1] * progress)
-        b = int(LAVENDER[2] * (1 - progress) + SOFT_PINK[2] * progress)
-        draw.rectangle([(0, y), (width, y + 2)], fill=(r, g, b, 180))
+# Colors sampled along a gradient; finer than any visible step at 8 bits
+GRADIENT_LUT_SIZE = 4096
 
-    return img
+# Rows shaded per array operation for diagonal and radial gradients,
+# so temporaries stay small at print resolution
+GRADIENT_CHUNK_ROWS = 256
+
+# Grain laid over the finished poster
+TEXTURE_SIGMA = 15
+TEXTURE_OPACITY = 0.03
+
+# Grain is generated as a tile this size and repeated; bump the version
+# whenever a generator changes, to invalidate tiles cached on disk
+TEXTURE_TILE_SIZE = 256
+TEXTURE_VERSION = 1
+
+# Text font families in order of preference; the first one installed is used
+FONT_FAMILIES = ('Helvetica', 'Helvetica Neue', 'Arial', 'Liberation Sans', 'DejaVu Sans')
+
+# Title, subtitle and detail text sizes at design scale
+TEXT_SIZES = (120, 45, 32)
+
+# Halftone screen: dot spacing in pixels (divides TEXTURE_TILE_SIZE) and dot radius per pitch
+HALFTONE_PITCH = 8
+HALFTONE_DOT = 0.35
+
+# Animation: default loop length and frame rate, and motion in design pixels.
+# Cats bob, stars twinkle by STAR_TWINKLE of their size, notes drift in a figure eight
+ANIMATION_FRAMES = 120
+ANIMATION_FPS = 30
+CAT_BOB = 12
+STAR_TWINKLE = 0.25
+NOTE_DRIFT = (24, 16)
+
+# Spreads the elements' motion phases so neighbours don't move in step
+PHASE_STEP = (math.sqrt(5) - 1) / 2
+
+# Scene elements that move; everything below the first of them is cached
+ANIMATED_KINDS = ('cat', 'headphones', 'note', 'star')
+
+# Animation output formats and their file extensions; 'frames' is a numbered PNG sequence
+ANIMATION_FORMATS = {'apng': '.png', 'gif': '.gif', 'frames': '.png'}
+
+def gradient_lut(stops, base=CREAM, opacity=1.0):
+    """
+    Sample a multi-stop gradient into a GRADIENT_LUT_SIZE x 4 RGBA table
+
+    Args:
+        stops: (position, (r, g, b)) pairs, positions from 0 to 1 in order
+        base: Color the gradient is laid over
+        opacity: Opacity of the gradient over base
+    """
+    positions = np.array([position for position, _ in stops], dtype=np.float64)
+    colors = np.array([color for _, color in stops], dtype=np.float64)
+    colors = np.array(base, dtype=np.float64) * (1 - opacity) + colors * opacity
+
+    t = np.linspace(0.0, 1.0, GRADIENT_LUT_SIZE)
+    lut = np.full((GRADIENT_LUT_SIZE, 4), 255, dtype=np.uint8)
+    for channel in range(3):
+        lut[:, channel] = np.rint(np.interp(t, positions, colors[:, channel]))
+    return lut
+
+def _lut_index(t):
+    """Map gradient positions (clipped to 0..1) to LUT rows"""
+    return np.rint(np.clip(t, 0.0, 1.0) * (GRADIENT_LUT_SIZE - 1)).astype(np.intp)
+
+def create_gradient_background(width, height, stops=BACKGROUND_STOPS, kind='linear', angle=90,
+                               center=(0.5, 0.5), radius=None, base=CREAM,
+                               opacity=BACKGROUND_OPACITY, top=0, bottom=None):
+    """
+    Create a gradient background in one pass over a numpy array
+
+    The array is handed to Pillow with Image.frombuffer, so the pixels are
+    not copied. Defaults reproduce the original lavender to soft pink blend.
+
+    Args:
+        width, height: Image size in pixels
+        stops: (position, (r, g, b)) pairs, positions from 0 to 1 in order
+        kind: 'linear' or 'radial'
+        angle: Direction of a linear gradient in degrees; 0 runs left to
+            right, 90 top to bottom, 45 diagonally from the top-left corner
+        center: Center of a radial gradient as fractions of width and height
+        radius: Radius of a radial gradient in pixels; defaults to the
+            distance from the center to the farthest corner
+        base: Color the gradient is laid over
+        opacity: Opacity of the gradient over base
+        top, bottom: Render only these rows of the width x height gradient
+
+    Returns:
+        RGBA image
+    """
+    if bottom is None:
+        bottom = height
+    pixels = gradient_pixels(width, height, stops, kind, angle, center, radius, base, opacity,
+                             top, bottom)
+    return Image.frombuffer('RGBA', (width, bottom - top), pixels, 'raw', 'RGBA', 0, 1)
+
+def gradient_pixels(width, height, stops, kind, angle, center, radius, base, opacity,
+                    top, bottom, out=None):
+    """
+    Shade rows top..bottom of a gradient as packed RGBA uint32 pixels
 
-def draw_cat_face(draw, x, y, size, rotation=0, color=PINK, outline_color=WHITE):
-    """Draw a kawaii anime-style cat face"""
+    Takes the arguments of create_gradient_background(); out, if given,
+    is a (bottom - top, width) uint32 array to shade in place.
+    """
+    # One uint32 per RGBA pixel, so every copy below moves whole pixels
+    lut = gradient_lut(stops, base, opacity).view(np.uint32)[:, 0]
+    pixels = out if out is not None else np.empty((bottom - top, width), dtype=np.uint32)
+
+    if kind == 'linear' and angle % 180 in (0, 90):
+        # Axis-aligned: shade one row or column, then broadcast it
+        vertical = angle % 180 == 90
+        t = np.arange(top, bottom) / height if vertical else np.arange(width) / width
+        if angle % 360 >= 180:
+            t = 1 - t
+        profile = lut[_lut_index(t)]
+        pixels[:] = profile[:, np.newaxis] if vertical else profile[np.newaxis, :]
+    elif kind in ('linear', 'radial'):
+        xs = np.arange(width, dtype=np.float32)
+        if kind == 'linear':
+            dx, dy = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+            # Normalize the projection over the image's corners
+            corners = [x * dx + y * dy for x in (0, width) for y in (0, height)]
+            low, span = min(corners), max(corners) - min(corners)
+            x_term = (xs * dx - low) / span
+        else:
+            cx, cy = center[0] * width, center[1] * height
+            if radius is None:
+                radius = max(math.hypot(x - cx, y - cy) for x in (0, width) for y in (0, height))
+            x_term = ((xs - cx) / radius) ** 2
+        for chunk_top in range(top, bottom, GRADIENT_CHUNK_ROWS):
+            ys = np.arange(chunk_top, min(chunk_top + GRADIENT_CHUNK_ROWS, bottom), dtype=np.float32)
+            if kind == 'linear':
+                t = x_term[np.newaxis, :] + (ys * dy / span)[:, np.newaxis]
+            else:
+                t = np.sqrt(x_term[np.newaxis, :] + (((ys - cy) / radius) ** 2)[:, np.newaxis])
+            pixels[chunk_top - top:chunk_top - top + len(ys)] = lut[_lut_index(t)]
+    else:
+        raise ValueError(f"Unknown gradient kind: {kind}")
+    return pixels
+
+def draw_cat_face(draw, x, y, size, rotation=0, color=PINK, outline_color=WHITE, scale=1):
+    """Draw a kawaii anime-style cat face; scale multiplies the fixed pixel details"""
+    s = scale
     # Main face circle
     draw.ellipse([x - size, y - size, x + size, y + size],
-                 fill=color, outline=outline_color, width=8)
+                 fill=color, outline=outline_color, width=round(8 * s))
 
     # Ears
     ear_size = size * 0.4
@@ -58,8 +210,8 @@ def draw_cat_face(draw, x, y, size, rotation=0, color=PINK, outline_color=WHITE)
         (x - size * 0.3, y - size * 0.8)
     ]
     draw.polygon(ear_points, fill=color, outline=outline_color)
-    draw.ellipse([x - size * 0.75 - 15, y - size * 0.85 - 15,
-                  x - size * 0.75 + 15, y - size * 0.85 + 15],
+    draw.ellipse([x - size * 0.75 - 15 * s, y - size * 0.85 - 15 * s,
+                  x - size * 0.75 + 15 * s, y - size * 0.85 + 15 * s],
                  fill=DARK_PINK)
 
     # Right ear
@@ -69,82 +221,84 @@ def draw_cat_face(draw, x, y, size, rotation=0, color=PINK, outline_color=WHITE)
         (x + size * 0.3, y - size * 0.8)
     ]
     draw.polygon(ear_points, fill=color, outline=outline_color)
-    draw.ellipse([x + size * 0.75 - 15, y - size * 0.85 - 15,
-                  x + size * 0.75 + 15, y - size * 0.85 + 15],
+    draw.ellipse([x + size * 0.75 - 15 * s, y - size * 0.85 - 15 * s,
+                  x + size * 0.75 + 15 * s, y - size * 0.85 + 15 * s],
                  fill=DARK_PINK)
 
     # Eyes - big anime style
     eye_y = y - size * 0.2
     # Left eye
-    draw.ellipse([x - size * 0.4 - 25, eye_y - 35,
-                  x - size * 0.4 + 25, eye_y + 35],
+    draw.ellipse([x - size * 0.4 - 25 * s, eye_y - 35 * s,
+                  x - size * 0.4 + 25 * s, eye_y + 35 * s],
                  fill=(40, 40, 60))
-    draw.ellipse([x - size * 0.4 - 18, eye_y - 28,
-                  x - size * 0.4 + 18, eye_y + 28],
+    draw.ellipse([x - size * 0.4 - 18 * s, eye_y - 28 * s,
+                  x - size * 0.4 + 18 * s, eye_y + 28 * s],
                  fill=ELECTRIC_BLUE)
     # Highlight
-    draw.ellipse([x - size * 0.4 - 10, eye_y - 20,
-                  x - size * 0.4 + 5, eye_y - 5],
+    draw.ellipse([x - size * 0.4 - 10 * s, eye_y - 20 * s,
+                  x - size * 0.4 + 5 * s, eye_y - 5 * s],
                  fill=WHITE)
-    draw.ellipse([x - size * 0.4 + 8, eye_y + 10,
-                  x - size * 0.4 + 15, eye_y + 17],
+    draw.ellipse([x - size * 0.4 + 8 * s, eye_y + 10 * s,
+                  x - size * 0.4 + 15 * s, eye_y + 17 * s],
                  fill=(200, 230, 255))
 
     # Right eye
-    draw.ellipse([x + size * 0.4 - 25, eye_y - 35,
-                  x + size * 0.4 + 25, eye_y + 35],
+    draw.ellipse([x + size * 0.4 - 25 * s, eye_y - 35 * s,
+                  x + size * 0.4 + 25 * s, eye_y + 35 * s],
                  fill=(40, 40, 60))
-    draw.ellipse([x + size * 0.4 - 18, eye_y - 28,
-                  x + size * 0.4 + 18, eye_y + 28],
+    draw.ellipse([x + size * 0.4 - 18 * s, eye_y - 28 * s,
+                  x + size * 0.4 + 18 * s, eye_y + 28 * s],
                  fill=ELECTRIC_BLUE)
     # Highlight
-    draw.ellipse([x + size * 0.4 - 10, eye_y - 20,
-                  x + size * 0.4 + 5, eye_y - 5],
+    draw.ellipse([x + size * 0.4 - 10 * s, eye_y - 20 * s,
+                  x + size * 0.4 + 5 * s, eye_y - 5 * s],
                  fill=WHITE)
-    draw.ellipse([x + size * 0.4 + 8, eye_y + 10,
-                  x + size * 0.4 + 15, eye_y + 17],
+    draw.ellipse([x + size * 0.4 + 8 * s, eye_y + 10 * s,
+                  x + size * 0.4 + 15 * s, eye_y + 17 * s],
                  fill=(200, 230, 255))
 
     # Nose - small triangle
     nose_points = [
         (x, y + size * 0.1),
-        (x - 12, y + size * 0.25),
-        (x + 12, y + size * 0.25)
+        (x - 12 * s, y + size * 0.25),
+        (x + 12 * s, y + size * 0.25)
     ]
     draw.polygon(nose_points, fill=DARK_PINK)
 
     # Mouth - kawaii smile
-    draw.arc([x - 30, y + size * 0.1, x + 30, y + size * 0.5],
-             0, 180, fill=(40, 40, 60), width=6)
+    draw.arc([x - 30 * s, y + size * 0.1, x + 30 * s, y + size * 0.5],
+             0, 180, fill=(40, 40, 60), width=round(6 * s))
 
     # Whiskers
     whisker_color = (255, 255, 255, 200)
+    whisker_width = round(4 * s)
     # Left whiskers
-    draw.line([x - size * 0.8, y, x - size * 1.3, y - 20], fill=whisker_color, width=4)
-    draw.line([x - size * 0.8, y + 20, x - size * 1.3, y + 20], fill=whisker_color, width=4)
-    draw.line([x - size * 0.8, y + 40, x - size * 1.3, y + 60], fill=whisker_color, width=4)
+    draw.line([x - size * 0.8, y, x - size * 1.3, y - 20 * s], fill=whisker_color, width=whisker_width)
+    draw.line([x - size * 0.8, y + 20 * s, x - size * 1.3, y + 20 * s], fill=whisker_color, width=whisker_width)
+    draw.line([x - size * 0.8, y + 40 * s, x - size * 1.3, y + 60 * s], fill=whisker_color, width=whisker_width)
 
     # Right whiskers
-    draw.line([x + size * 0.8, y, x + size * 1.3, y - 20], fill=whisker_color, width=4)
-    draw.line([x + size * 0.8, y + 20, x + size * 1.3, y + 20], fill=whisker_color, width=4)
-    draw.line([x + size * 0.8, y + 40, x + size * 1.3, y + 60], fill=whisker_color, width=4)
+    draw.line([x + size * 0.8, y, x + size * 1.3, y - 20 * s], fill=whisker_color, width=whisker_width)
+    draw.line([x + size * 0.8, y + 20 * s, x + size * 1.3, y + 20 * s], fill=whisker_color, width=whisker_width)
+    draw.line([x + size * 0.8, y + 40 * s, x + size * 1.3, y + 60 * s], fill=whisker_color, width=whisker_width)
 
     # Cheek blush
-    draw.ellipse([x - size * 0.85 - 20, y + size * 0.3 - 15,
-                  x - size * 0.85 + 20, y + size * 0.3 + 15],
+    draw.ellipse([x - size * 0.85 - 20 * s, y + size * 0.3 - 15 * s,
+                  x - size * 0.85 + 20 * s, y + size * 0.3 + 15 * s],
                  fill=(255, 150, 180, 100))
-    draw.ellipse([x + size * 0.85 - 20, y + size * 0.3 - 15,
-                  x + size * 0.85 + 20, y + size * 0.3 + 15],
+    draw.ellipse([x + size * 0.85 - 20 * s, y + size * 0.3 - 15 * s,
+                  x + size * 0.85 + 20 * s, y + size * 0.3 + 15 * s],
                  fill=(255, 150, 180, 100))
 
-def draw_music_note(draw, x, y, size, color, rotation=0):
+def draw_music_note(draw, x, y, size, color, rotation=0, scale=1):
     """Draw a music note"""
+    border = round(3 * scale)
     # Note head
     draw.ellipse([x - size/2, y + size, x + size/2, y + size*2],
-                 fill=color, outline=WHITE, width=3)
+                 fill=color, outline=WHITE, width=border)
     # Stem
-    draw.rectangle([x + size/2 - 6, y - size*2, x + size/2 + 6, y + size],
-                   fill=color, outline=WHITE, width=3)
+    draw.rectangle([x + size/2 - 6 * scale, y - size*2, x + size/2 + 6 * scale, y + size],
+                   fill=color, outline=WHITE, width=border)
     # Flag
     flag_points = [
         (x + size/2, y - size*2),
@@ -153,7 +307,7 @@ def draw_music_note(draw, x, y, size, color, rotation=0):
     ]
     draw.polygon(flag_points, fill=color, outline=WHITE)
 
-def draw_star(draw, x, y, size, color, points=5):
+def draw_star(draw, x, y, size, color, points=5, scale=1):
     """Draw a star shape"""
     coords = []
     for i in range(points * 2):
@@ -163,148 +317,1324 @@ def draw_star(draw, x, y, size, color, points=5):
             x + r * math.cos(angle),
             y + r * math.sin(angle)
         ))
-    draw.polygon(coords, fill=color, outline=WHITE, width=3)
+    draw.polygon(coords, fill=color, outline=WHITE, width=round(3 * scale))
 
-def draw_headphones(draw, x, y, size, color):
+def draw_headphones(draw, x, y, size, color, scale=1):
     """Draw kawaii headphones"""
+    s = scale
     # Headband
     draw.arc([x - size, y - size*0.3, x + size, y + size*1.5],
-             180, 360, fill=color, width=15)
+             180, 360, fill=color, width=round(15 * s))
 
     # Left ear cup
-    draw.ellipse([x - size - 30, y + size*0.5 - 30,
-                  x - size + 30, y + size*0.5 + 30],
-                 fill=color, outline=WHITE, width=6)
-    draw.ellipse([x - size - 20, y + size*0.5 - 20,
-                  x - size + 20, y + size*0.5 + 20],
+    draw.ellipse([x - size - 30 * s, y + size*0.5 - 30 * s,
+                  x - size + 30 * s, y + size*0.5 + 30 * s],
+                 fill=color, outline=WHITE, width=round(6 * s))
+    draw.ellipse([x - size - 20 * s, y + size*0.5 - 20 * s,
+                  x - size + 20 * s, y + size*0.5 + 20 * s],
                  fill=DARK_PINK)
 
     # Right ear cup
-    draw.ellipse([x + size - 30, y + size*0.5 - 30,
-                  x + size + 30, y + size*0.5 + 30],
-                 fill=color, outline=WHITE, width=6)
-    draw.ellipse([x + size - 20, y + size*0.5 - 20,
-                  x + size + 20, y + size*0.5 + 20],
+    draw.ellipse([x + size - 30 * s, y + size*0.5 - 30 * s,
+                  x + size + 30 * s, y + size*0.5 + 30 * s],
+                 fill=color, outline=WHITE, width=round(6 * s))
+    draw.ellipse([x + size - 20 * s, y + size*0.5 - 20 * s,
+                  x + size + 20 * s, y + size*0.5 + 20 * s],
                  fill=DARK_PINK)
 
-# Create main image
-print("Creating Neko Sonic Music Festival Poster...")
-img = create_gradient_background(WIDTH, HEIGHT)
-overlay = Image.new('RGBA', (WIDTH, HEIGHT), (0, 0, 0, 0))
-draw = ImageDraw.Draw(overlay, 'RGBA')
-
-# Add decorative circles in background
-for _ in range(15):
-    x = random.randint(100, WIDTH - 100)
-    y = random.randint(100, HEIGHT - 100)
-    size = random.randint(40, 120)
-    colors = [PINK, ELECTRIC_BLUE, SUNSHINE_YELLOW, LAVENDER, MINT]
-    color = random.choice(colors)
+def draw_circle(draw, x, y, size, color, scale=1):
+    """Draw a translucent decorative background circle"""
     draw.ellipse([x - size, y - size, x + size, y + size],
-                 fill=(*color, 60), outline=(*WHITE, 100), width=4)
-
-# Main cat character - center, large
-main_cat_x = WIDTH // 2
-main_cat_y = HEIGHT // 2 + 50
-draw_cat_face(draw, main_cat_x, main_cat_y, 220, color=PINK)
-
-# Add headphones to main cat
-draw_headphones(draw, main_cat_x, main_cat_y - 50, 180, ELECTRIC_BLUE)
-
-# Smaller cats - friends
-draw_cat_face(draw, 300, 350, 110, color=SUNSHINE_YELLOW)
-draw_cat_face(draw, WIDTH - 300, 380, 100, color=MINT)
-draw_cat_face(draw, 250, HEIGHT - 250, 90, color=LAVENDER)
-draw_cat_face(draw, WIDTH - 280, HEIGHT - 280, 95, color=PEACH)
-
-# Music notes scattered around
-note_positions = [
-    (450, 200, 40, ELECTRIC_BLUE),
-    (1150, 220, 35, PINK),
-    (200, 600, 38, SUNSHINE_YELLOW),
-    (1350, 650, 42, DEEP_PURPLE),
-    (600, 950, 36, MINT),
-    (1000, 980, 39, PINK),
-]
-
-for x, y, size, color in note_positions:
-    draw_music_note(draw, x, y, size, color)
-
-# Stars scattered
-star_positions = [
-    (150, 150, 30, SUNSHINE_YELLOW),
-    (1450, 180, 28, PINK),
-    (100, HEIGHT - 150, 32, ELECTRIC_BLUE),
-    (1500, HEIGHT - 120, 27, LAVENDER),
-    (800, 100, 35, MINT),
-    (700, 1050, 29, DEEP_PURPLE),
-    (1200, 1080, 31, SUNSHINE_YELLOW),
-]
-
-for x, y, size, color in star_positions:
-    draw_star(draw, x, y, size, color)
-
-# Composite overlay onto background
-img = Image.alpha_composite(img.convert('RGBA'), overlay)
-
-# Add text - minimal, as visual accent
-text_layer = Image.new('RGBA', (WIDTH, HEIGHT), (0, 0, 0, 0))
-text_draw = ImageDraw.Draw(text_layer)
-
-# Try to load a fun font, fall back to default
-try:
-    title_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 120)
-    subtitle_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 45)
-    small_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 32)
-except:
-    title_font = ImageFont.load_default()
-    subtitle_font = ImageFont.load_default()
-    small_font = ImageFont.load_default()
-
-# Title - top, bold and playful
-title = "NEKO FEST"
-bbox = text_draw.textbbox((0, 0), title, font=title_font)
-title_width = bbox[2] - bbox[0]
-title_x = (WIDTH - title_width) // 2
-title_y = 80
-
-# Add shadow/outline effect for title
-for offset in [(3, 3), (-3, 3), (3, -3), (-3, -3)]:
-    text_draw.text((title_x + offset[0], title_y + offset[1]),
-                   title, font=title_font, fill=DEEP_PURPLE)
-text_draw.text((title_x, title_y), title, font=title_font, fill=WHITE)
-
-# Subtitle
-subtitle = "Summer Sonic"
-bbox = text_draw.textbbox((0, 0), subtitle, font=subtitle_font)
-subtitle_width = bbox[2] - bbox[0]
-subtitle_x = (WIDTH - subtitle_width) // 2
-subtitle_y = 220
-text_draw.text((subtitle_x, subtitle_y), subtitle, font=subtitle_font,
-               fill=ELECTRIC_BLUE, stroke_width=2, stroke_fill=WHITE)
-
-# Small details at bottom
-detail = "2025"
-bbox = text_draw.textbbox((0, 0), detail, font=small_font)
-detail_width = bbox[2] - bbox[0]
-detail_x = (WIDTH - detail_width) // 2
-detail_y = HEIGHT - 80
-text_draw.text((detail_x, detail_y), detail, font=small_font,
-               fill=PINK, stroke_width=1, stroke_fill=WHITE)
-
-# Composite text
-img = Image.alpha_composite(img, text_layer)
-
-# Convert back to RGB and save
-img = img.convert('RGB')
-
-# Apply slight texture for handmade feel
-noise = Image.effect_noise((WIDTH, HEIGHT), 15)
-img = Image.blend(img, noise.convert('RGB'), 0.03)
-
-# Save final poster
-output_path = '/Users/littlefatz/workspace/FE-DEMO/neko-sonic-poster.png'
-img.save(output_path, 'PNG', dpi=(DPI, DPI), optimize=True)
-print(f"✓ Poster saved: {output_path}")
-print(f"  Dimensions: {WIDTH}x{HEIGHT} (4:3 ratio)")
-print(f"  Style: Neko Sonic - Anime kawaii with music festival energy")
+                 fill=(*color, 60), outline=(*WHITE, 100), width=round(4 * scale))
+
+def shape_extent(kind, size, scale=1):
+    """Box (left, top, right, bottom) around (0, 0) that a shape drawn at the origin stays within"""
+    pad = 10 * scale  # outlines and line caps
+    if kind == 'cat':
+        # Whiskers and ears, or on small cats the fixed-size eyes, blush and ear tips
+        half_width = max(1.3 * size, 0.85 * size + 20 * scale, 0.4 * size + 25 * scale) + pad
+        above = max(1.2 * size, 0.85 * size + 15 * scale, 0.2 * size + 35 * scale) + pad
+        below = max(size, 60 * scale, 0.3 * size + 15 * scale) + pad
+        return (-half_width, -above, half_width, below)
+    if kind == 'headphones':
+        return (-size - 30 * scale - pad, -max(0.3 * size, 30 * scale - 0.5 * size) - pad,
+                size + 30 * scale + pad, max(0.6 * size, 0.5 * size + 30 * scale) + pad)
+    if kind == 'note':
+        return (-0.5 * size - pad, -2 * size - pad, 1.5 * size + pad, 2 * size + pad)
+    return (-size - pad, -size - pad, size + pad, size + pad)
+
+# Drawing function for each kind of scene element
+SHAPES = {
+    'circle': draw_circle,
+    'cat': draw_cat_face,
+    'headphones': draw_headphones,
+    'note': draw_music_note,
+    'star': draw_star,
+}
+
+# Layer each kind of decoration is painted in; consecutive elements of a layer share one
+SHAPE_LAYERS = {
+    'circle': 'circles',
+    'cat': 'cats',
+    'headphones': 'cats',
+    'note': 'notes',
+    'star': 'stars',
+}
+
+# One decoration: kind is a SHAPES key, x/y/size in canvas pixels
+Element = namedtuple('Element', 'kind x y size color')
+
+# Named colors a config's palette may override
+PALETTE = {
+    'pink': PINK,
+    'electric_blue': ELECTRIC_BLUE,
+    'sunshine_yellow': SUNSHINE_YELLOW,
+    'deep_purple': DEEP_PURPLE,
+    'soft_pink': SOFT_PINK,
+    'mint': MINT,
+    'peach': PEACH,
+    'lavender': LAVENDER,
+    'white': WHITE,
+    'cream': CREAM,
+}
+
+# Everything render_poster() needs; a config overrides any of these
+DEFAULT_CONFIG = {
+    'width': WIDTH,
+    'height': HEIGHT,
+    'dpi': DPI,
+    'palette': {},
+    'title': 'NEKO FEST',
+    'subtitle': 'Summer Sonic',
+    'detail': '2025',
+    'seed': 0,
+    'density': 1,
+    'supersample': 2,
+    'strip_rows': None,
+    'texture': 'noise',
+    'texture_sigma': TEXTURE_SIGMA,
+    'texture_cache_dir': None,
+    'font': None,
+    'exports': ['png'],
+    'profile': 'balanced',
+    'output_path': None,
+}
+
+def resolve_config(config=None):
+    """Fill in DEFAULT_CONFIG and merge the palette overrides into PALETTE"""
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    unknown = set(config['palette']) - set(PALETTE)
+    if unknown:
+        raise ValueError(f"Unknown palette colors: {', '.join(sorted(unknown))}")
+    config['palette'] = {**PALETTE, **{name: tuple(color) for name, color in config['palette'].items()}}
+    if config['density'] < 0:
+        raise ValueError(f"Decoration density must not be negative: {config['density']}")
+    return config
+
+def poster_scale(width, height):
+    """Scale of a canvas relative to the WIDTH x HEIGHT design"""
+    return min(width / WIDTH, height / HEIGHT)
+
+# Gap in design pixels kept around scattered decorations, and random
+# positions tried for one before it is left out
+DECORATION_SPACING = 12
+PLACEMENT_ATTEMPTS = 30
+
+# Background circles per poster at density 1, and decorations scattered
+# per density step above it, next to the designed notes and stars
+CIRCLE_COUNT = 15
+SCATTER_COUNTS = {'note': 6, 'star': 7}
+
+# Size ranges of scattered decorations at density 1, in design pixels, and their colors
+SCATTER_SIZES = {'circle': (40, 120), 'note': (35, 42), 'star': (27, 35)}
+SCATTER_COLORS = {
+    'circle': ['pink', 'electric_blue', 'sunshine_yellow', 'lavender', 'mint'],
+    'note': ['electric_blue', 'pink', 'sunshine_yellow', 'deep_purple', 'mint'],
+    'star': ['sunshine_yellow', 'pink', 'electric_blue', 'lavender', 'mint', 'deep_purple'],
+}
+
+class SpatialGrid:
+    """
+    Uniform grid of cells for overlap tests between boxes
+
+    Each box (left, top, right, bottom) is filed under every cell it
+    touches, so a test only looks at boxes sharing a cell with it. Placed
+    boxes never overlap, so with cells about the size of a decoration a
+    cell holds a bounded number of them, and placing n decorations takes
+    time linear in n however dense the poster.
+    """
+
+    def __init__(self, width, height, cell):
+        self.cell = cell
+        self.columns = max(1, math.ceil(width / cell))
+        self.rows = max(1, math.ceil(height / cell))
+        self.cells = [[] for _ in range(self.columns * self.rows)]
+
+    def _cells(self, box):
+        """Cells a box touches, clipped to the grid"""
+        left = min(max(int(box[0] // self.cell), 0), self.columns - 1)
+        right = min(max(int(box[2] // self.cell), 0), self.columns - 1)
+        top = min(max(int(box[1] // self.cell), 0), self.rows - 1)
+        bottom = min(max(int(box[3] // self.cell), 0), self.rows - 1)
+        for row in range(top, bottom + 1):
+            yield from self.cells[row * self.columns + left:row * self.columns + right + 1]
+
+    def add(self, box):
+        for cell in self._cells(box):
+            cell.append(box)
+
+    def collides(self, box):
+        """True if box overlaps any box added so far"""
+        left, top, right, bottom = box
+        for cell in self._cells(box):
+            for other in cell:
+                if left < other[2] and other[0] < right and top < other[3] and other[1] < bottom:
+                    return True
+        return False
+
+def padded_box(kind, x, y, size, spacing=DECORATION_SPACING):
+    """
+    shape_extent() of a decoration at (x, y), grown by half the spacing on every side
+
+    Layout is in design pixels, where sprites draw outlines and fixed-size
+    details at scale 1 whatever the decoration's size.
+    """
+    left, top, right, bottom = shape_extent(kind, size)
+    pad = spacing / 2
+    return (x + left - pad, y + top - pad, x + right + pad, y + bottom + pad)
+
+def scatter(rng, grid, kinds, sizes, shrink=1, attempts=PLACEMENT_ATTEMPTS):
+    """
+    Place decorations, in the order of kinds, where they overlap nothing in grid
+
+    Each gets a whole-pixel size from its kind's range in sizes, so
+    sprites are shared, and up to attempts random centres that keep it on
+    the canvas; the first whose box is clear is kept and added to grid.
+    The spacing between them is DECORATION_SPACING times shrink, so it
+    shrinks with the sizes; outlines and fixed-size details do not, and
+    their padding stays at design scale. A decoration
+    that finds no room is left out, and once attempts of a kind in a row
+    have, the canvas counts as full for that kind, so a crowded poster
+    gets fewer decorations rather than overlapping ones or a slow layout.
+
+    Returns:
+        dict: kind -> list of (x, y, size) placed
+    """
+    placed = {kind: [] for kind in sizes}
+    misses = dict.fromkeys(placed, 0)
+    spacing = DECORATION_SPACING * shrink
+    for kind in kinds:
+        if misses[kind] >= attempts:
+            continue
+        low, high = sizes[kind]
+        left, top, right, bottom = padded_box(kind, 0, 0, high, spacing)
+        size = max(1, round(rng.uniform(low, high)))
+        for _ in range(attempts):
+            x, y = rng.uniform(-left, WIDTH - right), rng.uniform(-top, HEIGHT - bottom)
+            box = padded_box(kind, x, y, size, spacing)
+            if not grid.collides(box):
+                grid.add(box)
+                placed[kind].append((x, y, size))
+                misses[kind] = 0
+                break
+        else:
+            misses[kind] += 1
+    return placed
+
+def build_scene(width, height, palette, rng, density=1, keep_out=()):
+    """
+    Lay out every decoration, back to front
+
+    Positions are designed for WIDTH x HEIGHT and scaled to the canvas.
+    The cats and the designed notes and stars are fixed; background
+    circles, and at densities above 1 further notes and stars, are
+    scattered with rng, apart from each other and clear of the keep_out
+    boxes (canvas pixels, e.g. the text). Scattered notes and stars also
+    keep clear of the cats and designed decorations. Counts grow with
+    density, until the canvas is full, and scattered sizes and spacing
+    shrink with its square root, so a dense poster gets more, finer
+    decorations rather than a fuller canvas.
+
+    Returns:
+        list: Element tuples
+    """
+    sx, sy = width / WIDTH, height / HEIGHT
+    s = poster_scale(width, height)
+    shrink = 1 / math.sqrt(density) if density > 1 else 1
+    sizes = {kind: (low * shrink, high * shrink) for kind, (low, high) in SCATTER_SIZES.items()}
+
+    def element(kind, x, y, size, color):
+        return Element(kind, round(x * sx), round(y * sy), size * s, palette[color])
+
+    # Text and other keep-out zones in design pixels
+    keep_out = [(left / sx, top / sy, right / sx, bottom / sy) for left, top, right, bottom in keep_out]
+
+    scene = []
+
+    # Decorative circles in background, behind the cats but clear of the text
+    circles = SpatialGrid(WIDTH, HEIGHT, 2 * sizes['circle'][1] + 20)
+    for box in keep_out:
+        circles.add(box)
+    for x, y, size in scatter(rng, circles, ['circle'] * round(CIRCLE_COUNT * density), sizes, shrink)['circle']:
+        scene.append(element('circle', x, y, size, rng.choice(SCATTER_COLORS['circle'])))
+
+    # Main cat character - center, large, with headphones
+    main_cat_x = WIDTH // 2
+    main_cat_y = HEIGHT // 2 + 50
+    fixed = [
+        ('cat', main_cat_x, main_cat_y, 220, 'pink'),
+        ('headphones', main_cat_x, main_cat_y - 50, 180, 'electric_blue'),
+
+        # Smaller cats - friends
+        ('cat', 300, 350, 110, 'sunshine_yellow'),
+        ('cat', WIDTH - 300, 380, 100, 'mint'),
+        ('cat', 250, HEIGHT - 250, 90, 'lavender'),
+        ('cat', WIDTH - 280, HEIGHT - 280, 95, 'peach'),
+
+        # Music notes scattered around
+        ('note', 450, 200, 40, 'electric_blue'),
+        ('note', 1150, 220, 35, 'pink'),
+        ('note', 200, 600, 38, 'sunshine_yellow'),
+        ('note', 1350, 650, 42, 'deep_purple'),
+        ('note', 600, 950, 36, 'mint'),
+        ('note', 1000, 980, 39, 'pink'),
+
+        # Stars scattered
+        ('star', 150, 150, 30, 'sunshine_yellow'),
+        ('star', 1450, 180, 28, 'pink'),
+        ('star', 100, HEIGHT - 150, 32, 'electric_blue'),
+        ('star', 1500, HEIGHT - 120, 27, 'lavender'),
+        ('star', 800, 100, 35, 'mint'),
+        ('star', 700, 1050, 29, 'deep_purple'),
+        ('star', 1200, 1080, 31, 'sunshine_yellow'),
+    ]
+
+    # Further notes and stars for dense posters, around everything above and
+    # placed in a shuffled order so neither kind crowds out the other
+    kinds = [kind for kind, count in SCATTER_COUNTS.items()
+             for _ in range(round(count * (density - 1)) if density > 1 else 0)]
+    rng.shuffle(kinds)
+    foreground = SpatialGrid(WIDTH, HEIGHT, 4 * sizes['note'][1] + 20)
+    for box in keep_out:
+        foreground.add(box)
+    if kinds:
+        for kind, x, y, size, _ in fixed:
+            foreground.add(padded_box(kind, x, y, size))
+    placed = scatter(rng, foreground, kinds, sizes, shrink)
+
+    # Scattered decorations after the designed ones of their kind, keeping each layer one run
+    for kind in SCATTER_COUNTS:
+        for x, y, size in placed[kind]:
+            fixed.append((kind, x, y, size, rng.choice(SCATTER_COLORS[kind])))
+    layers = list(dict.fromkeys(SHAPE_LAYERS.values()))
+    fixed.sort(key=lambda decoration: layers.index(SHAPE_LAYERS[decoration[0]]))
+    scene.extend(element(*decoration) for decoration in fixed)
+
+    return scene
+
+def draw_element(draw, element, scale=1):
+    """Draw one scene element with its SHAPES function"""
+    SHAPES[element.kind](draw, element.x, element.y, element.size, color=element.color, scale=scale)
+
+# Output formats: Pillow format name and file extension
+EXPORT_FORMATS = {
+    'png': ('PNG', '.png'),
+    'webp': ('WEBP', '.webp'),
+    'jpeg': ('JPEG', '.jpg'),
+}
+
+# Encoder settings per profile; quality is the same in each, only effort changes
+ENCODER_PROFILES = {
+    'fast': {
+        'png': {'compress_level': 1},
+        'webp': {'quality': 82, 'method': 0},
+        'jpeg': {'quality': 85},
+    },
+    'balanced': {
+        'png': {'compress_level': 6},
+        'webp': {'quality': 82, 'method': 4},
+        'jpeg': {'quality': 85, 'optimize': True},
+    },
+    'smallest': {
+        'png': {'optimize': True},
+        'webp': {'quality': 82, 'method': 6},
+        'jpeg': {'quality': 85, 'optimize': True, 'progressive': True},
+    },
+}
+
+# Rasterized sprites kept per process, keyed by shape, size, color and sampling
+SPRITE_CACHE_SIZE = 512
+
+@lru_cache(maxsize=SPRITE_CACHE_SIZE)
+def render_sprite(kind, size, color, scale=1, supersample=1):
+    """
+    Rasterize one decoration into a tightly cropped RGBA sprite
+
+    The shape is drawn supersample times larger and box-filtered down
+    (with premultiplied alpha, so edges don't darken), which antialiases
+    the otherwise aliased ImageDraw edges. Results are cached, so every
+    repeat of a shape is a single paste.
+
+    Returns:
+        tuple: (sprite, dx, dy), where (dx, dy) is the sprite's top-left
+        corner relative to the element's center
+    """
+    left, top, right, bottom = shape_extent(kind, size, scale)
+    left, top = math.floor(left), math.floor(top)
+    right, bottom = math.ceil(right), math.ceil(bottom)
+    k = supersample
+    canvas = Image.new('RGBA', ((right - left) * k, (bottom - top) * k), (0, 0, 0, 0))
+    SHAPES[kind](ImageDraw.Draw(canvas, 'RGBA'), -left * k, -top * k, size * k,
+                 color=color, scale=scale * k)
+    if k > 1:
+        canvas = canvas.convert('RGBa').reduce(k).convert('RGBA')
+    bbox = canvas.getbbox()
+    if bbox is None:
+        return canvas.crop((0, 0, 0, 0)), 0, 0
+    return canvas.crop(bbox), bbox[0] + left, bbox[1] + top
+
+def paste_element(img, element, scale=1, supersample=1):
+    """
+    Composite one element's cached sprite onto an opaque image
+
+    Pasting with the sprite's alpha as mask is "over" compositing when the
+    destination is opaque, and Image.paste() clips at the edges.
+    """
+    sprite, dx, dy = render_sprite(element.kind, element.size, element.color, scale, supersample)
+    img.paste(sprite, (element.x + dx, element.y + dy), sprite)
+
+def load_fonts(scale=1, family=None):
+    """
+    Load the title, subtitle and detail fonts from the font index
+
+    Tries family, then FONT_FAMILIES, and falls back to Pillow's default font
+    at the same sizes when none of them is installed.
+    """
+    sizes = [round(size * scale) for size in TEXT_SIZES]
+    face = default_index().first(((family,) if family else ()) + FONT_FAMILIES)
+    if face is None:
+        return tuple(ImageFont.load_default(size) for size in sizes)
+    return tuple(load_face(face.path, size, face.index) for size in sizes)
+
+def layout_text(config, scale=1):
+    """
+    Position the title, subtitle and bottom detail line, centered
+
+    Returns:
+        list: (xy, text, font, options) for ImageDraw.text(), back to front
+    """
+    width, height, palette = config['width'], config['height'], config['palette']
+    title_font, subtitle_font, small_font = load_fonts(scale, config['font'])
+    measure = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+    items = []
+
+    # Title - top, bold and playful
+    title = config['title']
+    bbox = measure.textbbox((0, 0), title, font=title_font)
+    title_width = bbox[2] - bbox[0]
+    title_x = (width - title_width) // 2
+    title_y = round(80 * scale)
+
+    # Add shadow/outline effect for title
+    shadow = round(3 * scale)
+    for offset in [(shadow, shadow), (-shadow, shadow), (shadow, -shadow), (-shadow, -shadow)]:
+        items.append(((title_x + offset[0], title_y + offset[1]), title, title_font,
+                      {'fill': palette['deep_purple']}))
+    items.append(((title_x, title_y), title, title_font, {'fill': palette['white']}))
+
+    # Subtitle
+    subtitle = config['subtitle']
+    bbox = measure.textbbox((0, 0), subtitle, font=subtitle_font)
+    subtitle_width = bbox[2] - bbox[0]
+    subtitle_x = (width - subtitle_width) // 2
+    subtitle_y = round(220 * scale)
+    items.append(((subtitle_x, subtitle_y), subtitle, subtitle_font,
+                  {'fill': palette['electric_blue'], 'stroke_width': round(2 * scale),
+                   'stroke_fill': palette['white']}))
+
+    # Small details at bottom
+    detail = config['detail']
+    bbox = measure.textbbox((0, 0), detail, font=small_font)
+    detail_width = bbox[2] - bbox[0]
+    detail_x = (width - detail_width) // 2
+    detail_y = height - round(80 * scale)
+    items.append(((detail_x, detail_y), detail, small_font,
+                  {'fill': palette['pink'], 'stroke_width': max(1, round(scale)),
+                   'stroke_fill': palette['white']}))
+    return items
+
+def noise_tile(size, sigma, rng):
+    """Gaussian grain like Image.effect_noise; white noise tiles seamlessly"""
+    return rng.normal(128, sigma, (size, size))
+
+def paper_tile(size, sigma, rng):
+    """Soft paper fibres, mostly horizontal, over fine grain; filtered in frequency space so it wraps"""
+    freq = np.fft.fftfreq(size)
+    fx, fy = np.meshgrid(freq, freq)
+    falloff = np.exp(-((fx / 0.02) ** 2 + (fy / 0.08) ** 2))
+    fibres = np.real(np.fft.ifft2(np.fft.fft2(rng.standard_normal((size, size))) * falloff))
+    fibres /= fibres.std()
+    return 128 + sigma * (0.8 * fibres + 0.4 * rng.standard_normal((size, size)))
+
+def halftone_tile(size, sigma, rng):
+    """Regular screen of antialiased dots, HALFTONE_PITCH apart, averaging mid-gray"""
+    pitch = HALFTONE_PITCH
+    offsets = np.arange(size) % pitch - (pitch - 1) / 2
+    distance = np.hypot(offsets[np.newaxis, :], offsets[:, np.newaxis])
+    coverage = np.clip(HALFTONE_DOT * pitch - distance + 0.5, 0, 1)
+    return 128 + 3 * sigma * (coverage.mean() - coverage)
+
+# Grain generators: f(size, sigma, rng) -> size x size array of gray values
+# around 128, which must wrap seamlessly so tiles can repeat
+TEXTURES = {
+    'noise': noise_tile,
+    'paper': paper_tile,
+    'halftone': halftone_tile,
+}
+
+def _texture_cache_path(cache_dir, kind, seed, sigma):
+    return os.path.join(cache_dir, f"{kind}-{seed}-{sigma:g}-{TEXTURE_TILE_SIZE}-v{TEXTURE_VERSION}.png")
+
+@lru_cache(maxsize=64)
+def texture_tile(kind, seed, sigma, opacity, cache_dir=None):
+    """
+    A TEXTURE_TILE_SIZE square grain tile as RGBA, alpha set to opacity
+
+    The gray tile is generated once per (kind, seed, sigma), kept in memory
+    and, with cache_dir, saved as a PNG so later processes load it instead.
+    """
+    gray = None
+    if cache_dir:
+        path = _texture_cache_path(cache_dir, kind, seed, sigma)
+        try:
+            with Image.open(path) as cached:
+                gray = cached.convert('L')
+        except (FileNotFoundError, OSError):
+            gray = None
+    if gray is None:
+        if kind not in TEXTURES:
+            raise ValueError(f"Unknown texture: {kind}")
+        values = TEXTURES[kind](TEXTURE_TILE_SIZE, sigma, np.random.default_rng(seed))
+        gray = Image.fromarray(np.clip(np.rint(values), 0, 255).astype(np.uint8), 'L')
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                gray.save(f, 'PNG')
+            os.replace(tmp_path, path)
+    tile = Image.merge('RGBA', (gray, gray, gray, Image.new('L', gray.size, round(opacity * 255))))
+    return tile
+
+class CompositeStats:
+    """
+    Wall time and buffer allocations per compositing stage
+
+    Stages are timed with stage(); buffers a stage allocates through
+    empty() or new_image() are counted against it. Totals add up over
+    strips. exports holds export_poster()'s results.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.exports = []
+        self._current = None
+
+    @contextmanager
+    def stage(self, name):
+        entry = self.stages.setdefault(name, {'seconds': 0.0, 'allocations': 0, 'bytes': 0})
+        previous, self._current = self._current, entry
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry['seconds'] += time.perf_counter() - start
+            self._current = previous
+
+    def allocated(self, nbytes):
+        """Count a buffer of nbytes against the current stage"""
+        if self._current is not None:
+            self._current['allocations'] += 1
+            self._current['bytes'] += nbytes
+
+    def empty(self, shape, dtype):
+        """np.empty(), counted"""
+        array = np.empty(shape, dtype=dtype)
+        self.allocated(array.nbytes)
+        return array
+
+    def new_image(self, mode, size):
+        """Image.new(), counted; Pillow stores RGB and RGBA at 4 bytes a pixel"""
+        self.allocated(size[0] * size[1] * (1 if mode == 'L' else 4))
+        return Image.new(mode, size)
+
+    def report(self):
+        """One line per stage, in the order they first ran"""
+        lines = [f"  {'stage':<12} {'ms':>9} {'allocs':>7} {'MB':>9}"]
+        for name, entry in self.stages.items():
+            lines.append(f"  {name:<12} {entry['seconds'] * 1000:>9.1f} {entry['allocations']:>7} "
+                         f"{entry['bytes'] / 2**20:>9.2f}")
+        for export in self.exports:
+            lines.append(f"  {export['path']}: {export['size'][0]}x{export['size'][1]}, "
+                         f"{export['bytes'] / 1024:.0f} KB in {export['ms']:.0f} ms")
+        return '\n'.join(lines)
+
+def text_sprites(items):
+    """
+    Rasterize laid out text, one RGBA sprite per line, back to front
+
+    Returns:
+        list: (sprite, left, top) in canvas pixels
+    """
+    measure = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+    sprites = []
+    for (x, y), text, font, options in items:
+        bbox = measure.textbbox((0, 0), text, font=font,
+                                stroke_width=options.get('stroke_width', 0))
+        if bbox[2] <= bbox[0] or bbox[3] <= bbox[1]:
+            continue
+        sprite = Image.new('RGBA', (bbox[2] - bbox[0], bbox[3] - bbox[1]), (0, 0, 0, 0))
+        ImageDraw.Draw(sprite).text((-bbox[0], -bbox[1]), text, font=font, **options)
+        sprites.append((sprite, x + bbox[0], y + bbox[1]))
+    return sprites
+
+def text_boxes(sprites):
+    """Canvas boxes (left, top, right, bottom) covered by text_sprites(), for build_scene() to keep clear"""
+    return [(left, top, left + sprite.width, top + sprite.height) for sprite, left, top in sprites]
+
+def poster_layers(config):
+    """
+    Declare a resolved config's layers, back to front
+
+    Each layer is (name, paint). paint(img, top, scratch) paints canvas rows
+    top..top + img.height into the opaque RGBA image img in place; scratch
+    is a (img.height, img.width) uint32 array it may overwrite. Every layer
+    works per pixel from canvas coordinates, so any split into strips
+    gives the same pixels. Decorations are one layer per run of
+    SHAPE_LAYERS, so stats time circles, cats, notes and stars apart.
+    """
+    width, height, palette = config['width'], config['height'], config['palette']
+    scale = poster_scale(width, height)
+    supersample = config['supersample']
+    text = text_sprites(layout_text(config, scale))
+    scene = build_scene(width, height, palette, random.Random(config['seed']), config['density'],
+                        text_boxes(text))
+
+    def background(img, top, scratch):
+        gradient_pixels(width, height, [(0.0, palette['lavender']), (1.0, palette['soft_pink'])],
+                        'linear', 90, None, None, palette['cream'], BACKGROUND_OPACITY,
+                        top, top + img.height, out=scratch)
+        img.frombytes(scratch)
+
+    def shapes(elements):
+        def paint(img, top, scratch):
+            # Decorations, back to front, pasted "over" the opaque strip
+            for element in elements:
+                sprite, dx, dy = render_sprite(element.kind, element.size, element.color,
+                                               scale, supersample)
+                if element.y + dy < top + img.height and element.y + dy + sprite.height > top:
+                    img.paste(sprite, (element.x + dx, element.y + dy - top), sprite)
+        return paint
+
+    def text_layer(img, top, scratch):
+        # Text - minimal, as visual accent
+        for sprite, left, sprite_top in text:
+            if sprite_top < top + img.height and sprite_top + sprite.height > top:
+                img.paste(sprite, (left, sprite_top - top), sprite)
+
+    def texture(img, top, scratch):
+        # Slight grain for handmade feel: one cached tile pasted in a grid fixed to the canvas
+        tile = texture_tile(config['texture'], config['seed'], config['texture_sigma'],
+                            TEXTURE_OPACITY, config['texture_cache_dir'])
+        size = tile.width
+        for y in range(top - top % size, top + img.height, size):
+            for x in range(0, width, size):
+                img.paste(tile, (x, y - top), tile)
+
+    layers = [('background', background)]
+    for name, elements in itertools.groupby(scene, lambda element: SHAPE_LAYERS[element.kind]):
+        layers.append((name, shapes(list(elements))))
+    layers.append(('text', text_layer))
+    if config['texture']:
+        layers.append(('texture', texture))
+    return layers
+
+def flatten_layers(layers, width, top, bottom, stats):
+    """
+    Paint every layer, in order, into one RGBA image for canvas rows top..bottom
+
+    Allocates the image and a single scratch array the layers share.
+    """
+    with stats.stage('buffer'):
+        img = stats.new_image('RGBA', (width, bottom - top))
+        scratch = stats.empty((bottom - top, width), np.uint32)
+    for name, paint in layers:
+        with stats.stage(name):
+            paint(img, top, scratch)
+    return img
+
+def parse_export(spec):
+    """
+    Parse an export target: a format, optionally '@' a thumbnail width
+
+    'png' is the full-size PNG, 'webp@400' a WebP 400 pixels wide.
+
+    Returns:
+        tuple: (format, width or None for full size)
+    """
+    fmt, _, width = spec.lower().partition('@')
+    fmt = 'jpeg' if fmt == 'jpg' else fmt
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return fmt, int(width) if width else None
+
+def export_path(output_path, fmt, width=None):
+    """Output path of one export: output_path's extension swapped, thumbnails suffixed -<width>w"""
+    root, _ = os.path.splitext(output_path)
+    return root + (f"-{width}w" if width else '') + EXPORT_FORMATS[fmt][1]
+
+def _encode_target(img, fmt, width, path, options, dpi):
+    """Thread pool task: resize if needed, encode and write one target"""
+    start = time.perf_counter()
+    if width:
+        height = max(1, round(img.height * width / img.width))
+        img = img.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+    if fmt != 'webp':
+        options = {**options, 'dpi': (dpi, dpi)}
+    img.save(path, EXPORT_FORMATS[fmt][0], **options)
+    return {
+        'path': path, 'format': fmt, 'size': img.size,
+        'bytes': os.path.getsize(path),
+        'ms': round((time.perf_counter() - start) * 1000, 1),
+    }
+
+def export_poster(img, output_path, exports=('png',), profile='balanced', dpi=DPI, workers=None):
+    """
+    Encode one rendered image to every export target at once
+
+    Targets run on a thread pool; Pillow's resize and encoders release the
+    GIL, so they use separate cores.
+
+    Args:
+        img: The RGB poster
+        output_path: Base path; each target swaps in its own extension
+        exports: Target specs for parse_export(), such as 'webp@400'
+        profile: ENCODER_PROFILES key, trading encode time against size
+        dpi: Resolution recorded in PNG and JPEG files
+
+    Returns:
+        list: {'path', 'format', 'size', 'bytes', 'ms'} per target, in order
+    """
+    if profile not in ENCODER_PROFILES:
+        raise ValueError(f"Unknown encoder profile: {profile}")
+    targets = [parse_export(spec) for spec in exports]
+    img.load()
+    with ThreadPoolExecutor(workers or min(len(targets), os.cpu_count() or 1)) as pool:
+        futures = [
+            pool.submit(_encode_target, img, fmt, width, export_path(output_path, fmt, width),
+                        ENCODER_PROFILES[profile][fmt], dpi)
+            for fmt, width in targets
+        ]
+        return [future.result() for future in futures]
+
+def png_chunk(file, kind, data):
+    """Write one PNG chunk: length, type, data and CRC"""
+    file.write(struct.pack('>I', len(data)) + kind + data)
+    file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+def sub_filter(pixels, channels=3):
+    """
+    PNG-filter rows of a (rows, width, 3 or 4) uint8 array with the Sub filter
+
+    Keeps the first channels channels; each byte becomes itself minus the
+    same channel of the previous pixel, which suits smooth gradients.
+
+    Returns:
+        bytes: Filter-type byte plus filtered row, per row, ready for zlib
+    """
+    count, width = pixels.shape[:2]
+    data = pixels[..., :channels]
+    filtered = np.empty((count, width * channels + 1), dtype=np.uint8)
+    filtered[:, 0] = 1
+    body = filtered[:, 1:].reshape(count, width, channels)
+    body[:, 0] = data[:, 0]
+    np.subtract(data[:, 1:], data[:, :-1], out=body[:, 1:])
+    return filtered.tobytes()
+
+class PNGStreamWriter:
+    """
+    Write an RGB PNG a band of rows at a time
+
+    Rows are Sub-filtered and fed through one zlib stream into IDAT
+    chunks as they arrive, so the whole image never has to be in memory.
+    """
+
+    IDAT_SIZE = 1 << 16
+
+    def __init__(self, file, width, height, dpi=None, level=6):
+        self.file = file
+        self.width = width
+        self.rows_left = height
+        self._compressor = zlib.compressobj(level)
+        self._pending = []
+        self._pending_bytes = 0
+        file.write(b'\x89PNG\r\n\x1a\n')
+        png_chunk(file, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        if dpi:
+            ppm = int(dpi / 0.0254 + 0.5)
+            png_chunk(file, b'pHYs', struct.pack('>IIB', ppm, ppm, 1))
+
+    def _queue(self, data):
+        if data:
+            self._pending.append(data)
+            self._pending_bytes += len(data)
+        if self._pending_bytes >= self.IDAT_SIZE:
+            png_chunk(self.file, b'IDAT', b''.join(self._pending))
+            self._pending, self._pending_bytes = [], 0
+
+    def write(self, pixels):
+        """Append the next rows, given as a (rows, width, 3 or 4) uint8 array; a 4th channel is dropped"""
+        count = len(pixels)
+        if count > self.rows_left:
+            raise ValueError("More rows than the PNG header declares")
+        self._queue(self._compressor.compress(sub_filter(pixels)))
+        self.rows_left -= count
+
+    def close(self):
+        if self.rows_left:
+            raise ValueError(f"{self.rows_left} rows were never written")
+        self._queue(self._compressor.flush())
+        if self._pending:
+            png_chunk(self.file, b'IDAT', b''.join(self._pending))
+        png_chunk(self.file, b'IEND', b'')
+
+class APNGWriter:
+    """
+    Write an animated RGBA PNG a frame at a time
+
+    The first frame is stored whole as the default image. Every later
+    frame is only the rectangle that changed, blended over the previous
+    frame, with pixels that did not change left fully transparent.
+    """
+
+    def __init__(self, file, width, height, frames, fps, loop=0, dpi=None, level=6):
+        self.file = file
+        self.size = (width, height)
+        self.frames_left = frames
+        self.fps = fps
+        self.level = level
+        self._sequence = 0
+        file.write(b'\x89PNG\r\n\x1a\n')
+        png_chunk(file, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+        if dpi:
+            ppm = int(dpi / 0.0254 + 0.5)
+            png_chunk(file, b'pHYs', struct.pack('>IIB', ppm, ppm, 1))
+        png_chunk(file, b'acTL', struct.pack('>II', frames, loop))
+
+    def _next_sequence(self):
+        self._sequence += 1
+        return self._sequence - 1
+
+    def write(self, pixels, box=None):
+        """
+        Append a frame
+
+        Args:
+            pixels: (rows, cols, 4) uint8 RGBA array covering box
+            box: (left, top, right, bottom) the frame changes, or None for a
+                whole frame; the first frame must be whole
+        """
+        if not self.frames_left:
+            raise ValueError("More frames than the acTL chunk declares")
+        first = self._sequence == 0
+        left, top, right, bottom = box or (0, 0) + self.size
+        if first and (right - left, bottom - top) != self.size:
+            raise ValueError("The first frame must cover the whole canvas")
+        # fcTL: sequence, size, offset, delay 1/fps, dispose none, blend source or over
+        png_chunk(self.file, b'fcTL', struct.pack('>IIIIIHHBB', self._next_sequence(), right - left,
+                                                  bottom - top, left, top, 1, self.fps, 0, 0 if first else 1))
+        data = zlib.compress(sub_filter(pixels, 4), self.level)
+        if first:
+            png_chunk(self.file, b'IDAT', data)
+        else:
+            png_chunk(self.file, b'fdAT', struct.pack('>I', self._next_sequence()) + data)
+        self.frames_left -= 1
+
+    def close(self):
+        if self.frames_left:
+            raise ValueError(f"{self.frames_left} frames were never written")
+        png_chunk(self.file, b'IEND', b'')
+
+class GIFWriter:
+    """
+    Write a looping GIF a frame at a time
+
+    The first frame's colors become the global palette, which every frame
+    is mapped to without dithering, so unchanged pixels keep their index.
+    Later frames are only the rectangle that changed, with pixels that did
+    not change set to the TRANSPARENT index.
+    """
+
+    TRANSPARENT = 255
+
+    def __init__(self, file, width, height, fps, loop=0):
+        self.file = file
+        self.size = (width, height)
+        self.loop = loop
+        self.delay = round(1000 / fps)  # GIF delays are in 10 ms steps; Pillow rounds down
+        self._palette = None
+
+    def write(self, img, box=None, mask=None):
+        """
+        Append a frame
+
+        Args:
+            img: RGB image covering box
+            box: (left, top, right, bottom) the frame changes, or None for a
+                whole frame; the first frame must be whole
+            mask: 'L' image the size of img, 0 where pixels did not change
+        """
+        from PIL import GifImagePlugin
+        if self._palette is None:
+            if img.size != self.size:
+                raise ValueError("The first frame must cover the whole canvas")
+            self._palette = img.quantize(self.TRANSPARENT)
+            colors = self._palette.getpalette()
+            self.file.write(b'GIF89a' + struct.pack('<HHBBB', *self.size, 0xF7, 0, 0))
+            self.file.write(bytes(colors) + bytes(768 - len(colors)))
+            self.file.write(b'!\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', self.loop) + b'\x00')
+        frame = img.quantize(palette=self._palette, dither=Image.Dither.NONE)
+        params = {'duration': self.delay, 'disposal': 1}
+        if mask is not None:
+            frame.paste(self.TRANSPARENT, mask=mask.point(lambda value: 255 - value))
+            params['transparency'] = self.TRANSPARENT
+        for data in GifImagePlugin.getdata(frame, (box or (0, 0))[:2], **params):
+            self.file.write(data)
+
+    def close(self):
+        self.file.write(b';')
+
+def render_poster(config=None, stats=None):
+    """
+    Render a poster, optionally saving it
+
+    The same config, seed included, always produces the same pixels and,
+    when saved, the same PNG bytes.
+
+    Args:
+        config (dict): Overrides for DEFAULT_CONFIG: width, height, dpi,
+            palette (name -> (r, g, b) overrides of PALETTE), title,
+            subtitle, detail, seed, density (decoration count multiplier,
+            see build_scene()), supersample (antialiasing factor for
+            decorations, 1 for none), strip_rows, texture (a TEXTURES key,
+            or None for no grain), texture_sigma, texture_cache_dir (keep
+            grain tiles on disk across runs), exports and profile (see
+            export_poster()) and output_path (None to skip saving). With
+            strip_rows set, the poster is rendered and streamed to a PNG at
+            output_path that many rows at a time, so memory depends on the
+            strip height rather than the canvas size; the pixels are
+            identical to a full-frame render.
+        stats (CompositeStats): Collects per-stage timings and allocations,
+            and the export results
+
+    Returns:
+        The RGB poster image, or None when rendering in strips
+    """
+    config = resolve_config(config)
+    stats = stats if stats is not None else CompositeStats()
+    width, height = config['width'], config['height']
+    with stats.stage('layout'):
+        layers = poster_layers(config)
+
+    if config['strip_rows']:
+        if not config['output_path']:
+            raise ValueError("Rendering in strips needs an output_path to stream to")
+        if list(config['exports']) != ['png']:
+            raise ValueError("Rendering in strips only writes the full-size PNG")
+        with open(config['output_path'], 'wb') as f:
+            writer = PNGStreamWriter(f, width, height, config['dpi'])
+            for top in range(0, height, config['strip_rows']):
+                bottom = min(top + config['strip_rows'], height)
+                strip = flatten_layers(layers, width, top, bottom, stats)
+                with stats.stage('encode'):
+                    pixels = np.asarray(strip)
+                    stats.allocated(pixels.nbytes)
+                    writer.write(pixels)
+            with stats.stage('encode'):
+                writer.close()
+        return None
+
+    img = flatten_layers(layers, width, 0, height, stats)
+    with stats.stage('encode'):
+        img = img.convert('RGB')
+        stats.allocated(width * height * 4)
+        if config['output_path']:
+            stats.exports = export_poster(img, config['output_path'], config['exports'],
+                                          config['profile'], config['dpi'])
+    return img
+
+def animate_scene(scene, t, scale=1):
+    """
+    The scene at loop position t, from 0 up to 1
+
+    Cats bob, stars twinkle and notes drift, each on its own phase;
+    headphones bob with the cat before them and circles stay put. Motion
+    is periodic in t, so frames at t = i / n loop seamlessly.
+    """
+    moved = []
+    phase = t
+    for index, element in enumerate(scene):
+        if element.kind != 'headphones':
+            phase = t + index * PHASE_STEP
+        angle = 2 * math.pi * phase
+        if element.kind in ('cat', 'headphones'):
+            element = element._replace(y=element.y + round(CAT_BOB * scale * math.sin(angle)))
+        elif element.kind == 'star':
+            element = element._replace(size=round(element.size * (1 + STAR_TWINKLE * math.sin(2 * angle))))
+        elif element.kind == 'note':
+            element = element._replace(x=element.x + round(NOTE_DRIFT[0] * scale * math.sin(angle)),
+                                       y=element.y + round(NOTE_DRIFT[1] * scale * math.sin(2 * angle)))
+        moved.append(element)
+    return moved
+
+def element_box(element, scale=1, supersample=1):
+    """Canvas box (left, top, right, bottom) an element's sprite covers"""
+    sprite, dx, dy = render_sprite(element.kind, element.size, element.color, scale, supersample)
+    left, top = element.x + dx, element.y + dy
+    return (left, top, left + sprite.width, top + sprite.height)
+
+def merge_boxes(boxes, width, height):
+    """Clip boxes to the canvas and merge overlapping ones, so no pixel is recomposited twice"""
+    merged = []
+    for left, top, right, bottom in boxes:
+        box = (max(left, 0), max(top, 0), min(right, width), min(bottom, height))
+        if box[0] >= box[2] or box[1] >= box[3]:
+            continue
+        overlapping = True
+        while overlapping:
+            overlapping = False
+            for other in merged:
+                if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                    merged.remove(other)
+                    box = (min(box[0], other[0]), min(box[1], other[1]),
+                           max(box[2], other[2]), max(box[3], other[3]))
+                    overlapping = True
+                    break
+        merged.append(box)
+    return merged
+
+def composite_region(base, box, elements, text, tile, scale=1, supersample=1):
+    """
+    Recomposite one rectangle of a frame over the cached static background
+
+    Pastes every element, text sprite and grain tile that overlaps box, in
+    the order poster_layers() paints them, so the pixels match a full-frame
+    render of the same scene.
+
+    Returns:
+        RGBA image of the box
+    """
+    left, top, right, bottom = box
+    region = base.crop(box)
+    pieces = []
+    for element in elements:
+        sprite, dx, dy = render_sprite(element.kind, element.size, element.color, scale, supersample)
+        pieces.append((sprite, element.x + dx, element.y + dy))
+    pieces.extend(text)
+    if tile is not None:
+        size = tile.width
+        pieces.extend((tile, x, y) for y in range(top - top % size, bottom, size)
+                      for x in range(left - left % size, right, size))
+    for sprite, x, y in pieces:
+        if x < right and y < bottom and x + sprite.width > left and y + sprite.height > top:
+            region.paste(sprite, (x - left, y - top), sprite)
+    return region
+
+def animation_path(output_path, fmt, index=None):
+    """Output path of an animation, or of one frame of a 'frames' sequence"""
+    root, _ = os.path.splitext(output_path)
+    if fmt == 'frames':
+        return f"{root}-{index:04d}.png" if index is not None else f"{root}-NNNN.png"
+    return root + ANIMATION_FORMATS[fmt]
+
+def render_animation(config=None, frames=ANIMATION_FRAMES, fps=ANIMATION_FPS, fmt='apng', stats=None):
+    """
+    Render a looping animation of the poster to config['output_path']
+
+    The gradient and the circles below the first moving element are
+    composited once. For each frame, only the boxes of elements that
+    moved, where they were and where they are, are recomposited over that
+    cached background. APNG and GIF frames after the first hold only the
+    bounding rectangle of those boxes, with untouched pixels transparent;
+    'frames' writes every frame as a full PNG.
+
+    Args:
+        config (dict): Overrides for DEFAULT_CONFIG, as for render_poster();
+            output_path is required and strip_rows is not supported
+        frames: Frames in the loop
+        fps: Frames per second
+        fmt: ANIMATION_FORMATS key
+        stats (CompositeStats): Collects per-stage timings and the output
+
+    Returns:
+        dict: {'path', 'frames', 'bytes', 'dirty'}, dirty being the fraction
+        of pixels recomposited per frame after the first
+    """
+    config = resolve_config(config)
+    if fmt not in ANIMATION_FORMATS:
+        raise ValueError(f"Unknown animation format: {fmt}")
+    if not config['output_path']:
+        raise ValueError("Rendering an animation needs an output_path")
+    if config['strip_rows']:
+        raise ValueError("Animations are not rendered in strips")
+    stats = stats if stats is not None else CompositeStats()
+    width, height, palette = config['width'], config['height'], config['palette']
+    scale, supersample = poster_scale(width, height), config['supersample']
+    start = time.perf_counter()
+
+    with stats.stage('layout'):
+        text = text_sprites(layout_text(config, scale))
+        scene = build_scene(width, height, palette, random.Random(config['seed']), config['density'],
+                            text_boxes(text))
+        first = next((i for i, e in enumerate(scene) if e.kind in ANIMATED_KINDS), len(scene))
+        tile = (texture_tile(config['texture'], config['seed'], config['texture_sigma'],
+                             TEXTURE_OPACITY, config['texture_cache_dir'])
+                if config['texture'] else None)
+    with stats.stage('background'):
+        base = create_gradient_background(width, height, [(0.0, palette['lavender']), (1.0, palette['soft_pink'])],
+                                          base=palette['cream']).copy()
+        stats.allocated(width * height * 4)
+        for element in scene[:first]:
+            paste_element(base, element, scale, supersample)
+
+    path = animation_path(config['output_path'], fmt)
+    total_bytes = dirty_pixels = 0
+    with nullcontext() if fmt == 'frames' else open(path, 'wb') as f:
+        if fmt == 'apng':
+            writer = APNGWriter(f, width, height, frames, fps, dpi=config['dpi'],
+                                level=ENCODER_PROFILES[config['profile']]['png'].get('compress_level', 9))
+        elif fmt == 'gif':
+            writer = GIFWriter(f, width, height, fps)
+        frame = previous = None
+        for index in range(frames):
+            with stats.stage('frames'):
+                elements = animate_scene(scene, index / frames, scale)[first:]
+                if frame is None:
+                    bbox = (0, 0, width, height)
+                    frame = composite_region(base, bbox, elements, text, tile, scale, supersample)
+                    stats.allocated(width * height * 4)
+                    dirty = []
+                else:
+                    dirty = merge_boxes(
+                        [box for before, after in zip(previous, elements) if before != after
+                         for box in (element_box(before, scale, supersample),
+                                     element_box(after, scale, supersample))],
+                        width, height)
+                    for box in dirty:
+                        frame.paste(composite_region(base, box, elements, text, tile, scale, supersample),
+                                    box[:2])
+                        dirty_pixels += (box[2] - box[0]) * (box[3] - box[1])
+                    bbox = (min(b[0] for b in dirty), min(b[1] for b in dirty),
+                            max(b[2] for b in dirty), max(b[3] for b in dirty)) if dirty else (0, 0, 1, 1)
+                previous = elements
+            with stats.stage('encode'):
+                if fmt == 'frames':
+                    frame_path = animation_path(config['output_path'], fmt, index)
+                    frame.convert('RGB').save(frame_path, 'PNG', dpi=(config['dpi'], config['dpi']),
+                                              **ENCODER_PROFILES[config['profile']]['png'])
+                    total_bytes += os.path.getsize(frame_path)
+                    continue
+                mask = None
+                if index:
+                    mask = Image.new('L', (bbox[2] - bbox[0], bbox[3] - bbox[1]), 0)
+                    for box in dirty:
+                        mask.paste(255, (box[0] - bbox[0], box[1] - bbox[1],
+                                         box[2] - bbox[0], box[3] - bbox[1]))
+                delta = frame.crop(bbox) if index else frame
+                stats.allocated(delta.width * delta.height * 4)
+                if fmt == 'apng':
+                    pixels = np.array(delta)
+                    pixels[..., 3] = 255  # paste() blends alpha too; the canvas is opaque
+                    if mask is not None:
+                        # Untouched pixels become transparent black, which compresses to nearly nothing
+                        pixels *= (np.asarray(mask) > 0)[..., np.newaxis]
+                    writer.write(pixels, bbox)
+                else:
+                    writer.write(delta.convert('RGB'), bbox, mask)
+        if fmt != 'frames':
+            with stats.stage('encode'):
+                writer.close()
+    if fmt != 'frames':
+        total_bytes = os.path.getsize(path)
+    stats.exports = [{'path': path, 'format': fmt, 'size': (width, height), 'bytes': total_bytes,
+                      'ms': round((time.perf_counter() - start) * 1000, 1)}]
+    return {
+        'path': path, 'frames': frames, 'bytes': total_bytes,
+        'dirty': dirty_pixels / (width * height * max(frames - 1, 1)),
+    }
+
+def _render_variant(config):
+    """Pool task: render one variant and report (output_path, error, seconds)"""
+    start = time.perf_counter()
+    try:
+        render_poster(config)
+        return config['output_path'], None, time.perf_counter() - start
+    except Exception as e:
+        return config.get('output_path'), f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+def variant_output_path(template, index, config):
+    """
+    Format an output template with {index}, {seed} or any other config key
+
+    {index} is always the variant's position, even if its config has an
+    'index' key. Raises KeyError, IndexError, ValueError or AttributeError
+    if the template does not fit the config.
+    """
+    return template.format_map({**config, 'index': index})
+
+def render_variants(configs, workers=None):
+    """
+    Render many variants in a process pool
+
+    Returns:
+        int: Number of variants that failed
+    """
+    start = time.perf_counter()
+    failures = 0
+    with multiprocessing.Pool(workers) as pool:
+        for output_path, error, seconds in pool.imap_unordered(_render_variant, configs):
+            if error:
+                failures += 1
+                print(f"✗ {output_path}: {error}")
+            else:
+                print(f"✓ Poster saved: {output_path} ({seconds:.2f}s)")
+    elapsed = time.perf_counter() - start
+    print(f"  {len(configs) - failures} rendered, {failures} failed in {elapsed:.2f}s "
+          f"({len(configs) / elapsed:.2f} posters/sec)")
+    return failures
+
+def parse_seeds(text):
+    """Parse '7', '1-50' or '1,4,9' into a list of seeds"""
+    seeds = []
+    for part in text.split(','):
+        if '-' in part.strip('-'):
+            first, last = part.split('-', 1)
+            seeds.extend(range(int(first), int(last) + 1))
+        else:
+            seeds.append(int(part))
+    return seeds
+
+def main():
+    """Main entry point for CLI usage"""
+    parser = argparse.ArgumentParser(description="Render Neko Sonic music festival posters")
+    parser.add_argument('--output', default='neko-sonic-poster.png',
+                        help="output PNG; with several posters a template such as "
+                             "'posters/neko-{seed}.png' (default: %(default)s, numbered per poster)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_CONFIG['seed'],
+                        help="seed for the decoration layout and grain (default: %(default)s)")
+    parser.add_argument('--seeds', help="render one poster per seed: '1-50' or '1,4,9'")
+    parser.add_argument('--density', type=float, default=DEFAULT_CONFIG['density'],
+                        help="decoration count multiplier; above 1 more, smaller circles, notes "
+                             "and stars are scattered (default: %(default)s)")
+    parser.add_argument('--variants', metavar='FILE',
+                        help="JSON list of config overrides, one poster each")
+    parser.add_argument('--width', type=int, default=DEFAULT_CONFIG['width'])
+    parser.add_argument('--height', type=int, default=DEFAULT_CONFIG['height'])
+    parser.add_argument('--dpi', type=int, default=DEFAULT_CONFIG['dpi'])
+    parser.add_argument('--supersample', type=int, default=DEFAULT_CONFIG['supersample'],
+                        help="antialiasing factor for decorations, 1 for none (default: %(default)s)")
+    parser.add_argument('--title', default=DEFAULT_CONFIG['title'])
+    parser.add_argument('--subtitle', default=DEFAULT_CONFIG['subtitle'])
+    parser.add_argument('--detail', default=DEFAULT_CONFIG['detail'])
+    parser.add_argument('--font', default=None,
+                        help="text font family, looked up in $FONT_DIRS and the system font "
+                             "directories (default: first of %s)" % ', '.join(FONT_FAMILIES))
+    parser.add_argument('--strip-rows', type=int, default=None,
+                        help="render and stream the PNG this many rows at a time, "
+                             "for print sizes that don't fit in memory")
+    parser.add_argument('--texture', choices=sorted(TEXTURES) + ['none'],
+                        default=DEFAULT_CONFIG['texture'], help="grain laid over the poster (default: %(default)s)")
+    parser.add_argument('--texture-cache', default=os.environ.get('POSTER_TEXTURE_CACHE'),
+                        help="directory to keep generated grain tiles in across runs "
+                             "(default: $POSTER_TEXTURE_CACHE)")
+    parser.add_argument('--export', default=','.join(DEFAULT_CONFIG['exports']),
+                        help="comma-separated targets written next to --output, a format "
+                             "optionally '@' a thumbnail width: 'png,webp,jpeg,webp@800,webp@400' "
+                             "(default: %(default)s)")
+    parser.add_argument('--profile', choices=sorted(ENCODER_PROFILES),
+                        default=DEFAULT_CONFIG['profile'],
+                        help="encoder effort: fast, balanced or smallest files (default: %(default)s)")
+    parser.add_argument('--animate', choices=sorted(ANIMATION_FORMATS),
+                        help="render a looping animation instead: an APNG, a GIF or numbered PNG frames")
+    parser.add_argument('--frames', type=int, default=ANIMATION_FRAMES,
+                        help="frames in the animation loop (default: %(default)s)")
+    parser.add_argument('--fps', type=int, default=ANIMATION_FPS,
+                        help="animation frame rate (default: %(default)s)")
+    parser.add_argument('--stats', action='store_true',
+                        help="print time and buffer allocations per compositing stage, "
+                             "and size and time per export")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processes for several posters (default: CPU count)")
+    args = parser.parse_args()
+
+    base = {
+        'width': args.width, 'height': args.height, 'dpi': args.dpi, 'seed': args.seed,
+        'density': args.density,
+        'supersample': args.supersample, 'strip_rows': args.strip_rows,
+        'texture': None if args.texture == 'none' else args.texture,
+        'texture_cache_dir': args.texture_cache,
+        'exports': [spec.strip() for spec in args.export.split(',') if spec.strip()],
+        'profile': args.profile,
+        'title': args.title, 'subtitle': args.subtitle, 'detail': args.detail,
+        'font': args.font,
+    }
+    if args.animate:
+        print(f"Animating Neko Sonic Music Festival Poster ({args.frames} frames)...")
+        stats = CompositeStats()
+        result = render_animation({**base, 'output_path': args.output}, args.frames, args.fps,
+                                  args.animate, stats)
+        print(f"✓ Animation saved: {result['path']} ({result['bytes'] / 1024:.0f} KB, "
+              f"{result['dirty']:.1%} of pixels recomposited per frame)")
+        if args.stats:
+            print(stats.report())
+        return
+    if args.variants:
+        with open(args.variants, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+    elif args.seeds:
+        overrides = [{'seed': seed} for seed in parse_seeds(args.seeds)]
+    else:
+        print("Creating Neko Sonic Music Festival Poster...")
+        stats = CompositeStats()
+        render_poster({**base, 'output_path': args.output}, stats)
+        for export in stats.exports or [{'path': args.output}]:
+            print(f"✓ Poster saved: {export['path']}")
+        if args.stats:
+            print(stats.report())
+        print(f"  Dimensions: {args.width}x{args.height}")
+        print(f"  Style: Neko Sonic - Anime kawaii with music festival energy")
+        return
+
+    template = args.output
+    if '{' not in template:
+        root, ext = os.path.splitext(template)
+        template = root + '-{index}' + ext
+    configs = []
+    failures = 0
+    for index, override in enumerate(overrides, 1):
+        config = {**base, **override}
+        if 'output_path' not in config:
+            try:
+                config['output_path'] = variant_output_path(template, index, config)
+            except (KeyError, IndexError, ValueError, AttributeError) as e:
+                failures += 1
+                print(f"✗ Variant {index}: output template {template!r} does not fit: {type(e).__name__}: {e}")
+                continue
+        configs.append(config)
+    if len({config['output_path'] for config in configs}) < len(configs):
+        print("✗ Several variants would write the same output path")
+        sys.exit(1)
+    failures += render_variants(configs, args.workers) if configs else 0
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Report Rendering Benchmarks
+Measures generate_pdf() across payload shapes and guards against regressions
+"""
+
+import io
+import re
+import sys
+import json
+import math
+import time
+import random
+import platform
+import argparse
+import itertools
+import statistics
+import multiprocessing
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+
+import reportlab
+
+from generate_report import (
+    COLOR_ACCENT, COLOR_SECONDARY, FONT_NORMAL, FONT_BOLD,
+    OUTPUT_PROFILES, PlainParagraph, create_styles, create_document, add_section_header, iter_search_results,
+    generate_pdf, escape_markup
+)
+
+# Payload dimensions; the suite runs every combination
+ANSWER_WORDS = {"short": 300, "long": 20000}
+SCRIPTS = ("latin", "cjk")
+RESULT_COUNTS = (10, 1000, 10000)
+MARKUP = ("none", "heavy")
+
+LATIN_WORDS = ("spring resolves circular dependencies between singleton beans through a three level "
+               "cache of early references object factories and fully initialized instances").split()
+CJK_WORDS = ("循环依赖", "通过", "三级缓存", "解决", "早期引用", "单例", "对象工厂", "初始化", "代理", "容器")
+
+# Words that exercise the line breaking corner cases: entities, no-break spaces and words wider than a line
+TRICKY_WORDS = ("R&D", "x<1", "a\xa0b", "https://example.com/a/very/long/path/that/keeps/going/and/going/on/"
+                "and/on/until/it/no/longer/fits/on/one/line?query=1&page=2", "".join(CJK_WORDS) * 3)
+
+# Line widths in points the line breaking check wraps at, besides the frame width
+LINE_WIDTHS = (300, 120)
+
+# Relative slowdown (or growth in memory and size) that counts as a regression
+DEFAULT_TOLERANCE = 0.15
+
+# Run settings a baseline must share to be compared at all; the rest of its
+# meta (Python, ReportLab, platform) only draws a warning when it differs
+BASELINE_META_KEYS = ("profile", "repeats", "fonts", "suite")
+
+
+def make_results(count):
+    """Synthetic search results with realistic title, URL and description lengths"""
+    return [
+        {
+            "title": f"Understanding topic {i}: a practical guide to the details",
+            "url": f"https://example.com/articles/{i}/understanding-the-topic",
+            "description": ("This article walks through the mechanism step by step, "
+                            "compares common approaches and lists pitfalls to avoid. ") * 2
+        }
+        for i in range(count)
+    ]
+
+
+def table_result_flowables(results, styles):
+    """The per-result Table badge and Paragraphs that ResultCard replaced, for comparison"""
+    for i, result in enumerate(results, 1):
+        result_table = Table([[f"#{i}"]], colWidths=[0.5*inch])
+        result_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), COLOR_ACCENT),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+            ('FONTNAME', (0, 0), (-1, -1), FONT_BOLD),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 5),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+        ]))
+        yield result_table
+        yield Spacer(1, 0.05*inch)
+        yield Paragraph(f"<b>{result['title']}</b>", styles['ReportBody'])
+        link_text = f'<a href="{result["url"]}" color="{COLOR_SECONDARY}">{result["url"]}</a>'
+        yield Paragraph(link_text, styles['ReportLink'])
+        yield Paragraph(result['description'], styles['ReportSourceDesc'])
+        yield Spacer(1, 0.15*inch)
+
+
+def time_layout(flowables):
+    """Seconds to lay out and draw a results section into an in-memory PDF"""
+    story = []
+    add_section_header(story, 'Top Search Results')
+    start = time.perf_counter()
+    story.extend(flowables)
+    create_document(io.BytesIO()).build(story)
+    return time.perf_counter() - start
+
+
+def bench_result_cards(sizes):
+    """Compare ResultCard layout time against the Table-based cards"""
+    styles = create_styles()
+    print(f"{'results':>8} {'tables (s)':>12} {'cards (s)':>12} {'speed-up':>10}")
+    for count in sizes:
+        results = make_results(count)
+        table_time = time_layout(table_result_flowables(results, styles))
+        card_time = time_layout(iter_search_results(results, styles))
+        print(f"{count:>8} {table_time:>12.3f} {card_time:>12.3f} {table_time / card_time:>9.1f}x")
+
+
+def paragraph_lines(para):
+    """Text of each line Paragraph broke para into"""
+    if para.blPara.kind == 0:
+        return [' '.join(words) for _, words in para.blPara.lines]
+    return [''.join(frag.text for frag in line.words).strip() for line in para.blPara.lines]
+
+
+def line_break_mismatches(count=500, seed=0):
+    """
+    Check that PlainParagraph breaks plain prose where Paragraph does
+
+    Wraps count pseudo-random paragraphs, a few words to a couple of hundred
+    long and sprinkled with TRICKY_WORDS, at the frame width and LINE_WIDTHS.
+
+    Returns:
+        list: (width, text, plain lines, Paragraph lines) for every paragraph that differs
+    """
+    rng = random.Random(seed)
+    style = create_styles()['ReportBody']
+    vocabulary = LATIN_WORDS * 10 + list(TRICKY_WORDS)
+    mismatches = []
+    for width in (create_document(io.BytesIO()).width,) + LINE_WIDTHS:
+        for _ in range(count):
+            text = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 200)))
+            plain = PlainParagraph(text, style)
+            plain.wrap(width, 1e9)
+            para = Paragraph(escape_markup(text), style)
+            para.wrap(width, 1e9)
+            plain_lines = [line for line, _ in plain._lines]
+            if plain_lines != paragraph_lines(para):
+                mismatches.append((width, text, plain_lines, paragraph_lines(para)))
+    return mismatches
+
+
+def card_break_mismatches(count=500, seed=0):
+    """
+    Check that ResultCard breaks titles, URLs and descriptions where the Table cards' Paragraphs do
+
+    Uses make_results() plus count pseudo-random results built from
+    TRICKY_WORDS, leaving out the '&' and '<' that table_result_flowables()
+    would read as markup.
+
+    Returns:
+        list: (width, text, card lines, Paragraph lines) for every field that differs
+    """
+    rng = random.Random(seed)
+    styles = create_styles()
+    vocabulary = LATIN_WORDS * 10 + [word for word in TRICKY_WORDS if escape_markup(word) == word]
+    results = make_results(20) + [
+        {
+            "title": ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 30))),
+            "url": "https://example.com/" + '/'.join(rng.choice(LATIN_WORDS) for _ in range(rng.randint(1, 40))),
+            "description": ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 120)))
+        }
+        for _ in range(count)
+    ]
+    mismatches = []
+    for width in (create_document(io.BytesIO()).width,) + LINE_WIDTHS:
+        for result in results:
+            card = next(iter_search_results([result], styles))
+            card.wrap(width, 1e9)
+            paragraphs = [flowable for flowable in table_result_flowables([result], styles)
+                          if isinstance(flowable, Paragraph)]
+            for field, lines, para in zip(("title", "url", "description"),
+                                          (card._title_lines, card._url_lines, card._desc_lines), paragraphs):
+                para.wrap(width, 1e9)
+                lines = [line for line, _ in lines]
+                if lines != paragraph_lines(para):
+                    mismatches.append((width, result[field], lines, paragraph_lines(para)))
+    return mismatches
+
+
+def report_mismatches(mismatches, what):
+    """Print the first differing line of each mismatch; returns the exit status"""
+    if not mismatches:
+        print(f"✅ {what} break where Paragraph does")
+        return 0
+    print(f"❌ {len(mismatches)} of the {what} break differently from Paragraph:")
+    for width, text, lines, expected in mismatches[:10]:
+        line, want = next((a, b) for a, b in itertools.zip_longest(lines, expected) if a != b)
+        print(f"  at {width:g}pt in {text[:40]!r}...: {line!r} != {want!r}")
+    return 1
+
+
+def _words(rng, script, count, markup):
+    """Pseudo-random prose; heavy markup wraps every few words in bold, italic, colour or a link"""
+    vocabulary = LATIN_WORDS if script == "latin" else CJK_WORDS
+    joiner = " " if script == "latin" else ""
+    words = [rng.choice(vocabulary) for _ in range(count)]
+    if markup == "heavy":
+        for i in range(0, count, 5):
+            tag = rng.choice(("b", "i", "font", "a"))
+            if tag == "font":
+                words[i] = f'<font color="{COLOR_ACCENT}">{words[i]}</font>'
+            elif tag == "a":
+                words[i] = f'<a href="https://example.com/{i}">{words[i]}</a>'
+            else:
+                words[i] = f"<{tag}>{words[i]}</{tag}>"
+    # Break into paragraphs of about 120 words
+    return "\n\n".join(joiner.join(words[i:i + 120]) for i in range(0, count, 120))
+
+
+def make_payload(answer, script, results, markup, seed=0):
+    """Synthetic generate_pdf() arguments for one payload shape"""
+    rng = random.Random(seed)
+    return {
+        "question": _words(rng, script, 12, "none"),
+        "claude_answer": _words(rng, script, ANSWER_WORDS[answer], markup),
+        "search_results": [
+            {
+                "title": _words(rng, script, 8, "none"),
+                "url": f"https://example.com/articles/{i}",
+                "description": _words(rng, script, 40, "none")
+            }
+            for i in range(results)
+        ],
+        "conclusion": _words(rng, script, 250, markup),
+        "long_report": results > 10
+    }
+
+
+def suite_cases(filters=()):
+    """(name, shape) for every payload combination whose name contains all filters"""
+    for answer, script, results, markup in itertools.product(ANSWER_WORDS, SCRIPTS, RESULT_COUNTS, MARKUP):
+        name = f"{answer}-{script}-{results}-{markup}"
+        if all(f in name for f in filters):
+            yield name, (answer, script, results, markup)
+
+
+def _percentile(samples, fraction):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def _peak_rss_bytes():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _run_case(shape, repeats, profile='default'):
+    """Runs in a fresh process so peak RSS belongs to this case alone"""
+    payload = make_payload(*shape)
+    styles = create_styles()
+    times = []
+    for _ in range(repeats):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        generate_pdf(payload["question"], payload["claude_answer"], payload["search_results"],
+                     payload["conclusion"], buffer, styles=styles,
+                     long_report=payload["long_report"], timestamp=False, profile=profile)
+        times.append(time.perf_counter() - start)
+    pdf = buffer.getvalue()
+    pages = len(re.findall(rb'/Type /Page\b', pdf))
+    median = statistics.median(times)
+    return {
+        "median_s": round(median, 4),
+        "p95_s": round(_percentile(times, 0.95), 4),
+        "pages": pages,
+        "pages_per_s": round(pages / median, 1),
+        "peak_rss_bytes": _peak_rss_bytes(),
+        "pdf_bytes": len(pdf)
+    }
+
+
+def run_suite(filters=(), repeats=5, profile='default'):
+    """Benchmark every selected payload shape, each in its own process, with one of OUTPUT_PROFILES"""
+    context = multiprocessing.get_context('spawn')
+    cases = {}
+    print(f"{'case':<28} {'median (s)':>10} {'p95 (s)':>9} {'pages/s':>9} {'peak RSS (MB)':>14} {'PDF (KB)':>9}")
+    for name, shape in suite_cases(filters):
+        with context.Pool(1) as pool:
+            result = pool.apply(_run_case, (shape, repeats, profile))
+        cases[name] = result
+        print(f"{name:<28} {result['median_s']:>10.3f} {result['p95_s']:>9.3f} {result['pages_per_s']:>9.1f} "
+              f"{result['peak_rss_bytes'] / 1e6:>14.1f} {result['pdf_bytes'] / 1024:>9.1f}")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "reportlab": reportlab.Version,
+            "platform": platform.platform(),
+            "fonts": [FONT_NORMAL, FONT_BOLD],
+            "repeats": repeats,
+            "profile": profile,
+            "suite": {
+                "answer_words": ANSWER_WORDS,
+                "scripts": list(SCRIPTS),
+                "result_counts": list(RESULT_COUNTS),
+                "markup": list(MARKUP)
+            }
+        },
+        "cases": cases
+    }
+
+
+def baseline_mismatches(results, baseline):
+    """
+    Check that a saved run can be compared with this one
+
+    Returns:
+        tuple: (errors, warnings) as human-readable lists. Errors are
+        differences in BASELINE_META_KEYS and having no case in common;
+        warnings are other differences in meta.
+    """
+    errors, warnings = [], []
+    current, previous = results["meta"], baseline.get("meta", {})
+    for key in sorted(current.keys() | previous.keys()):
+        if current.get(key) != previous.get(key):
+            message = f"{key}: {previous.get(key)!r} in the baseline, {current.get(key)!r} now"
+            (errors if key in BASELINE_META_KEYS else warnings).append(message)
+    if not results["cases"].keys() & baseline.get("cases", {}).keys():
+        errors.append("no case in common with the baseline")
+    return errors, warnings
+
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    List regressions against a saved run
+
+    Median time, peak RSS and PDF size may each grow by at most tolerance;
+    cases missing from either run are skipped, see baseline_mismatches()
+    for checking that the runs are comparable first.
+
+    Returns:
+        list: Human-readable regression descriptions
+    """
+    regressions = []
+    for name, current in results["cases"].items():
+        previous = baseline["cases"].get(name)
+        if previous is None:
+            continue
+        for metric in ("median_s", "peak_rss_bytes", "pdf_bytes"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + tolerance):
+                change = current[metric] / previous[metric] - 1
+                regressions.append(f"{name}: {metric} {previous[metric]} -> {current[metric]} (+{change:.0%})")
+    return regressions
+
+
+def main():
+    """Main entry point for CLI usage"""
+    parser = argparse.ArgumentParser(description="Benchmark report rendering")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    cards = commands.add_parser('cards', help="compare ResultCard with the Table-based result cards")
+    cards.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000],
+                       help="search result counts to benchmark (default: 10 1000 10000)")
+
+    linebreaks = commands.add_parser('linebreaks',
+                                     help="check PlainParagraph and ResultCard line breaks against Paragraph")
+    linebreaks.add_argument('--count', type=int, default=500,
+                            help="paragraphs to wrap at each line width (default: 500)")
+    linebreaks.add_argument('--seed', type=int, default=0, help="prose seed (default: 0)")
+
+    suite = commands.add_parser('suite', help="time generate_pdf() across payload shapes")
+    suite.add_argument('--filter', nargs='+', default=[],
+                       help="only run cases whose name contains every given string, e.g. cjk 1000")
+    suite.add_argument('--repeats', type=int, default=5, help="renders per case (default: 5)")
+    suite.add_argument('--profile', choices=sorted(OUTPUT_PROFILES), default='default',
+                       help="output profile to render with (default: default)")
+    suite.add_argument('--save', metavar='FILE', help="write results as JSON")
+    suite.add_argument('--baseline', metavar='FILE', help="fail if any case regressed against this JSON")
+    suite.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                       help=f"allowed relative growth before a regression (default: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args()
+
+    if args.command == 'cards':
+        bench_result_cards(args.sizes)
+        return 0
+    if args.command == 'linebreaks':
+        return (report_mismatches(line_break_mismatches(args.count, args.seed), "plain paragraphs")
+                | report_mismatches(card_break_mismatches(args.count, args.seed), "result card fields"))
+
+    results = run_suite(args.filter, args.repeats, args.profile)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        errors, warnings = baseline_mismatches(results, baseline)
+        for warning in warnings:
+            print(f"⚠️  Baseline differs in {warning}")
+        if errors:
+            print(f"\n❌ {args.baseline} cannot be compared with this run:")
+            for error in errors:
+                print(f"  {error}")
+            return 1
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\n✅ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
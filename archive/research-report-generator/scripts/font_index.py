@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Font Index
+Finds installed fonts by family and style for the report and poster scripts
+
+Font directories are scanned once and each font file's name and OS/2
+tables are read directly from its header, so building the index never
+loads a face. The index is kept on disk and only files whose size or
+mtime changed are read again; faces are loaded on request and memoized
+per size.
+"""
+
+import os
+import sys
+import json
+import struct
+import tempfile
+import argparse
+from functools import lru_cache
+from collections import namedtuple
+
+# Bump whenever the on-disk index format or the header parsing changes
+INDEX_VERSION = 1
+
+FONT_EXTENSIONS = ('.ttf', '.ttc', '.otf', '.otc')
+
+# Default font directories per platform; FONT_DIRS (os.pathsep separated) is searched first
+SYSTEM_FONT_DIRS = {
+    'linux': ['/usr/share/fonts', '/usr/local/share/fonts', '~/.local/share/fonts', '~/.fonts'],
+    'darwin': ['/System/Library/Fonts', '/Library/Fonts', '~/Library/Fonts'],
+    'win32': [os.path.join(os.environ.get('WINDIR', r'C:\Windows'), 'Fonts'),
+              '~/AppData/Local/Microsoft/Windows/Fonts'],
+}
+
+# Chinese families in order of preference; any other face covering Chinese comes after them
+CJK_FAMILIES = (
+    'Heiti SC', 'STHeiti', 'Songti SC', 'Hiragino Sans GB', 'Microsoft YaHei', 'SimHei', 'SimSun',
+    'WenQuanYi Zen Hei', 'WenQuanYi Micro Hei', 'Droid Sans Fallback', 'AR PL UMing CN',
+    'AR PL UKai CN', 'Noto Sans SC', 'Source Han Sans SC', 'Noto Sans CJK SC',
+)
+
+# Names families use for their upright face, tried in order when 'Regular' is missing
+UPRIGHT_STYLES = ('Regular', 'Book', 'Roman', 'Normal', 'Medium')
+
+# Styles treated as bold when picking the bold face of a family, strongest last
+BOLD_STYLES = ('Medium', 'Semibold', 'SemiBold', 'Demibold', 'Bold', 'W6', 'W7')
+
+# OS/2 coverage bits: code pages 18 (GB2312) and 20 (Big5), Unicode range 59 (CJK ideographs)
+CJK_CODEPAGE_BITS = (18, 20)
+CJK_UNICODE_BIT = 59
+
+FontFace = namedtuple('FontFace', 'path index family style outlines embeddable cjk')
+FontFace.__doc__ = """One face of a font file; outlines is 'truetype' or 'cff'"""
+
+
+def default_cache_path():
+    """Index file under $FONT_INDEX_CACHE, $XDG_CACHE_HOME or ~/.cache"""
+    if os.environ.get('FONT_INDEX_CACHE'):
+        return os.environ['FONT_INDEX_CACHE']
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(cache_home, 'font-index.json')
+
+
+def default_font_dirs():
+    """Directories from $FONT_DIRS followed by the platform's font directories"""
+    dirs = [d for d in os.environ.get('FONT_DIRS', '').split(os.pathsep) if d]
+    platform = 'linux' if sys.platform.startswith('linux') else sys.platform
+    dirs.extend(SYSTEM_FONT_DIRS.get(platform, SYSTEM_FONT_DIRS['linux']))
+    return [os.path.expanduser(d) for d in dirs]
+
+
+def _decode_name(platform_id, raw):
+    """Decode a name table string: UTF-16BE on Windows/Unicode platforms, Mac Roman otherwise"""
+    if platform_id in (0, 3):
+        return raw.decode('utf-16-be', errors='replace')
+    return raw.decode('mac_roman', errors='replace')
+
+
+def _read_names(f, offset, length):
+    """Family and style of one face, preferring typographic names and US English"""
+    f.seek(offset)
+    data = f.read(length)
+    _, count, string_offset = struct.unpack_from('>HHH', data, 0)
+    names = {}
+    for i in range(count):
+        platform_id, _, language_id, name_id, size, start = struct.unpack_from('>6H', data, 6 + 12 * i)
+        if name_id not in (1, 2, 16, 17) or platform_id not in (0, 1, 3):
+            continue
+        # Lower rank wins: Windows US English, any Windows/Unicode, then Mac Roman
+        rank = 0 if (platform_id, language_id) == (3, 0x409) else 1 if platform_id != 1 else 2
+        if name_id in names and names[name_id][0] <= rank:
+            continue
+        raw = data[string_offset + start:string_offset + start + size]
+        names[name_id] = (rank, _decode_name(platform_id, raw))
+    family = names.get(16, names.get(1, (0, '')))[1]
+    style = names.get(17, names.get(2, (0, 'Regular')))[1]
+    return family.strip(), style.strip()
+
+
+def _read_os2(f, offset, length):
+    """(embeddable, cjk) from the OS/2 table's fsType and coverage bits"""
+    f.seek(offset)
+    data = f.read(min(length, 86))
+    if len(data) < 58:
+        return True, False
+    fs_type = struct.unpack_from('>H', data, 8)[0]
+    unicode_ranges = struct.unpack_from('>4I', data, 42)
+    cjk = bool(unicode_ranges[CJK_UNICODE_BIT // 32] & (1 << CJK_UNICODE_BIT % 32))
+    if len(data) >= 82:
+        codepages = struct.unpack_from('>I', data, 78)[0]
+        cjk = cjk or any(codepages & (1 << bit) for bit in CJK_CODEPAGE_BITS)
+    # Bit 1 alone is "restricted license embedding"
+    return fs_type & 0x000F != 0x0002, cjk
+
+
+def read_faces(path):
+    """
+    Read every face of a TrueType/OpenType file or collection from its headers
+
+    Only the table directory, the name table and the start of the OS/2 table
+    are read; glyph data is never touched.
+
+    Returns:
+        list: FontFace per face, empty if the file is not a font
+    """
+    faces = []
+    with open(path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12:
+            return faces
+        if header[:4] == b'ttcf':
+            count = struct.unpack_from('>I', header, 8)[0]
+            offsets = struct.unpack('>%dI' % count, f.read(4 * count))
+        else:
+            offsets = (0,)
+        for index, offset in enumerate(offsets):
+            f.seek(offset)
+            version, num_tables = struct.unpack('>4sH', f.read(6))
+            if version not in (b'\x00\x01\x00\x00', b'true', b'OTTO'):
+                continue
+            f.seek(offset + 12)
+            directory = f.read(16 * num_tables)
+            tables = {}
+            for i in range(num_tables):
+                tag, _, table_offset, table_length = struct.unpack_from('>4sIII', directory, 16 * i)
+                tables[tag] = (table_offset, table_length)
+            if b'name' not in tables:
+                continue
+            family, style = _read_names(f, *tables[b'name'])
+            embeddable, cjk = _read_os2(f, *tables[b'OS/2']) if b'OS/2' in tables else (True, False)
+            outlines = 'truetype' if b'glyf' in tables else 'cff'
+            faces.append(FontFace(path, index, family, style, outlines, embeddable, cjk))
+    return faces
+
+
+def _upright(styles):
+    """The upright face from a lowercase style -> FontFace mapping, or None"""
+    return next((styles[s.lower()] for s in UPRIGHT_STYLES if s.lower() in styles), None)
+
+
+class FontIndex:
+    """
+    Family/style to (file, face index) lookup over a set of font directories
+
+    The index is loaded from cache_path and refreshed on first use: files are
+    stat()ed, and only new or changed ones have their headers read.
+    """
+
+    def __init__(self, dirs=None, cache_path=None):
+        self.dirs = default_font_dirs() if dirs is None else [os.path.expanduser(d) for d in dirs]
+        self.cache_path = default_cache_path() if cache_path is None else cache_path
+        self.faces = None
+        self.scanned = 0
+
+    def _load_cache(self):
+        """Cached file entries keyed by path, or {} if the index is missing or stale"""
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != INDEX_VERSION:
+            return {}
+        return data.get('files', {})
+
+    def _save_cache(self, files):
+        """Write the index atomically; an unwritable cache only costs a rescan next time"""
+        if not self.cache_path:
+            return
+        try:
+            cache_dir = os.path.dirname(os.path.abspath(self.cache_path))
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': INDEX_VERSION, 'files': files}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Warning: could not write font index {self.cache_path}: {e}", file=sys.stderr)
+
+    def _font_files(self):
+        """Font files under the configured directories, first directory wins on duplicates"""
+        seen = set()
+        for font_dir in self.dirs:
+            for root, _, files in os.walk(font_dir):
+                for name in sorted(files):
+                    if name.lower().endswith(FONT_EXTENSIONS):
+                        path = os.path.join(root, name)
+                        if path not in seen:
+                            seen.add(path)
+                            yield path
+
+    def refresh(self):
+        """Rescan the directories, reading headers only for new or changed files"""
+        cached = self._load_cache()
+        files, faces, self.scanned = {}, [], 0
+        for path in self._font_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = cached.get(path)
+            if not entry or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+                try:
+                    face_list = read_faces(path)
+                except (OSError, struct.error) as e:
+                    print(f"Warning: skipping unreadable font {path}: {e}", file=sys.stderr)
+                    face_list = []
+                self.scanned += 1
+                entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                         'faces': [list(face[1:]) for face in face_list]}
+            files[path] = entry
+            faces.extend(FontFace(path, *face) for face in entry['faces'])
+        if self.scanned or set(files) != set(cached):
+            self._save_cache(files)
+        self.faces = faces
+        return self
+
+    def all_faces(self):
+        """Every indexed face, refreshing the index on first use"""
+        if self.faces is None:
+            self.refresh()
+        return self.faces
+
+    def family(self, family):
+        """Faces of a family, matched case-insensitively"""
+        family = family.lower()
+        return [face for face in self.all_faces() if face.family.lower() == family]
+
+    def find(self, family, style='Regular'):
+        """
+        Look up one face by family and style
+
+        A missing 'Regular' falls back to the family's upright face (see
+        UPRIGHT_STYLES), then to its first face.
+
+        Returns:
+            FontFace or None
+        """
+        styles = {face.style.lower(): face for face in reversed(self.family(family))}
+        if style.lower() != 'regular':
+            return styles.get(style.lower())
+        return _upright(styles) or next(iter(styles.values()), None)
+
+    def first(self, families, style='Regular'):
+        """First of several families that is installed, or None"""
+        for family in families:
+            face = self.find(family, style)
+            if face:
+                return face
+        return None
+
+    def cjk_faces(self, embeddable=True):
+        """
+        Resolve the regular and bold Chinese faces in one pass over the index
+
+        Only TrueType-outline faces qualify, since ReportLab cannot embed CFF;
+        with embeddable set, faces whose license forbids embedding are skipped.
+        Families in CJK_FAMILIES are preferred in order. A family without a
+        bolder style uses its regular face for both.
+
+        Returns:
+            tuple: (regular, bold) FontFace, or (None, None) if none is installed
+        """
+        candidates = [face for face in self.all_faces()
+                      if face.cjk and face.outlines == 'truetype' and (face.embeddable or not embeddable)]
+        if not candidates:
+            return None, None
+        preference = {family.lower(): rank for rank, family in enumerate(CJK_FAMILIES)}
+        candidates.sort(key=lambda face: (preference.get(face.family.lower(), len(CJK_FAMILIES)),
+                                          face.family, face.path, face.index))
+        family = candidates[0].family
+        styles = {face.style.lower(): face for face in reversed(candidates) if face.family == family}
+        regular = _upright(styles) or candidates[0]
+        bold = next((styles[s.lower()] for s in reversed(BOLD_STYLES)
+                     if s.lower() in styles and styles[s.lower()] is not regular), regular)
+        return regular, bold
+
+
+@lru_cache(maxsize=None)
+def default_index():
+    """Process-wide FontIndex over the default directories and cache file"""
+    return FontIndex()
+
+
+@lru_cache(maxsize=64)
+def load_face(path, size, index=0):
+    """Pillow font for one face at one size, loaded once per process"""
+    from PIL import ImageFont
+    return ImageFont.truetype(path, size, index=index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List or look up indexed fonts')
+    parser.add_argument('family', nargs='?', help='Family to look up (default: list every face)')
+    parser.add_argument('--style', default='Regular', help='Style to look up (default: Regular)')
+    parser.add_argument('--cjk', action='store_true', help='Show the Chinese faces the report would use')
+    parser.add_argument('--dirs', nargs='+', help='Font directories (default: $FONT_DIRS and system)')
+    parser.add_argument('--cache', help='Index file (default: $FONT_INDEX_CACHE or ~/.cache/font-index.json)')
+    args = parser.parse_args()
+
+    index = FontIndex(args.dirs, args.cache).refresh()
+    if args.cjk:
+        for label, face in zip(('regular', 'bold'), index.cjk_faces()):
+            print(f"{label}: {face.family} {face.style} {face.path}#{face.index}" if face else f"{label}: none")
+    elif args.family:
+        face = index.find(args.family, args.style)
+        if not face:
+            print(f"❌ No font for {args.family} {args.style}", file=sys.stderr)
+            sys.exit(1)
+        print(f"{face.path}#{face.index}")
+    else:
+        for face in index.all_faces():
+            print(f"{face.family}\t{face.style}\t{face.outlines}\t{face.path}#{face.index}")
+    print(f"{len(index.all_faces())} faces, {index.scanned} files read", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,47 +4,102 @@ Research Report Generator
 Generates a modern, tech-style PDF report with Claude's answer and Google search results
 """
 
+import io
+import os
+import re
 import sys
+import glob
 import json
+import time
+import zlib
+import hashlib
+import importlib.util
+import argparse
+import tempfile
+import threading
+import tracemalloc
+import multiprocessing
+from contextlib import contextmanager, nullcontext
+from bisect import bisect_right
+from functools import lru_cache, partial
+from collections import deque
 from datetime import datetime
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Flowable
+from reportlab.platypus.paragraph import split as split_words, strip as strip_space
+from reportlab.pdfbase import pdfmetrics, pdfdoc
+from reportlab.pdfbase.pdfdoc import PDFStream, PDFDictionary, PDFArray, PDFName, PDFString
+from reportlab.pdfgen import canvas
+from reportlab import rl_config
+from reportlab.lib.utils import asBytes
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
 from reportlab.lib.enums import TA_LEFT, TA_CENTER
+from font_index import default_index
+from report_model import (
+    COLOR_HEX, MAX_SEARCH_RESULTS, INLINE_MARKUP,
+    TITLE_ANSWER, TITLE_RESULTS, TITLE_CONCLUSION,
+    validate_job, result_fields, shown_results, text_paragraphs
+)
 
-# Modern tech color scheme - Light background with blue accents
-COLOR_PRIMARY = colors.HexColor('#1E40AF')  # Deep blue
-COLOR_SECONDARY = colors.HexColor('#3B82F6')  # Bright blue
-COLOR_ACCENT = colors.HexColor('#60A5FA')  # Light blue
-COLOR_BG_LIGHT = colors.HexColor('#F8FAFC')  # Very light gray/blue
-COLOR_TEXT_PRIMARY = colors.HexColor('#1E293B')  # Dark slate
-COLOR_TEXT_SECONDARY = colors.HexColor('#475569')  # Medium slate
-COLOR_BORDER = colors.HexColor('#E2E8F0')  # Light border
+# Modern tech color scheme (hex values in report_model.py, shared with the previews)
+COLOR_PRIMARY = colors.HexColor(COLOR_HEX['primary'])
+COLOR_SECONDARY = colors.HexColor(COLOR_HEX['secondary'])
+COLOR_ACCENT = colors.HexColor(COLOR_HEX['accent'])
+COLOR_BG_LIGHT = colors.HexColor(COLOR_HEX['bg_light'])
+COLOR_TEXT_PRIMARY = colors.HexColor(COLOR_HEX['text_primary'])
+COLOR_TEXT_SECONDARY = colors.HexColor(COLOR_HEX['text_secondary'])
+COLOR_BORDER = colors.HexColor(COLOR_HEX['border'])
+
+# Bump whenever layout code changes how a report looks, to invalidate cached PDFs
+TEMPLATE_VERSION = 4
+
+# Paragraph styles added by create_styles(); they are part of the cache key
+REPORT_STYLE_NAMES = (
+    'QuestionTitle', 'SectionHeader', 'ReportBody', 'ReportLink',
+    'ReportSourceDesc', 'ReportCardTitle', 'ReportMetadata'
+)
+
+# Result card "#i" badge, sized like the one-cell Table it replaces
+BADGE_WIDTH = 0.5*inch
+BADGE_HEIGHT = 22  # 12pt leading + 5pt top and bottom padding
+BADGE_FONT_SIZE = 12
 
 # Register Chinese fonts
-def register_chinese_fonts():
-    """Register Chinese fonts for PDF generation"""
-    try:
-        # Try to register STHeiti (Heiti SC) - macOS system font
-        pdfmetrics.registerFont(TTFont('STHeiti', '/System/Library/Fonts/STHeiti Medium.ttc', subfontIndex=0))
-        pdfmetrics.registerFont(TTFont('STHeiti-Bold', '/System/Library/Fonts/STHeiti Medium.ttc', subfontIndex=1))
-        return 'STHeiti', 'STHeiti-Bold'
-    except:
-        try:
-            # Fallback to Songti
-            pdfmetrics.registerFont(TTFont('Songti', '/System/Library/Fonts/Supplemental/Songti.ttc', subfontIndex=0))
-            return 'Songti', 'Songti'
-        except:
-            # If all fails, use Helvetica (won't display Chinese properly)
-            print("Warning: Could not load Chinese fonts. Chinese characters may not display correctly.")
-            return 'Helvetica', 'Helvetica-Bold'
-
-# Register fonts at module level
+def register_chinese_fonts(index=None):
+    """
+    Register the Chinese faces resolved by the font index for PDF generation
+
+    Font directories come from $FONT_DIRS plus the platform defaults (see
+    font_index.py). Falls back to Helvetica, which cannot display Chinese.
+
+    Returns:
+        tuple: (normal, bold) registered font names
+    """
+    regular, bold = (index or default_index()).cjk_faces()
+    if regular is None:
+        print("Warning: No Chinese font found; set FONT_DIRS to a directory with one. "
+              "Chinese characters may not display correctly.", file=sys.stderr)
+        return 'Helvetica', 'Helvetica-Bold'
+    names = []
+    for face in (regular, bold):
+        name = face.family.replace(' ', '') + ('' if face is regular else '-' + face.style.replace(' ', ''))
+        if name not in pdfmetrics.getRegisteredFontNames():
+            try:
+                pdfmetrics.registerFont(TTFont(name, face.path, subfontIndex=face.index))
+            except (TTFError, OSError) as e:
+                print(f"Warning: Could not load Chinese font {face.path}: {e}. "
+                      "Chinese characters may not display correctly.", file=sys.stderr)
+                return 'Helvetica', 'Helvetica-Bold'
+        names.append(name)
+    return tuple(names)
+
+# Register fonts at module level, timing it for RenderMetrics
+_font_wall, _font_cpu = time.perf_counter(), time.process_time()
 FONT_NORMAL, FONT_BOLD = register_chinese_fonts()
+FONT_REGISTRATION_TIME = (time.perf_counter() - _font_wall, time.process_time() - _font_cpu)
 
 def create_styles():
     """Create custom paragraph styles for the report"""
@@ -114,6 +169,13 @@ def create_styles():
         leftIndent=20
     ))
 
+    # Search result title style, drawn in bold
+    styles.add(ParagraphStyle(
+        name='ReportCardTitle',
+        parent=styles['ReportBody'],
+        fontName=FONT_BOLD
+    ))
+
     # Metadata style
     styles.add(ParagraphStyle(
         name='ReportMetadata',
@@ -128,15 +190,16 @@ def create_styles():
     return styles
 
 
-def add_header(story, question, styles):
-    """Add report header with question and metadata"""
+def add_header(story, question, styles, timestamp=True):
+    """Add report header with question and metadata, optionally without the generation date"""
     # Date
-    date_text = f"Generated on {datetime.now().strftime('%B %d, %Y at %H:%M')}"
-    story.append(Paragraph(date_text, styles['ReportMetadata']))
+    if timestamp:
+        date_text = f"Generated on {datetime.now().strftime('%B %d, %Y at %H:%M')}"
+        story.append(text_flowable(date_text, styles['ReportMetadata']))
 
     # Question title with accent bar
     story.append(Spacer(1, 0.1*inch))
-    story.append(Paragraph(question, styles['QuestionTitle']))
+    story.append(text_flowable(question, styles['QuestionTitle']))
 
     # Divider line
     line_table = Table([['']], colWidths=[7*inch])
@@ -148,10 +211,9 @@ def add_header(story, question, styles):
     story.append(Spacer(1, 0.2*inch))
 
 
-def add_claude_answer(story, answer, styles):
-    """Add Claude's answer section"""
-    # Section header with background
-    header_table = Table([['Claude AI Analysis']], colWidths=[7*inch])
+def add_section_header(story, title):
+    """Add a section header bar with background"""
+    header_table = Table([[title]], colWidths=[7*inch])
     header_table.setStyle(TableStyle([
         ('BACKGROUND', (0, 0), (-1, -1), COLOR_BG_LIGHT),
         ('TEXTCOLOR', (0, 0), (-1, -1), COLOR_PRIMARY),
@@ -166,158 +228,1883 @@ def add_claude_answer(story, answer, styles):
     story.append(header_table)
     story.append(Spacer(1, 0.15*inch))
 
+
+def add_claude_answer(story, answer, styles):
+    """Add Claude's answer section"""
+    # Section header with background
+    add_section_header(story, TITLE_ANSWER)
+
     # Answer content
-    paragraphs = answer.split('\n\n')
-    for para in paragraphs:
-        if para.strip():
-            story.append(Paragraph(para.strip(), styles['ReportBody']))
+    for para in text_paragraphs(answer):
+        story.append(text_flowable(para, styles['ReportBody']))
 
     story.append(Spacer(1, 0.3*inch))
 
 
-def add_search_results(story, results, styles):
-    """Add Google search results section"""
+def add_search_results(story, results, styles, max_results=MAX_SEARCH_RESULTS, tops=None):
+    """Add Google search results section, showing at most max_results (None for all)"""
     # Section header
-    header_table = Table([['Top Search Results']], colWidths=[7*inch])
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), COLOR_BG_LIGHT),
-        ('TEXTCOLOR', (0, 0), (-1, -1), COLOR_PRIMARY),
-        ('FONTNAME', (0, 0), (-1, -1), FONT_BOLD),
-        ('FONTSIZE', (0, 0), (-1, -1), 16),
-        ('LEFTPADDING', (0, 0), (-1, -1), 12),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('BOX', (0, 0), (-1, -1), 1, COLOR_BORDER),
-    ]))
-    story.append(header_table)
-    story.append(Spacer(1, 0.15*inch))
+    add_section_header(story, TITLE_RESULTS)
 
     # Search results
-    for i, result in enumerate(results[:10], 1):
-        # Result number and title
-        title = result.get('title', 'No title')
-        url = result.get('url', '#')
-        description = result.get('description', 'No description available')
-
-        # Create result card
-        result_data = [[f"#{i}"]]
-        result_table = Table(result_data, colWidths=[0.5*inch])
-        result_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), COLOR_ACCENT),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-            ('FONTNAME', (0, 0), (-1, -1), FONT_BOLD),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 5),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ]))
-        story.append(result_table)
-        story.append(Spacer(1, 0.05*inch))
-
-        # Title
-        story.append(Paragraph(f"<b>{title}</b>", styles['ReportBody']))
-
-        # URL as clickable link
-        link_text = f'<a href="{url}" color="{COLOR_SECONDARY}">{url}</a>'
-        story.append(Paragraph(link_text, styles['ReportLink']))
-
-        # Description
-        story.append(Paragraph(description, styles['ReportSourceDesc']))
-
-        story.append(Spacer(1, 0.15*inch))
+    if max_results is not None:
+        results = results[:max_results]
+    story.extend(iter_search_results(results, styles, tops=tops))
+
+
+@lru_cache(maxsize=65536)
+def _text_width(text, font_name, font_size):
+    """Memoized stringWidth; words repeat a lot across a long report"""
+    return pdfmetrics.stringWidth(text, font_name, font_size)
+
+
+def _split_long_word(word, start, width, font_name, font_size):
+    """
+    Pieces of a word wider than the line, as Paragraph cuts them
+
+    The first piece fills the rest of the current line from start (it is
+    empty if not even one character fits there), each later one a whole line.
+    """
+    pieces, piece, line_width = [], '', start
+    for char in word:
+        char_width = _text_width(char, font_name, font_size)
+        if line_width + char_width > width and (piece or char_width <= width):
+            pieces.append(piece)
+            piece, line_width = '', 0
+        piece += char
+        line_width += char_width
+    pieces.append(piece)
+    return pieces
+
+
+def _paragraph_lines(text, font_name, font_size, width, space_shrinkage):
+    """wrap_text() lines as Paragraph breaks them"""
+    style = ParagraphStyle('wrap', fontName=font_name, fontSize=font_size, spaceShrinkage=space_shrinkage)
+    para = Paragraph(escape_markup(text), style).breakLines(width)
+    if para.kind == 0:
+        return [(' '.join(words), width - extra) for extra, words in para.lines]
+    return [(''.join(frag.text for frag in line.words).strip(), width - line.extraSpace) for line in para.lines]
+
+
+def wrap_text(text, font_name, font_size, width, space_shrinkage=0):
+    """
+    Line breaking for plain text, matching Paragraph.breakLines()
+
+    Breaks on whitespace other than no-break spaces. Like Paragraph, a word
+    still fits if each space on the line can shrink by space_shrinkage of a
+    space's width (style.spaceShrinkage), so lines may be slightly wider than
+    width; draw_text_lines() squeezes them back. A word wider than the line (a
+    long URL, or CJK text with no spaces) is broken between characters, its
+    first piece finishing the current line.
+
+    Returns:
+        list: (line, line_width) tuples
+    """
+    lines = []
+    space_width = _text_width(' ', font_name, font_size)
+    shrink = space_shrinkage * space_width
+    line, line_width = [], -space_width
+    for word in split_words(strip_space(text)):
+        word_width = _text_width(word, font_name, font_size)
+        new_width = line_width + space_width + word_width
+        if new_width > width + shrink*len(line) and word_width > width:
+            if escape_markup(text) != text:
+                # Paragraph reads '&', '<' and '>' as entities, making several
+                # fragments, and splits long words across them its own way
+                return _paragraph_lines(text, font_name, font_size, width, space_shrinkage)
+            first, *rest = _split_long_word(word, line_width + space_width, width, font_name, font_size)
+            if first or line:
+                lines.append((' '.join(line + [first] if first else line),
+                              line_width + space_width + _text_width(first, font_name, font_size)))
+            line, line_width = [], -space_width
+            if rest:
+                lines.extend((piece, _text_width(piece, font_name, font_size)) for piece in rest[:-1])
+                line, line_width = [rest[-1]], _text_width(rest[-1], font_name, font_size)
+        elif new_width <= width + shrink*len(line) or not line:
+            line.append(word)
+            line_width = new_width
+        else:
+            lines.append((' '.join(line), line_width))
+            line, line_width = [word], word_width
+    if line:
+        lines.append((' '.join(line), line_width))
+    return lines
+
+
+def draw_text_lines(canv, lines, style, x, y, width=None):
+    """
+    Draw wrapped lines in a paragraph style, first baseline one font size below y
+
+    Lines wider than width (see wrap_text()) have their spaces narrowed to
+    fit, as Paragraph does.
+
+    Returns:
+        float: y just below the last line
+    """
+    text = canv.beginText()
+    text.setFont(style.fontName, style.fontSize, style.leading)
+    text.setFillColor(style.textColor)
+    text.setTextOrigin(x, y - style.fontSize)
+    for line, line_width in lines:
+        spaces = line.count(' ') + line.count('\xa0')
+        if width is not None and line_width - width > 1e-8 and spaces:
+            text.setWordSpace((width - line_width) / spaces)
+            text.textLine(line)
+            text.setWordSpace(0)
+        else:
+            text.textLine(line)
+    canv.drawText(text)
+    return y - len(lines)*style.leading
+
+
+def escape_markup(text):
+    """Escape '<', '>' and '&' that are not part of inline markup, so Paragraph can parse the text"""
+    parts = []
+    last = 0
+    for match in INLINE_MARKUP.finditer(text):
+        parts.append(text[last:match.start()].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;'))
+        parts.append(match.group())
+        last = match.end()
+    parts.append(text[last:].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;'))
+    return ''.join(parts)
+
+
+def text_flowable(text, style):
+    """
+    Flowable for a chunk of text in a paragraph style
+
+    Markup-free text takes the PlainParagraph fast path and is drawn as is;
+    text with inline markup goes through Paragraph with stray '<' and '&'
+    escaped, so neither can break the build.
+    """
+    if style.alignment == TA_LEFT and INLINE_MARKUP.search(text) is None:
+        return PlainParagraph(text, style)
+    return Paragraph(escape_markup(text), style)
+
+
+class PlainParagraph(Flowable):
+    """
+    Left-aligned paragraph of plain text
+
+    Lays out like Paragraph (same line breaks, space shrinkage, baselines
+    and spacing) but skips the inline markup parser, so text is drawn verbatim.
+    """
+
+    def __init__(self, text, style, lines=None):
+        super().__init__()
+        self.text = text
+        self.style = style
+        # Split parts carry their share of already wrapped lines
+        self._split_lines = lines
+        self._wrapped_width = None
+
+    def wrap(self, availWidth, availHeight):
+        if availWidth != self._wrapped_width:
+            style = self.style
+            self._wrapped_width = availWidth
+            if self._split_lines is None:
+                self._lines = wrap_text(self.text, style.fontName, style.fontSize,
+                                        availWidth - style.leftIndent - style.rightIndent, style.spaceShrinkage)
+            else:
+                self._lines = self._split_lines
+            self.width = availWidth
+            self.height = len(self._lines)*style.leading
+        return self.width, self.height
+
+    def getSpaceBefore(self):
+        return self.style.spaceBefore
+
+    def getSpaceAfter(self):
+        return self.style.spaceAfter
+
+    def split(self, availWidth, availHeight):
+        self.wrap(availWidth, availHeight)
+        fit = int(availHeight // self.style.leading)
+        if fit < 1 or fit >= len(self._lines) or (fit == 1 and not self.style.allowOrphans):
+            return []
+        # Like Paragraph: the first part keeps spaceBefore, the last spaceAfter
+        first = PlainParagraph(self.text, ParagraphStyle('split', parent=self.style, spaceAfter=0),
+                               lines=self._lines[:fit])
+        rest = PlainParagraph(self.text, ParagraphStyle('split', parent=self.style, spaceBefore=0),
+                              lines=self._lines[fit:])
+        return [first, rest]
+
+    def draw(self):
+        style = self.style
+        draw_text_lines(self.canv, self._lines, style, style.leftIndent, self.height,
+                        self.width - style.leftIndent - style.rightIndent)
+
+
+class ResultCard(Flowable):
+    """
+    One search result drawn straight onto the canvas
+
+    Looks like the "#i" badge Table followed by title, link and description
+    Paragraphs, with the same line breaks, but is wrapped and drawn in a single pass from the shared
+    stylesheet without Table layout or the inline markup parser. A card
+    moves to the next page whole; only a card taller than a page is split,
+    between description lines. Cards that begin at the top of a page add
+    (index, page) to tops, where append_results() can cut the report.
+    """
+
+    def __init__(self, index, title, url, description, styles, desc_lines=None, head=True, tops=None):
+        super().__init__()
+        self.index = index
+        self.title = title
+        self.url = url
+        self.description = description
+        self.styles = styles
+        self.tops = tops
+        # Split parts carry their share of already wrapped description lines;
+        # only the first part draws the badge, title and link
+        self._split_lines = desc_lines
+        self._head = head
+        self._wrapped_width = None
+
+    def _head_height(self):
+        title_style = self.styles['ReportCardTitle']
+        link_style = self.styles['ReportLink']
+        return (BADGE_HEIGHT + 0.05*inch
+                + len(self._title_lines)*title_style.leading + title_style.spaceAfter
+                + len(self._url_lines)*link_style.leading + link_style.spaceAfter)
+
+    def _desc_width(self):
+        desc_style = self.styles['ReportSourceDesc']
+        return self.width - desc_style.leftIndent - desc_style.rightIndent
+
+    def wrap(self, availWidth, availHeight):
+        if availWidth == self._wrapped_width:
+            return self.width, self.height
+        desc_style = self.styles['ReportSourceDesc']
+        self._wrapped_width = self.width = availWidth
+        self.height = 0
+        if self._head:
+            title_style = self.styles['ReportCardTitle']
+            link_style = self.styles['ReportLink']
+            self._title_lines = wrap_text(self.title, title_style.fontName, title_style.fontSize, availWidth,
+                                          title_style.spaceShrinkage)
+            self._url_lines = wrap_text(self.url, link_style.fontName, link_style.fontSize, availWidth,
+                                        link_style.spaceShrinkage)
+            self.height = self._head_height()
+        if self._split_lines is None:
+            self._desc_lines = wrap_text(self.description, desc_style.fontName, desc_style.fontSize,
+                                         self._desc_width(), desc_style.spaceShrinkage)
+        else:
+            self._desc_lines = self._split_lines
+        self.height += len(self._desc_lines)*desc_style.leading
+        return self.width, self.height
+
+    def getSpaceAfter(self):
+        # Description spaceAfter plus the 0.15" Spacer that used to follow each card
+        return self.styles['ReportSourceDesc'].spaceAfter + 0.15*inch
+
+    def split(self, availWidth, availHeight):
+        self.wrap(availWidth, availHeight)
+        frame = getattr(self, '_frame', None)
+        if frame is not None and self.height <= frame._aH:
+            return []
+
+        leading = self.styles['ReportSourceDesc'].leading
+        head_height = self._head_height() if self._head else 0
+        fit = int((availHeight - head_height) // leading)
+        if fit < 1 or fit >= len(self._desc_lines):
+            return []
+        first = ResultCard(self.index, self.title, self.url, self.description, self.styles,
+                           desc_lines=self._desc_lines[:fit], head=self._head, tops=self.tops)
+        rest = ResultCard(self.index, self.title, self.url, self.description, self.styles,
+                          desc_lines=self._desc_lines[fit:], head=False)
+        return [first, rest]
+
+    def draw(self):
+        canv = self.canv
+        desc_style = self.styles['ReportSourceDesc']
+        y = self.height
+
+        if self._head:
+            title_style = self.styles['ReportCardTitle']
+            link_style = self.styles['ReportLink']
+            if self.tops is not None and self._frame._atTop:
+                self.tops.append((self.index, canv.getPageNumber()))
+
+            # Badge, centred like a Table would be
+            badge_x = (self.width - BADGE_WIDTH) / 2
+            y -= BADGE_HEIGHT
+            canv.setFillColor(COLOR_ACCENT)
+            canv.rect(badge_x, y, BADGE_WIDTH, BADGE_HEIGHT, stroke=0, fill=1)
+            canv.setFillColor(colors.white)
+            canv.setFont(FONT_BOLD, BADGE_FONT_SIZE)
+            canv.drawCentredString(badge_x + BADGE_WIDTH/2, y + 5, f"#{self.index}")
+            y -= 0.05*inch
+
+            y = draw_text_lines(canv, self._title_lines, title_style, 0, y, self.width) - title_style.spaceAfter
+
+            # URL, clickable line by line
+            baseline = y - link_style.fontSize
+            for _, line_width in self._url_lines:
+                canv.linkURL(self.url, (0, baseline - 0.2*link_style.fontSize,
+                                        min(line_width, self.width),
+                                        baseline - 0.2*link_style.fontSize + link_style.leading),
+                             relative=1)
+                baseline -= link_style.leading
+            y = draw_text_lines(canv, self._url_lines, link_style, 0, y, self.width) - link_style.spaceAfter
+
+        draw_text_lines(canv, self._desc_lines, desc_style, desc_style.leftIndent, y, self._desc_width())
+
+
+def iter_search_results(results, styles, start=1, tops=None):
+    """Yield a ResultCard per search result, numbered from start; see ResultCard for tops"""
+    for i, result in enumerate(results, start):
+        yield ResultCard(i, *result_fields(result), styles, tops=tops)
 
 
 def add_conclusion(story, conclusion, styles):
     """Add conclusion section"""
     # Section header
-    header_table = Table([['Conclusion']], colWidths=[7*inch])
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), COLOR_BG_LIGHT),
-        ('TEXTCOLOR', (0, 0), (-1, -1), COLOR_PRIMARY),
-        ('FONTNAME', (0, 0), (-1, -1), FONT_BOLD),
-        ('FONTSIZE', (0, 0), (-1, -1), 16),
-        ('LEFTPADDING', (0, 0), (-1, -1), 12),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('BOX', (0, 0), (-1, -1), 1, COLOR_BORDER),
-    ]))
-    story.append(header_table)
-    story.append(Spacer(1, 0.15*inch))
+    add_section_header(story, TITLE_CONCLUSION)
 
     # Conclusion content
-    paragraphs = conclusion.split('\n\n')
-    for para in paragraphs:
-        if para.strip():
-            story.append(Paragraph(para.strip(), styles['ReportBody']))
+    for para in text_paragraphs(conclusion):
+        story.append(text_flowable(para, styles['ReportBody']))
 
 
-def generate_pdf(question, claude_answer, search_results, conclusion, output_path):
+class LazyStory:
     """
-    Generate the PDF report
+    Story list that pulls flowables from an iterator only as layout needs them
 
-    Args:
-        question (str): The research question
-        claude_answer (str): Claude's detailed answer
-        search_results (list): List of dicts with 'title', 'url', 'description'
-        conclusion (str): Final conclusion/summary
-        output_path (str): Path to save the PDF
+    doc.build() consumes its story from the front (len, [0], del [0], and
+    re-inserting split parts at [0]), so that is all this supports. Each
+    flowable is created just before it is laid out and dropped once drawn.
+    """
+
+    def __init__(self, flowables):
+        self._source = iter(flowables)
+        self._pending = deque()
+
+    def _fill(self):
+        if not self._pending:
+            flowable = next(self._source, None)
+            if flowable is not None:
+                self._pending.append(flowable)
+
+    def __len__(self):
+        self._fill()
+        return len(self._pending)
+
+    def __getitem__(self, index):
+        self._fill()
+        return self._pending[index]
+
+    def __delitem__(self, index):
+        self._fill()
+        del self._pending[index]
+
+    def __setitem__(self, index, flowables):
+        # Only the split-and-requeue form story[0:0] = parts is used
+        if not (isinstance(index, slice) and index.start == index.stop == 0):
+            raise IndexError("LazyStory only supports inserting at the front")
+        self._pending.extendleft(reversed(list(flowables)))
+
+    def insert(self, index, flowable):
+        if index != 0:
+            raise IndexError("LazyStory only supports inserting at the front")
+        self._pending.appendleft(flowable)
+
+
+class _SpooledPageStream(pdfdoc.PDFStream):
+    """Finished page content stream parked in a spool file until the PDF is written"""
+
+    def __init__(self, spool, data, compressed):
+        super().__init__()
+        self._spool = spool
+        self._offset = spool.seek(0, os.SEEK_END)
+        self._length = spool.write(data)
+        if compressed:
+            self.dictionary["Filter"] = pdfdoc.PDFArray([pdfdoc.PDFName("FlateDecode")])
+        self.__Comment__ = "page stream"
+
+    def format(self, document):
+        self._spool.seek(self._offset)
+        self.content = self._spool.read(self._length)
+        try:
+            return super().format(document)
+        finally:
+            self.content = None
+
+
+class SpoolingCanvas(canvas.Canvas):
+    """Canvas that moves each finished page's content out of memory into a temp file"""
+
+    # zlib level for the page streams it compresses itself; set per output profile
+    flate_level = zlib.Z_DEFAULT_COMPRESSION
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._spool = tempfile.TemporaryFile()
+
+    def showPage(self):
+        super().showPage()
+        page = self._doc.Pages.pages[-1]
+        data = asBytes(page.stream)
+        if page.compression:
+            data = zlib.compress(data, self.flate_level)
+        page.Contents = _SpooledPageStream(self._spool, data, page.compression)
+        page.stream = None
+
+    def save(self):
+        try:
+            super().save()
+        finally:
+            self._spool.close()
+
+    def getpdfdata(self):
+        try:
+            return super().getpdfdata()
+        finally:
+            self._spool.close()
+
+
+def iter_report_flowables(question, claude_answer, search_results, conclusion, styles,
+                          max_results=MAX_SEARCH_RESULTS, timestamp=True, tops=None):
+    """Yield the whole report story, creating search result flowables on demand"""
+    story = []
+    add_header(story, question, styles, timestamp)
+    add_claude_answer(story, claude_answer, styles)
+    add_section_header(story, TITLE_RESULTS)
+    yield from story
+
+    if max_results is not None:
+        search_results = search_results[:max_results]
+    yield from iter_search_results(search_results, styles, tops=tops)
+
+    story = []
+    add_conclusion(story, conclusion, styles)
+    yield from story
+
+
+class RenderMetrics:
+    """
+    Opt-in instrumentation for one report
+
+    Records wall time, CPU time and peak traced memory (above the level at
+    the start of the phase) for each phase of generate_pdf(), plus page
+    count and output size. Memory is traced with tracemalloc, which slows
+    rendering noticeably while enabled.
+    """
+
+    def __init__(self):
+        self.phases = []
+        self.pages = None
+        self.output_bytes = None
+        self.cached = False
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                "phase": name,
+                "wall_s": round(time.perf_counter() - wall, 6),
+                "cpu_s": round(time.process_time() - cpu, 6),
+                "peak_mem_bytes": tracemalloc.get_traced_memory()[1] - base
+            })
+
+    def finish(self):
+        """Stop memory tracing if this instance started it"""
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def to_dict(self):
+        font_wall, font_cpu = FONT_REGISTRATION_TIME
+        return {
+            "font_registration": {"wall_s": round(font_wall, 6), "cpu_s": round(font_cpu, 6),
+                                  "at_import": True},
+            "phases": self.phases,
+            "total_wall_s": round(sum(p["wall_s"] for p in self.phases), 6),
+            "pages": self.pages,
+            "output_bytes": self.output_bytes,
+            "cached": self.cached
+        }
+
+
+def _phase(metrics, name):
+    """Time a phase when instrumentation is on, otherwise do nothing"""
+    return metrics.phase(name) if metrics is not None else nullcontext()
+
+
+def emit_metrics(metrics, output, mode):
+    """
+    Write a report's metrics as a JSON sidecar or a structured log line
+
+    mode 'json' writes <output>.metrics.json next to a PDF path (falling back
+    to a log line for file objects); mode 'log' writes one JSON line to stderr.
+    """
+    record = metrics.to_dict()
+    if mode == 'json' and isinstance(output, str):
+        record["output_path"] = output
+        with open(f"{output}.metrics.json", 'w', encoding='utf-8') as f:
+            json.dump(record, f, indent=2)
+            f.write('\n')
+    else:
+        if isinstance(output, str):
+            record["output_path"] = output
+        print("report_metrics " + json.dumps(record), file=sys.stderr)
+
+
+# Output profiles, trading render CPU against PDF size:
+#   level           zlib level of the Flate-compressed page content, font subsets and ToUnicode maps
+#   ascii85         also ASCII85-encode page content (ReportLab's default; a quarter larger)
+#   ascii_readable  reserve printable ASCII in the first subset of each embedded font,
+#                   whether the report uses it or not
+OUTPUT_PROFILES = {
+    'default': {'level': zlib.Z_DEFAULT_COMPRESSION, 'ascii85': 1, 'ascii_readable': 1},
+    'fast': {'level': zlib.Z_BEST_SPEED, 'ascii85': 0, 'ascii_readable': 1},
+    'small': {'level': zlib.Z_BEST_COMPRESSION, 'ascii85': 0, 'ascii_readable': 0},
+}
+
+
+class _FlateFilter:
+    """ReportLab stream filter doing Flate at a chosen zlib level"""
+
+    pdfname = "FlateDecode"
+
+    def __init__(self, level):
+        self.level = level
+
+    def encode(self, text):
+        return zlib.compress(asBytes(text), self.level)
+
+    def decode(self, encoded):
+        return zlib.decompress(encoded)
+
+
+# ReportLab reads the Flate filter and the ASCII85 switch from module globals
+# while serializing, so serializations take turns
+_SERIALIZE_LOCK = threading.Lock()
+
+
+@contextmanager
+def stream_settings(profile='default'):
+    """Serialize under a profile's stream filters; wraps every getpdfdata() call"""
+    settings = OUTPUT_PROFILES[profile]
+    with _SERIALIZE_LOCK:
+        flate, ascii85 = pdfdoc.PDFZCompress, rl_config.useA85
+        pdfdoc.PDFZCompress = _FlateFilter(settings['level'])
+        rl_config.useA85 = settings['ascii85']
+        try:
+            yield
+        finally:
+            pdfdoc.PDFZCompress, rl_config.useA85 = flate, ascii85
+
+
+def profile_canvasmaker(canvasmaker, profile='default'):
+    """canvasmaker for doc.build() applying a profile's per-document settings"""
+    settings = OUTPUT_PROFILES[profile]
+
+    def make(*args, **kwargs):
+        canv = canvasmaker(*args, **kwargs)
+        canv.flate_level = settings['level']
+        if not settings['ascii_readable']:
+            # Subsets are assigned per document, so this does not leak into other renders.
+            # Codes are handed out from 33, past the space, as content streams escape
+            # lower ones in four bytes
+            for font_name in {FONT_NORMAL, FONT_BOLD}:
+                font = pdfmetrics.getFont(font_name)
+                if isinstance(font, TTFont):
+                    font._assignState(canv._doc, asciiReadable=0).nextCode = 33
+        return canv
+
+    return make
+
+
+def create_document(output_path, invariant=False):
+    """
+    Create the A4 document template used for every report
+
+    With invariant=True the PDF's creation date and ID are fixed, so the
+    same story always produces the same bytes. To render with one of
+    OUTPUT_PROFILES, build with profile_canvasmaker() and serialize under
+    stream_settings().
     """
-    # Create PDF document
-    doc = SimpleDocTemplate(
+    return SimpleDocTemplate(
         output_path,
         pagesize=A4,
         rightMargin=0.75*inch,
         leftMargin=0.75*inch,
         topMargin=0.75*inch,
-        bottomMargin=0.75*inch
+        bottomMargin=0.75*inch,
+        invariant=invariant
     )
 
-    # Build story
+
+def _font_fingerprint(font_name):
+    """Font name plus the size and mtime of its file, if it was loaded from one"""
+    filename = getattr(pdfmetrics.getFont(font_name).face, 'filename', None)
+    if filename and os.path.exists(filename):
+        stat = os.stat(filename)
+        return [font_name, filename, stat.st_size, stat.st_mtime_ns]
+    return [font_name, filename]
+
+
+def _layout_payload(styles):
+    """Everything besides the content that decides how a report looks, as JSON-ready values"""
+    style_values = {
+        name: {key: repr(value) for key, value in sorted(vars(styles[name]).items()) if key != 'parent'}
+        for name in REPORT_STYLE_NAMES
+    }
+    return {
+        "template_version": TEMPLATE_VERSION,
+        "colors": [c.hexval() for c in (COLOR_PRIMARY, COLOR_SECONDARY, COLOR_ACCENT, COLOR_BG_LIGHT,
+                                         COLOR_TEXT_PRIMARY, COLOR_TEXT_SECONDARY, COLOR_BORDER)],
+        "layout": [MAX_SEARCH_RESULTS, BADGE_WIDTH, BADGE_HEIGHT, BADGE_FONT_SIZE],
+        "styles": style_values,
+        "fonts": [_font_fingerprint(FONT_NORMAL), _font_fingerprint(FONT_BOLD)]
+    }
+
+
+def layout_fingerprint(styles):
+    """Hash of _layout_payload(): equal fingerprints lay out the same content identically"""
+    encoded = json.dumps(_layout_payload(styles), sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def report_cache_key(question, claude_answer, search_results, conclusion, styles, long_report=False,
+                     section_results=None, profile='default', appendable=False):
+    """
+    Content hash identifying a rendered report
+
+    Covers the normalized input, the colour and layout constants, the
+    paragraph styles, the resolved font files and TEMPLATE_VERSION, plus
+    the part size for reports laid out in parallel, which break pages
+    differently, the output profile unless it is the default, and whether
+    the report carries an append state.
+    """
+    search_results = shown_results(search_results, long_report)
+    payload = _layout_payload(styles)
+    payload["input"] = {
+        "question": question,
+        "claude_answer": claude_answer,
+        "search_results": [list(result_fields(r)) for r in search_results],
+        "conclusion": conclusion,
+        "long_report": bool(long_report)
+    }
+    if section_results is not None:
+        payload["section_results"] = section_results
+    if profile != 'default':
+        payload["profile"] = OUTPUT_PROFILES[profile]
+    if appendable:
+        payload["appendable"] = True
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ReportCache:
+    """
+    On-disk store of rendered PDFs keyed by report_cache_key()
+
+    Entries are <key>.pdf files. A hit refreshes the entry's mtime, and
+    storing evicts least recently used entries until the store fits in
+    max_bytes. Writes go through a temp file and rename, so concurrent
+    workers can share one store.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def load(self, key):
+        """A cached PDF's bytes, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as cached:
+                pdf_data = cached.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted by another worker after we read it
+        return pdf_data
+
+    def store(self, key, pdf_data):
+        """Add a rendered PDF to the store, then evict down to max_bytes"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf_data)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.pdf'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+# Untyped streams, named after the key that references them
+STREAM_ROLES = {'Contents': 'PageContent', 'ToUnicode': 'ToUnicode',
+                'FontFile': 'FontFile', 'FontFile2': 'FontFile', 'FontFile3': 'FontFile'}
+
+_XREF_ENTRY = re.compile(rb'(\d{10}) \d{5} n')
+_OBJECT_HEAD = re.compile(rb'(\d+)\s+\d+\s+obj\b')
+_STREAM_START = re.compile(rb'>>\s*stream\r?\n')
+_REFERENCE = re.compile(rb'(\d+)\s+\d+\s+R')
+_ROLE_REFERENCE = re.compile(rb'/(Contents|ToUnicode|FontFile[23]?)\s*(\[[\d\sR]*\]|\d+\s+\d+\s+R)')
+_DICT_TOKEN = re.compile(rb'<<|>>|\((?:\\.|[^\\)])*\)|/Type\s*/(\w+)')
+
+
+def _dict_type(text):
+    """/Type of an object's outermost dictionary, or None"""
+    depth = 0
+    for match in _DICT_TOKEN.finditer(text):
+        token = match.group()
+        if token == b'<<':
+            depth += 1
+        elif token == b'>>':
+            depth -= 1
+        elif match.group(1) and depth == 1:
+            return match.group(1).decode('latin-1')
+    return None
+
+
+def pdf_object_sizes(pdf_data):
+    """
+    Bytes per kind of object in a PDF with cross-reference tables
+
+    Follows /Prev into the sections of earlier incremental updates, whose
+    replaced objects still take up bytes.
+
+    Returns:
+        dict: kind -> [count, bytes], with 'xref' for the bytes outside
+            objects and the number of cross-reference sections
+    """
+    offsets = set()
+    sections = []
+    roles = {}
+    position = int(re.findall(rb'startxref\s+(\d+)', pdf_data[-1024:])[-1])
+    while position is not None:
+        if not pdf_data.startswith(b'xref', position):
+            raise ValueError("only PDFs with cross-reference tables can be measured")
+        sections.append(position)
+        trailer = pdf_data.index(b'trailer', position)
+        offsets.update(int(offset) for offset in _XREF_ENTRY.findall(pdf_data, position, trailer))
+        trailer = pdf_data[trailer:pdf_data.index(b'startxref', trailer)]
+        info = re.search(rb'/Info\s+(\d+)\s+\d+\s+R', trailer)
+        if info:
+            roles[int(info.group(1))] = 'Info'
+        previous = re.search(rb'/Prev\s+(\d+)', trailer)
+        position = int(previous.group(1)) if previous else None
+
+    # An object runs up to the next object or cross-reference section
+    stops = sorted(offsets.union(sections, [len(pdf_data)]))
+    objects = []
+    for offset in sorted(offsets):
+        end = stops[bisect_right(stops, offset)]
+        head = _OBJECT_HEAD.match(pdf_data, offset)
+        if head is None:
+            raise ValueError(f"no object at offset {offset}")
+        stream = _STREAM_START.search(pdf_data, offset, end)
+        text = pdf_data[offset:stream.start() + 2 if stream else end]
+        for key, refs in _ROLE_REFERENCE.findall(text):
+            for number in _REFERENCE.findall(refs):
+                roles.setdefault(int(number), STREAM_ROLES[key.decode('latin-1')])
+        objects.append((int(head.group(1)), end - offset, _dict_type(text) or ('Stream' if stream else 'Other')))
+
+    sizes = {}
+    for number, size, kind in objects:
+        entry = sizes.setdefault(roles.get(number, kind), [0, 0])
+        entry[0] += 1
+        entry[1] += size
+    sizes['xref'] = [len(sections), len(pdf_data) - sum(size for _, size, _ in objects)]
+    return sizes
+
+
+class PdfStats:
+    """
+    What a rendered PDF's bytes are spent on
+
+    objects maps each kind of object to [count, bytes]: the /Type of
+    dictionaries (Page, Font, FontDescriptor, Annot, ...), the role of
+    untyped streams (PageContent, FontFile, ToUnicode), Info, and 'xref'
+    for the header, cross-reference tables and trailers.
+    """
+
+    def __init__(self, pdf_data, profile='default', cached=False):
+        self.profile = profile
+        self.cached = cached
+        self.total_bytes = len(pdf_data)
+        self.objects = pdf_object_sizes(pdf_data)
+
+    @property
+    def pages(self):
+        """Page objects; an incrementally updated file also counts the ones it replaced"""
+        return self.objects.get('Page', [0, 0])[0]
+
+    def to_dict(self):
+        return {
+            "profile": self.profile,
+            "cached": self.cached,
+            "pages": self.pages,
+            "total_bytes": self.total_bytes,
+            "objects": {kind: {"count": count, "bytes": size}
+                        for kind, (count, size) in sorted(self.objects.items(), key=lambda item: -item[1][1])}
+        }
+
+
+def generate_pdf(question, claude_answer, search_results, conclusion, output_path, styles=None,
+                 long_report=False, timestamp=True, cache=None, metrics=None, workers=None,
+                 profile='default', appendable=False):
+    """
+    Generate the PDF report
+
+    Args:
+        question (str): The research question
+        claude_answer (str): Claude's detailed answer
+        search_results (list): List of dicts with 'title', 'url', 'description'
+        conclusion (str): Final conclusion/summary
+        output_path: Path to save the PDF, or a binary file-like object to write it to
+        styles: Prebuilt stylesheet from create_styles(); built on demand if omitted
+        long_report (bool): Include every search result, create flowables lazily
+            while laying out and spool finished pages to a temp file, so memory
+            stays flat for thousands of sources
+        timestamp (bool): Show the "Generated on" line in the header
+        cache (ReportCache): Reuse a PDF rendered earlier from identical content.
+            Cached reports never carry a timestamp, so every hit is byte-identical.
+        metrics (RenderMetrics): Record per-phase timings and memory. In long-report
+            mode search result cards are created during the layout phase.
+        workers (int): With long_report, lay out the report in parts on this many
+            processes and merge them (see render_report_parallel()); each part
+            starts on a new page. Needs pypdf.
+        profile (str): One of OUTPUT_PROFILES, see render_pdf()
+        appendable (bool): Attach the state append_results() needs to add
+            results later: the cards from the last page that begins with one,
+            and the conclusion. Ignored with workers.
+
+    Returns:
+        bool: True if the PDF came from the cache
+    """
+    return _render_report(question, claude_answer, search_results, conclusion, output_path, styles,
+                          long_report, timestamp, cache, metrics, workers, profile, appendable)[1]
+
+
+def render_pdf(question, claude_answer, search_results, conclusion, output=None, profile='default',
+               styles=None, long_report=False, timestamp=True, cache=None, metrics=None, workers=None,
+               appendable=False):
+    """
+    Render a report in memory and measure what its bytes are spent on
+
+    Args:
+        output: Binary file-like object (or path) to also write the PDF to
+        profile (str): One of OUTPUT_PROFILES. 'fast' compresses streams at
+            zlib level 1; 'small' compresses at level 9, drops ReportLab's
+            ASCII85 encoding of page content and packs embedded font subsets
+            with only the characters drawn. 'default' matches generate_pdf().
+        Other arguments are as for generate_pdf().
+
+    Returns:
+        tuple: (pdf_data, PdfStats)
+    """
+    pdf_data, cached = _render_report(question, claude_answer, search_results, conclusion, output, styles,
+                                      long_report, timestamp, cache, metrics, workers, profile, appendable)
+    return pdf_data, PdfStats(pdf_data, profile, cached)
+
+
+def _render_report(question, claude_answer, search_results, conclusion, output, styles, long_report,
+                   timestamp, cache, metrics, workers, profile, appendable=False):
+    """generate_pdf() and render_pdf(): returns (pdf_data, True if it came from the cache)"""
+    if styles is None:
+        with _phase(metrics, 'create_styles'):
+            styles = create_styles()
+
+    parallel = bool(long_report and workers)
+    if cache is not None:
+        with _phase(metrics, 'cache_lookup'):
+            key = report_cache_key(question, claude_answer, search_results, conclusion, styles, long_report,
+                                   SECTION_RESULTS if parallel else None, profile,
+                                   appendable and not parallel)
+            pdf_data = cache.load(key)
+        if pdf_data is not None:
+            if metrics is not None:
+                metrics.cached = True
+            _write_pdf(output, pdf_data, metrics)
+            return pdf_data, True
+        timestamp = False
+
+    if parallel:
+        pdf_data, pages = render_report_parallel(question, claude_answer, search_results, conclusion,
+                                                 workers, timestamp, metrics=metrics, profile=profile)
+    else:
+        pages, pdf_data = _build_pdf(question, claude_answer, search_results, conclusion, output,
+                                     styles, long_report, timestamp, metrics, profile, appendable)
+    _write_pdf(output, pdf_data, metrics)
+    if cache is not None:
+        with _phase(metrics, 'cache_store'):
+            cache.store(key, pdf_data)
+
+    if metrics is not None:
+        metrics.pages = pages
+        metrics.output_bytes = len(pdf_data)
+    return pdf_data, False
+
+
+def _write_pdf(output, pdf_data, metrics):
+    """Write a rendered PDF to a path or binary file object, if one was given"""
+    if output is None:
+        return
+    with _phase(metrics, 'write'):
+        if isinstance(output, str):
+            with open(output, 'wb') as f:
+                f.write(pdf_data)
+        else:
+            output.write(pdf_data)
+
+
+def _build_pdf(question, claude_answer, search_results, conclusion, output_path, styles,
+               long_report, timestamp, metrics, profile='default', appendable=False):
+    """Lay out and serialize a report in this process; returns (page count, pdf_data)"""
+    # Create PDF document; it is serialized and returned rather than written by build()
+    doc = create_document(output_path, invariant=not timestamp)
+    doc._doSave = 0
+
+    # Build story, noting where result cards begin pages for an append state
+    tops = []
+    if long_report:
+        story = LazyStory(iter_report_flowables(
+            question, claude_answer, search_results, conclusion, styles, max_results=None,
+            timestamp=timestamp, tops=tops))
+    else:
+        story = []
+
+        # Add sections
+        with _phase(metrics, 'add_header'):
+            add_header(story, question, styles, timestamp)
+        with _phase(metrics, 'add_claude_answer'):
+            add_claude_answer(story, claude_answer, styles)
+        with _phase(metrics, 'add_search_results'):
+            add_search_results(story, search_results, styles, tops=tops)
+        with _phase(metrics, 'add_conclusion'):
+            add_conclusion(story, conclusion, styles)
+
+    # Build PDF: layout, then font embedding and serialization, then the file write
+    with _phase(metrics, 'layout'):
+        doc.build(story, canvasmaker=profile_canvasmaker(SpoolingCanvas if long_report else canvas.Canvas,
+                                                         profile))
+    with _phase(metrics, 'serialize'), stream_settings(profile):
+        if appendable:
+            embed_append_state(doc.canv, report_append_state(
+                shown_results(search_results, long_report), conclusion, tops, styles, long_report,
+                source={'question': question, 'claude_answer': claude_answer, 'timestamp': timestamp}))
+        pages = doc.canv.getPageNumber() - 1
+        pdf_data = doc.canv.getpdfdata()
+    return pages, pdf_data
+
+
+def render_job(data, styles=None, output=None, cache=None, metrics_mode=None, workers=None, profile='default'):
+    """
+    Render one report from a parsed job dict
+
+    Args:
+        data (dict): Job in the CLI JSON format
+        styles: Prebuilt stylesheet, see generate_pdf()
+        output: Path or binary file-like object overriding the job's output_path
+        cache (ReportCache): Output cache, see generate_pdf()
+        metrics_mode (str): 'json' or 'log' to instrument the render, see emit_metrics()
+        workers (int): Lay out a long report in parallel, see generate_pdf()
+        profile (str): One of OUTPUT_PROFILES, see render_pdf()
+
+    Returns:
+        The path or file object the PDF was written to
+    """
+    validate_job(data)
+    output_path = output if output is not None else data.get('output_path', 'research_report.pdf')
+    metrics = RenderMetrics() if metrics_mode else None
+    try:
+        generate_pdf(
+            question=data['question'],
+            claude_answer=data['claude_answer'],
+            search_results=data['search_results'],
+            conclusion=data['conclusion'],
+            output_path=output_path,
+            styles=styles,
+            long_report=data.get('long_report', False),
+            timestamp=data.get('timestamp', True),
+            cache=cache,
+            metrics=metrics,
+            workers=workers,
+            profile=profile,
+            appendable=data.get('appendable', False)
+        )
+    finally:
+        # Stop tracing even when the render fails, or every later job in this
+        # process would run under tracemalloc
+        if metrics is not None:
+            metrics.finish()
+    if metrics is not None:
+        emit_metrics(metrics, output_path, metrics_mode)
+    return output_path
+
+
+# Width reserved at the right of a contents entry for its page number
+CONTENTS_PAGE_NUMBER_WIDTH = 0.6*inch
+
+class VolumeAnchor(Flowable):
+    """
+    Zero-size marker at the start of a report in a volume
+
+    When drawn it adds the PDF destination the contents page links to, a
+    bookmark in the outline, and records the page number for the contents.
+    """
+
+    def __init__(self, key, title, pages):
+        super().__init__()
+        self.key = key
+        self.title = title
+        self.pages = pages
+        self.width = self.height = 0
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        self.canv.bookmarkPage(self.key)
+        self.canv.addOutlineEntry(self.title, self.key, level=0)
+        self.pages[self.key] = self.canv.getPageNumber()
+
+
+class ContentsEntry(Flowable):
+    """
+    One line of a volume's table of contents, linked to the report
+
+    Report page numbers are not known while the contents page is laid out,
+    so the number is drawn as a form XObject that generate_volume() defines
+    once the whole volume has been built.
+    """
+
+    def __init__(self, key, title, style):
+        super().__init__()
+        self.key = key
+        self.title = title
+        self.style = style
+
+    def wrap(self, availWidth, availHeight):
+        style = self.style
+        self._lines = wrap_text(self.title, style.fontName, style.fontSize,
+                                availWidth - CONTENTS_PAGE_NUMBER_WIDTH)
+        self.width = availWidth
+        self.height = len(self._lines)*style.leading
+        return self.width, self.height
+
+    def getSpaceAfter(self):
+        return self.style.spaceAfter / 2
+
+    def draw(self):
+        canv = self.canv
+        draw_text_lines(canv, self._lines, self.style, 0, self.height)
+        canv.linkRect('', self.key, (0, 0, self.width, self.height), relative=1, thickness=0)
+        canv.saveState()
+        canv.translate(self.width, self.height - self.style.fontSize)
+        canv.doForm(_page_number_form(self.key))
+        canv.restoreState()
+
+
+def _page_number_form(key):
+    return f"volume-page-{key}"
+
+
+def iter_volume_flowables(jobs, styles, pages, timestamp=True):
+    """Yield a volume's contents page followed by every report, each starting on a new page"""
+    cover = []
+    if timestamp:
+        date_text = f"Generated on {datetime.now().strftime('%B %d, %Y at %H:%M')}"
+        cover.append(text_flowable(date_text, styles['ReportMetadata']))
+    cover.append(Spacer(1, 0.1*inch))
+    cover.append(text_flowable('Research Volume', styles['QuestionTitle']))
+    cover.append(text_flowable(f"{len(jobs)} reports", styles['ReportMetadata']))
+    add_section_header(cover, 'Contents')
+    for number, data in enumerate(jobs, 1):
+        cover.append(ContentsEntry(f"report-{number}", data['question'], styles['ReportBody']))
+    yield from cover
+
+    for number, data in enumerate(jobs, 1):
+        yield PageBreak()
+        yield VolumeAnchor(f"report-{number}", data['question'], pages)
+        yield from iter_report_flowables(
+            data['question'], data['claude_answer'], data['search_results'], data['conclusion'],
+            styles, max_results=None if data.get('long_report', False) else MAX_SEARCH_RESULTS,
+            timestamp=False)
+
+
+def generate_volume(jobs, output_path, styles=None, timestamp=True):
+    """
+    Render many reports into one PDF with a table of contents and bookmarks
+
+    Fonts are registered and embedded once for the whole volume instead of
+    once per report. Reports are laid out lazily and finished pages spooled
+    to a temp file, as for long reports, so memory stays flat however many
+    jobs there are.
+
+    Args:
+        jobs (list): Job dicts in the CLI JSON format; output_path is ignored
+        output_path: Path to save the PDF, or a binary file-like object to write it to
+        styles: Prebuilt stylesheet from create_styles(); built on demand if omitted
+        timestamp (bool): Show the "Generated on" line on the contents page
+
+    Returns:
+        int: Number of pages in the volume
+    """
+    for number, data in enumerate(jobs, 1):
+        try:
+            validate_job(data)
+        except ValueError as e:
+            raise ValueError(f"job {number}: {e}") from None
+    if styles is None:
+        styles = create_styles()
+
+    pages = {}
+    doc = create_document(output_path, invariant=not timestamp)
+    doc._doSave = 0
+    doc.build(LazyStory(iter_volume_flowables(jobs, styles, pages, timestamp)),
+              canvasmaker=SpoolingCanvas)
+
+    # Now the page numbers are known, define the forms the contents page refers to
+    canv = doc.canv
+    style = styles['ReportBody']
+    for key, page in pages.items():
+        canv.beginForm(_page_number_form(key), lowerx=-CONTENTS_PAGE_NUMBER_WIDTH,
+                       lowery=-style.leading, upperx=0, uppery=style.leading)
+        canv.setFont(style.fontName, style.fontSize)
+        canv.setFillColor(style.textColor)
+        canv.drawRightString(0, 0, str(page))
+        canv.endForm()
+    canv.showOutline()
+
+    page_count = canv.getPageNumber() - 1
+    with stream_settings():
+        pdf_data = canv.getpdfdata()
+    if isinstance(output_path, str):
+        with open(output_path, 'wb') as f:
+            f.write(pdf_data)
+    else:
+        output_path.write(pdf_data)
+    return page_count
+
+
+# Search results per part when a long report is laid out in parallel
+SECTION_RESULTS = 500
+
+
+class PageMarker(Flowable):
+    """Zero-size marker that records the page it lands on under a key"""
+
+    def __init__(self, key, pages):
+        super().__init__()
+        self.key = key
+        self.pages = pages
+        self.width = self.height = 0
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        self.pages[self.key] = self.canv.getPageNumber()
+
+
+class FontSubsetPrimer(Flowable):
+    """
+    Zero-size flowable that assigns every character of a report to the embedded font subsets up front
+
+    ReportLab numbers subset fonts and assigns characters to them in order
+    of first use. Priming each part of a report with the same characters,
+    in the same order, makes every part embed byte-identical fonts, which
+    merge_report_parts() then keeps only once.
+    """
+
+    def __init__(self, charset):
+        super().__init__()
+        self.charset = charset
+        self.width = self.height = 0
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        doc = self.canv._doc
+        for font_name in dict.fromkeys((FONT_NORMAL, FONT_BOLD)):
+            font = pdfmetrics.getFont(font_name)
+            if isinstance(font, TTFont):
+                font.splitString(self.charset, doc)
+                for subset in range(len(font.state[doc].subsets)):
+                    font.getSubsetInternalName(subset, doc)
+
+
+def report_charset(*texts):
+    """Printable ASCII followed by every other character of texts, in code point order"""
+    ascii_chars = ''.join(map(chr, range(32, 127)))
+    others = set().union(*map(set, texts)) - set(ascii_chars)
+    return ascii_chars + ''.join(sorted(others))
+
+
+def report_parts(question, claude_answer, search_results, conclusion, timestamp=True,
+                 section_results=SECTION_RESULTS):
+    """
+    Split a long report into parts that can be laid out independently
+
+    The header and answer form the first part, then every section_results
+    search results form one more; the last of them carries the conclusion.
+    Each part starts on a new page.
+
+    Returns:
+        list: Part dicts for _render_report_part()
+    """
+    texts = [question, claude_answer, conclusion, TITLE_ANSWER, TITLE_RESULTS, TITLE_CONCLUSION]
+    for result in search_results:
+        texts.extend(result_fields(result))
+    charset = report_charset(*texts)
+
+    parts = [{'charset': charset, 'question': question, 'timestamp': timestamp,
+              'claude_answer': claude_answer}]
+    starts = range(0, max(len(search_results), 1), section_results)
+    for start in starts:
+        parts.append({'charset': charset, 'start': start + 1,
+                      'results': search_results[start:start + section_results]})
+    parts[-1]['conclusion'] = conclusion
+    return parts
+
+
+def iter_part_flowables(part, styles, pages):
+    """Yield one part's story, with PageMarkers where its outline entries point"""
+    yield FontSubsetPrimer(part['charset'])
     story = []
-    styles = create_styles()
+    if 'question' in part:
+        add_header(story, part['question'], styles, part['timestamp'])
+        story.append(PageMarker('answer', pages))
+        add_claude_answer(story, part['claude_answer'], styles)
+    if 'results' in part:
+        if part['start'] == 1:
+            story.append(PageMarker('results', pages))
+            add_section_header(story, TITLE_RESULTS)
+        story.append(PageMarker(f"results-{part['start']}", pages))
+    yield from story
+    if 'results' in part:
+        yield from iter_search_results(part['results'], styles, part['start'])
+    if 'conclusion' in part:
+        story = [PageMarker('conclusion', pages)]
+        add_conclusion(story, part['conclusion'], styles)
+        yield from story
 
-    # Add sections
-    add_header(story, question, styles)
-    add_claude_answer(story, claude_answer, styles)
-    add_search_results(story, search_results, styles)
+
+def _render_report_part(part):
+    """Worker task: lay out one part of a report; returns (pdf_data, page count, {marker: page})"""
+    pages = {}
+    profile = part.get('profile', 'default')
+    doc = create_document(io.BytesIO(), invariant=not part.get('timestamp', False))
+    doc._doSave = 0
+    doc.build(LazyStory(iter_part_flowables(part, _worker_styles, pages)),
+              canvasmaker=profile_canvasmaker(SpoolingCanvas, profile))
+    with stream_settings(profile):
+        pdf_data = doc.canv.getpdfdata()
+    return pdf_data, doc.canv.getPageNumber() - 1, pages
+
+
+def merge_report_parts(parts, rendered):
+    """
+    Concatenate separately rendered parts into one PDF
+
+    Marker pages are offset by the pages of the parts before them to build
+    the outline: one entry per section, with a child per range of search
+    results. Link annotations move with their pages. Objects that are
+    identical across parts, such as the primed font subsets, are stored once.
+
+    Returns:
+        tuple: (pdf_data, page count)
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    offset = 0
+    results_entry = None
+    for number, (part, (pdf_data, page_count, pages)) in enumerate(zip(parts, rendered)):
+        reader = PdfReader(io.BytesIO(pdf_data))
+        if number == 0 and reader.metadata:
+            writer.add_metadata(reader.metadata)
+        writer.append(reader, import_outline=False)
+        if 'answer' in pages:
+            writer.add_outline_item(TITLE_ANSWER, offset + pages['answer'] - 1)
+        if 'results' in pages:
+            results_entry = writer.add_outline_item(TITLE_RESULTS, offset + pages['results'] - 1)
+        if part.get('results'):
+            last = part['start'] + len(part['results']) - 1
+            writer.add_outline_item(f"Results {part['start']}\u2013{last}",
+                                    offset + pages[f"results-{part['start']}"] - 1, parent=results_entry)
+        if 'conclusion' in pages:
+            writer.add_outline_item(TITLE_CONCLUSION, offset + pages['conclusion'] - 1)
+        offset += page_count
+    writer.page_mode = '/UseOutlines'
+    writer.compress_identical_objects()
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue(), offset
+
+
+def render_report_parallel(question, claude_answer, search_results, conclusion, workers,
+                           timestamp=True, section_results=SECTION_RESULTS, metrics=None, profile='default'):
+    """
+    Lay out a long report's parts in worker processes and merge them
+
+    Workers build their own stylesheet, as batch workers do.
+
+    Args:
+        workers (int): Worker processes; parts are handed out in order, so
+            wall time falls with workers until there are more workers than parts
+        section_results (int): Search results per part, see report_parts()
+        metrics (RenderMetrics): Times the 'layout' and 'merge' phases
+        profile (str): Output profile every part is rendered with, see OUTPUT_PROFILES
+
+    Returns:
+        tuple: (pdf_data, page count)
+    """
+    if importlib.util.find_spec('pypdf') is None:
+        raise RuntimeError("Rendering a report in parallel needs pypdf: pip3 install pypdf")
+    parts = report_parts(question, claude_answer, search_results, conclusion, timestamp, section_results)
+    for part in parts:
+        part['profile'] = profile
+    with _phase(metrics, 'layout'):
+        with multiprocessing.Pool(min(workers, len(parts)), initializer=_init_worker) as pool:
+            rendered = pool.map(_render_report_part, parts, chunksize=1)
+    with _phase(metrics, 'merge'):
+        return merge_report_parts(parts, rendered)
+
+
+# Attachment holding what append_results() needs to lay out a report's last pages again
+APPEND_STATE_FILE = 'report-append-state.json'
+APPEND_STATE_VERSION = 1
+
+
+def report_append_state(results, conclusion, tops, styles, long_report, source, first=1, first_page=1):
+    """
+    State append_results() needs to lay out a report's last pages again
+
+    results are the cards shown, numbered from first, on pages counted from
+    first_page. The last card in tops begins at the top of a page; from that
+    page on the report holds only cards and the conclusion, so an append
+    lays out just those cards, the new ones and the conclusion. With no such
+    card the report is laid out again from the start, and the state keeps
+    its source (question, answer and timestamp flag) for that.
+    """
+    state = {
+        "version": APPEND_STATE_VERSION,
+        "layout": layout_fingerprint(styles),
+        "long_report": bool(long_report),
+        "results": first - 1 + len(results),
+        "conclusion": conclusion
+    }
+    if tops:
+        start, page = tops[-1]
+        state.update(cut_page=first_page + page - 1, start=start)
+    else:
+        state.update(cut_page=1, start=1, source=source)
+    state["tail"] = [list(result_fields(r)) for r in results[state["start"] - first:]]
+    return state
+
+
+def embed_append_state(canv, state):
+    """Attach an append state to the PDF being built on canv, as a compressed embedded JSON file"""
+    data = zlib.compress(json.dumps(state, ensure_ascii=False).encode('utf-8'))
+    stream = PDFStream(PDFDictionary({'Type': PDFName('EmbeddedFile'), 'Filter': PDFName('FlateDecode')}), data)
+    filespec = PDFDictionary({
+        'Type': PDFName('Filespec'),
+        'F': PDFString(APPEND_STATE_FILE),
+        'UF': PDFString(APPEND_STATE_FILE),
+        'EF': PDFDictionary({'F': canv._doc.Reference(stream)})
+    })
+    canv.setCatalogEntry('Names', PDFDictionary({
+        'EmbeddedFiles': PDFDictionary({'Names': PDFArray([PDFString(APPEND_STATE_FILE),
+                                                           canv._doc.Reference(filespec)])})
+    }))
+
+
+def _append_state_filespec(root):
+    """The append state's file specification dictionary in a pypdf document catalog, or None"""
+    try:
+        names = root['/Names']['/EmbeddedFiles']['/Names']
+    except KeyError:
+        return None
+    for name, filespec in zip(names[::2], names[1::2]):
+        if name == APPEND_STATE_FILE:
+            return filespec.get_object()
+    return None
+
+
+def iter_tail_flowables(results, start, conclusion, styles, tops):
+    """Yield result cards numbered from start, then the conclusion"""
+    yield from iter_search_results(results, styles, start, tops)
+    story = []
     add_conclusion(story, conclusion, styles)
+    yield from story
 
-    # Build PDF
-    doc.build(story)
-    print(f"✅ Report generated: {output_path}")
+
+def _render_tail(state, results, conclusion, styles):
+    """Lay out a report from its cut page on; returns (pdf_data, page count, new append state)"""
+    tops = []
+    source = state.get('source')
+    if source is not None:
+        flowables = iter_report_flowables(source['question'], source['claude_answer'], results, conclusion,
+                                          styles, max_results=None, timestamp=source['timestamp'], tops=tops)
+    else:
+        flowables = iter_tail_flowables(results, state['start'], conclusion, styles, tops)
+    doc = create_document(io.BytesIO(), invariant=True)
+    doc._doSave = 0
+    doc.build(LazyStory(flowables), canvasmaker=SpoolingCanvas if state['long_report'] else canvas.Canvas)
+    new_state = report_append_state(results, conclusion, tops, styles, state['long_report'], source,
+                                    first=state['start'], first_page=state['cut_page'])
+    with stream_settings():
+        pdf_data = doc.canv.getpdfdata()
+    return pdf_data, doc.canv.getPageNumber() - 1, new_state
+
+
+def pdf_incremental_update(pdf_path, reader, cut_page, tail_data, filespec, state):
+    """
+    PDF incremental update replacing a report's pages from cut_page on with a rendered tail's pages
+
+    Only the trailer, catalog, page tree and append state of the report are
+    read. The tail's pages, and everything they use, are copied in under
+    object numbers above the report's /Size, followed by a new page tree
+    node and append state and a cross-reference section chained to the
+    previous one with /Prev; nothing else in the file is touched.
+
+    Returns:
+        tuple: (bytes to append to the file, total page count)
+    """
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import (ArrayObject, DecodedStreamObject, DictionaryObject, IndirectObject,
+                               NameObject, NumberObject)
+
+    size = reader.trailer['/Size']
+    original_size = os.path.getsize(pdf_path)
+    with open(pdf_path, 'rb') as f:
+        f.seek(max(original_size - 1024, 0))
+        prev_xref = int(re.findall(rb'startxref\s+(\d+)', f.read())[-1])
+
+    # A scratch writer numbers the copied objects from the report's /Size on
+    scratch = PdfWriter()
+    scratch._objects.extend([None] * (size - 1 - len(scratch._objects)))
+    pages = reader.root_object['/Pages']
+    parent = IndirectObject(pages.indirect_reference.idnum, 0, scratch)
+    kids = ArrayObject(pages.raw_get('/Kids')[:cut_page - 1])
+    for page in PdfReader(io.BytesIO(tail_data)).pages:
+        copy = scratch.add_page(page)
+        copy[NameObject('/Parent')] = parent
+        kids.append(copy.indirect_reference)
+    stream = DecodedStreamObject()
+    stream[NameObject('/Type')] = NameObject('/EmbeddedFile')
+    stream.set_data(json.dumps(state, ensure_ascii=False).encode('utf-8'))
+    state_ref = scratch._add_object(stream.flate_encode())
+
+    objects = {number: obj for number, obj in enumerate(scratch._objects[size - 1:], size) if obj is not None}
+    pages_node = DictionaryObject(pages)
+    pages_node[NameObject('/Kids')] = kids
+    pages_node[NameObject('/Count')] = NumberObject(len(kids))
+    objects[pages.indirect_reference.idnum] = pages_node
+    filespec_node = DictionaryObject(filespec)
+    filespec_node[NameObject('/EF')] = DictionaryObject({NameObject('/F'): state_ref})
+    objects[filespec.indirect_reference.idnum] = filespec_node
+
+    out = io.BytesIO()
+    out.write(b'\n')
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = original_size + out.tell()
+        out.write(f"{number} 0 obj\n".encode())
+        objects[number].write_to_stream(out)
+        out.write(b"\nendobj\n")
+
+    # Cross-reference section: the free list head, then one subsection per run of consecutive object numbers
+    xref = original_size + out.tell()
+    out.write(b"xref\n0 1\n0000000000 65535 f \n")
+    numbers = sorted(offsets)
+    run_start = 0
+    for i, number in enumerate(numbers):
+        if i + 1 == len(numbers) or numbers[i + 1] != number + 1:
+            out.write(f"{numbers[run_start]} {i + 1 - run_start}\n".encode())
+            for run_number in numbers[run_start:i + 1]:
+                out.write(f"{offsets[run_number]:010d} 00000 n \n".encode())
+            run_start = i + 1
+    trailer = DictionaryObject({
+        NameObject('/Size'): NumberObject(max(size, numbers[-1] + 1)),
+        NameObject('/Root'): reader.root_object.indirect_reference,
+        NameObject('/Prev'): NumberObject(prev_xref)
+    })
+    for key in ('/Info', '/ID'):
+        if key in reader.trailer:
+            trailer[NameObject(key)] = reader.trailer.raw_get(key)
+    out.write(b"trailer\n")
+    trailer.write_to_stream(out)
+    out.write(f"\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue(), len(kids)
+
+
+def append_results(pdf_path, search_results, conclusion=None, styles=None):
+    """
+    Append search results to a report written by generate_pdf(), numbered on from its last card
+
+    Only the pages from the last one that begins with a result card are laid
+    out again, with the new cards and the conclusion (the report's own, or
+    the one given), and added to the end of the file as a PDF incremental
+    update (see pdf_incremental_update()). The original bytes stay in place,
+    so the cost follows the new content rather than the report.
+
+    The report must have been rendered with appendable=True ("appendable":
+    true in its job). A regular report still shows at most MAX_SEARCH_RESULTS
+    results; extra ones are dropped, as generate_pdf() drops them, and one
+    that is full takes no more. Needs pypdf.
+
+    Raises:
+        RuntimeError: pypdf is not installed
+        ValueError: The file is not a PDF with an append state, was laid out
+            with other fonts, styles or template, or is a regular report
+            with no room left for the results given
+
+    Returns:
+        dict: appended and total ('results') results, total 'pages',
+            'relaid_pages' and the 'bytes' added to the file
+    """
+    if importlib.util.find_spec('pypdf') is None:
+        raise RuntimeError("Appending to a report needs pypdf: pip3 install pypdf")
+    from pypdf import PdfReader
+    from pypdf.errors import PyPdfError
+
+    if styles is None:
+        styles = create_styles()
+    try:
+        reader = PdfReader(pdf_path)
+        filespec = _append_state_filespec(reader.root_object)
+    except PyPdfError as e:
+        raise ValueError(f"{pdf_path} is not a readable PDF: {e}") from e
+    if filespec is None:
+        raise ValueError(f"{pdf_path} has no append state; render it again with \"appendable\": true "
+                         "(appendable=True, without workers)")
+    state = json.loads(filespec['/EF']['/F'].get_data())
+    if state.get('version') != APPEND_STATE_VERSION or state['layout'] != layout_fingerprint(styles):
+        raise ValueError(f"{pdf_path} was laid out with other fonts, styles or template; render it again")
+
+    if not state['long_report']:
+        room = max(MAX_SEARCH_RESULTS - state['results'], 0)
+        if search_results and not room:
+            raise ValueError(f"{pdf_path} already shows {MAX_SEARCH_RESULTS} results; only long reports "
+                             "(\"long_report\": true) take more")
+        search_results = search_results[:room]
+    if not search_results and conclusion is None:
+        return {"appended": 0, "results": state['results'], "pages": len(reader.pages),
+                "relaid_pages": 0, "bytes": 0}
+    if conclusion is None:
+        conclusion = state['conclusion']
+    tail = [dict(zip(('title', 'url', 'description'), fields)) for fields in state['tail']]
+    pdf_data, relaid_pages, new_state = _render_tail(state, tail + list(search_results), conclusion, styles)
+
+    update, pages = pdf_incremental_update(pdf_path, reader, state['cut_page'], pdf_data, filespec, new_state)
+    with open(pdf_path, 'ab') as f:
+        f.write(update)
+    return {
+        "appended": len(search_results),
+        "results": new_state['results'],
+        "pages": pages,
+        "relaid_pages": relaid_pages,
+        "bytes": len(update)
+    }
+
+
+def collect_job_files(source):
+    """
+    Expand a batch source into a list of job file paths
+
+    A directory yields its *.json files, a non-JSON file is read as a
+    manifest (one job path per line, relative to the manifest, '#' comments
+    allowed) and anything else is treated as a glob pattern.
+    """
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, '*.json')))
+
+    if os.path.isfile(source) and not source.endswith('.json'):
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = [line.strip() for line in f]
+        return [os.path.join(base_dir, line) for line in lines
+                if line and not line.startswith('#')]
+
+    return sorted(glob.glob(source))
+
+
+# Stylesheet, output cache, metrics mode and output profile of each batch worker, set up once by _init_worker()
+_worker_styles = None
+_worker_cache = None
+_worker_metrics = None
+_worker_profile = 'default'
+
+
+def _init_worker(options=None):
+    """
+    Warm up a batch worker: fonts are registered on import, styles built here
+
+    options may hold 'cache_dir' and 'cache_max_bytes' for a ReportCache,
+    'metrics' for render_job()'s metrics_mode and 'profile' for its output profile.
+    """
+    global _worker_styles, _worker_cache, _worker_metrics, _worker_profile
+    options = options or {}
+    _worker_styles = create_styles()
+    if options.get('cache_dir'):
+        _worker_cache = ReportCache(options['cache_dir'], options['cache_max_bytes'])
+    _worker_metrics = options.get('metrics')
+    _worker_profile = options.get('profile', 'default')
+
+
+def _render_job_file(job_path):
+    """Worker task: render one job file and report (job_path, output_path, error, seconds)"""
+    start = time.perf_counter()
+    try:
+        with open(job_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        output_path = render_job(data, styles=_worker_styles, cache=_worker_cache,
+                                 metrics_mode=_worker_metrics, profile=_worker_profile)
+        return job_path, output_path, None, time.perf_counter() - start
+    except Exception as e:
+        return job_path, None, f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+
+def run_batch(job_files, workers=None, options=None):
+    """
+    Render many job files across a pool of warm worker processes
+
+    A failing job is reported and counted but does not stop the batch.
+    options configure every worker, see _init_worker().
+
+    Returns:
+        int: Number of failed jobs
+    """
+    workers = workers or os.cpu_count() or 1
+    failures = 0
+    start = time.perf_counter()
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(options,)) as pool:
+        for job_path, output_path, error, seconds in pool.imap_unordered(_render_job_file, job_files):
+            if error:
+                failures += 1
+                print(f"❌ {job_path}: {error}")
+            else:
+                print(f"✅ {job_path} -> {output_path} ({seconds:.2f}s)")
+
+    elapsed = time.perf_counter() - start
+    done = len(job_files) - failures
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"\nBatch finished: {done} succeeded, {failures} failed in {elapsed:.2f}s "
+          f"({rate:.2f} reports/sec, {workers} workers)")
+    return failures
+
+
+def _render_job_record(line_no, line):
+    """Worker task: parse and render one NDJSON record into a status dict"""
+    start = time.perf_counter()
+    status = {"line": line_no}
+    try:
+        output_path = render_job(json.loads(line), styles=_worker_styles, cache=_worker_cache,
+                                 metrics_mode=_worker_metrics, profile=_worker_profile)
+        status.update(status="ok", output_path=output_path)
+    except Exception as e:
+        status.update(status="error", error=f"{type(e).__name__}: {e}")
+    status["seconds"] = round(time.perf_counter() - start, 4)
+    return status
+
+
+def run_stream(stream, workers=None, max_in_flight=None, options=None):
+    """
+    Render newline-delimited job records as they arrive
+
+    Records are read lazily and at most max_in_flight of them are queued or
+    rendering at any time; once that limit is reached reading stops, so a
+    piped producer is held back by the OS pipe buffer. One JSON status line
+    is written to stdout per record, in completion order. options are as
+    for run_batch().
+
+    Returns:
+        int: Number of failed records
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    slots = threading.BoundedSemaphore(max_in_flight)
+    failures = 0
+
+    def on_done(status):
+        nonlocal failures
+        if status["status"] != "ok":
+            failures += 1
+        sys.stdout.write(json.dumps(status, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+        slots.release()
+
+    def on_error(line_no, error):
+        # The task died outside _render_job_record's own handling, e.g. its
+        # status failed to pickle; the slot must still be given back
+        on_done({"line": line_no, "status": "error", "error": f"{type(error).__name__}: {error}"})
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(options,)) as pool:
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            slots.acquire()
+            pool.apply_async(_render_job_record, (line_no, line), callback=on_done,
+                             error_callback=partial(on_error, line_no))
+        pool.close()
+        pool.join()
+
+    return failures
+
+
+JOB_FORMAT = json.dumps({
+    "question": "Your research question",
+    "claude_answer": "Claude's detailed answer",
+    "search_results": [
+        {"title": "Result title", "url": "https://...", "description": "Brief description"}
+    ],
+    "conclusion": "Final summary and conclusion",
+    "output_path": "path/to/output.pdf",
+    "long_report": False,
+    "timestamp": True,
+    "appendable": False
+}, indent=2)
 
 
 def main():
     """Main entry point for CLI usage"""
-    if len(sys.argv) != 2:
-        print("Usage: python generate_report.py <data.json>")
-        print("\nExpected JSON format:")
-        print(json.dumps({
-            "question": "Your research question",
-            "claude_answer": "Claude's detailed answer",
-            "search_results": [
-                {"title": "Result title", "url": "https://...", "description": "Brief description"}
-            ],
-            "conclusion": "Final summary and conclusion",
-            "output_path": "path/to/output.pdf"
-        }, indent=2))
+    parser = argparse.ArgumentParser(
+        description="Generate research report PDFs",
+        epilog="Expected JSON format:\n" + JOB_FORMAT,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('data', nargs='?', help="JSON file describing one report")
+    parser.add_argument('--batch', metavar='SOURCE',
+                        help="directory, glob or manifest of job files to render")
+    parser.add_argument('--ndjson', metavar='PATH',
+                        help="newline-delimited job records to stream, '-' for stdin")
+    parser.add_argument('--volume', metavar='SOURCE',
+                        help="directory, glob or manifest of job files to combine into one PDF")
+    parser.add_argument('--output', default='research_volume.pdf',
+                        help="output path in volume mode (default: research_volume.pdf)")
+    parser.add_argument('--append', metavar='PDF',
+                        help="add the data file's search_results (and conclusion, if given) to a report "
+                             "rendered earlier, laying out only its last pages")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes for batch and stream modes (default: CPU count); "
+                             "for a single long report, lay it out in parts on this many processes")
+    parser.add_argument('--max-in-flight', type=int, default=None,
+                        help="records queued or rendering at once in stream mode (default: 2x workers)")
+    parser.add_argument('--cache-dir', default=os.environ.get('REPORT_CACHE_DIR'),
+                        help="reuse PDFs rendered earlier from identical content (default: $REPORT_CACHE_DIR)")
+    parser.add_argument('--cache-max-mb', type=int, default=512,
+                        help="evict least recently used cached PDFs beyond this size (default: 512)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="render everything, ignoring and not updating the cache")
+    parser.add_argument('--metrics', choices=('json', 'log'),
+                        help="record per-phase time and memory: 'json' writes <output>.metrics.json, "
+                             "'log' prints one line per report to stderr")
+    parser.add_argument('--profile', choices=sorted(OUTPUT_PROFILES), default='default',
+                        help="output profile: 'fast' spends the least CPU on compression, 'small' "
+                             "writes the smallest PDFs (default: ReportLab's defaults)")
+    args = parser.parse_args()
+
+    if sum(1 for mode in (args.data, args.batch, args.ndjson, args.volume) if mode) != 1 \
+            or (args.append and not args.data):
+        parser.print_help()
         sys.exit(1)
 
+    options = {"metrics": args.metrics, "profile": args.profile}
+    if args.cache_dir and not args.no_cache:
+        options.update(cache_dir=args.cache_dir, cache_max_bytes=args.cache_max_mb * 1024 * 1024)
+
+    if args.ndjson:
+        if args.ndjson == '-':
+            failures = run_stream(sys.stdin, args.workers, args.max_in_flight, options)
+        else:
+            with open(args.ndjson, 'r', encoding='utf-8') as f:
+                failures = run_stream(f, args.workers, args.max_in_flight, options)
+        sys.exit(1 if failures else 0)
+
+    if args.volume:
+        job_files = collect_job_files(args.volume)
+        if not job_files:
+            print(f"No job files found for: {args.volume}")
+            sys.exit(1)
+        jobs = []
+        for job_path in job_files:
+            try:
+                with open(job_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                validate_job(data)
+            except (OSError, ValueError) as e:
+                print(f"❌ {job_path}: {type(e).__name__}: {e}")
+                sys.exit(1)
+            jobs.append(data)
+        start = time.perf_counter()
+        pages = generate_volume(jobs, args.output)
+        print(f"✅ Volume generated: {args.output} ({len(jobs)} reports, {pages} pages, "
+              f"{time.perf_counter() - start:.1f}s)")
+        sys.exit(0)
+
+    if args.batch:
+        job_files = collect_job_files(args.batch)
+        if not job_files:
+            print(f"No job files found for: {args.batch}")
+            sys.exit(1)
+        failures = run_batch(job_files, workers=args.workers, options=options)
+        sys.exit(1 if failures else 0)
+
     # Load data from JSON file
-    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+    with open(args.data, 'r', encoding='utf-8') as f:
         data = json.load(f)
 
+    if args.append:
+        start = time.perf_counter()
+        try:
+            summary = append_results(args.append, data.get('search_results', []), data.get('conclusion'))
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ Appended {summary['appended']} results to {args.append} ({summary['results']} in total, "
+              f"{summary['relaid_pages']} of {summary['pages']} pages laid out, "
+              f"+{summary['bytes'] / 1024:.1f} KB, {time.perf_counter() - start:.2f}s)")
+        sys.exit(0)
+
     # Generate PDF
-    generate_pdf(
-        question=data['question'],
-        claude_answer=data['claude_answer'],
-        search_results=data['search_results'],
-        conclusion=data['conclusion'],
-        output_path=data.get('output_path', 'research_report.pdf')
-    )
+    cache = ReportCache(options['cache_dir'], options['cache_max_bytes']) if 'cache_dir' in options else None
+    try:
+        output_path = render_job(data, cache=cache, metrics_mode=args.metrics, workers=args.workers,
+                                 profile=args.profile)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ Report generated: {output_path}")
 
 
 if __name__ == '__main__':
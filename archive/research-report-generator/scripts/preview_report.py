@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Research Report Preview
+Renders a report job as self-contained HTML or Markdown for review before the PDF
+
+Uses the same job schema and colour scheme as generate_report.py but never
+imports ReportLab or registers fonts, so a preview takes milliseconds.
+"""
+
+import os
+import re
+import sys
+import html
+import json
+import time
+import argparse
+from datetime import datetime
+from urllib.parse import urlsplit
+from report_model import (
+    COLOR_HEX, TITLE_ANSWER, TITLE_RESULTS, TITLE_CONCLUSION, INLINE_MARKUP,
+    validate_job, result_fields, shown_results, text_paragraphs
+)
+
+# Preview format -> output extension
+PREVIEW_FORMATS = {'html': '.html', 'md': '.md'}
+
+# Paragraph inline tags and the HTML / Markdown they become; other tags are dropped
+HTML_TAGS = {'b': 'strong', 'strong': 'strong', 'i': 'em', 'em': 'em', 'u': 'u',
+             'strike': 's', 'sup': 'sup', 'super': 'sup', 'sub': 'sub'}
+MARKDOWN_TAGS = {'b': '**', 'strong': '**', 'i': '*', 'em': '*', 'strike': '~~'}
+
+TAG = re.compile(r'<(/?)(\w+)([^<>]*)>')
+HREF = re.compile(r'''href\s*=\s*(["'])(.*?)\1''', re.IGNORECASE)
+
+# Link targets that become clickable; others (javascript:, data:, ...) are shown as text
+SAFE_URL_SCHEMES = ('http', 'https', 'mailto')
+
+# Literal '<' and '>' outside markup, escaped so Markdown viewers do not read them as HTML
+ANGLE_BRACKET = re.compile(r'[<>]')
+
+# Mirrors the paragraph styles in create_styles(), in points so sizes match the PDF
+PREVIEW_CSS = """
+:root { %(variables)s }
+body { margin: 0; background: #FFFFFF; color: var(--text_primary);
+       font: 11pt/16pt "Helvetica Neue", Helvetica, Arial, "Noto Sans CJK SC", sans-serif; }
+main { max-width: 7in; margin: 0 auto; padding: 0.5in 0.25in; }
+.meta { font-size: 9pt; color: var(--text_secondary); margin: 0 0 20pt; }
+h1 { font-size: 24pt; line-height: 30pt; color: var(--primary); margin: 10pt 0 30pt; }
+.divider { border-top: 2pt solid var(--accent); background: var(--bg_light); height: 6pt; margin-bottom: 14pt; }
+h2 { font-size: 16pt; line-height: 20pt; color: var(--primary); background: var(--bg_light);
+     border: 1pt solid var(--border); padding: 10pt 12pt; margin: 22pt 0 11pt; }
+p { margin: 0 0 12pt; }
+.results { list-style: none; padding: 0; margin: 0; }
+.results li { margin-bottom: 15pt; }
+.badge { display: block; width: 0.5in; margin: 0 auto 6pt; background: var(--accent); color: #FFFFFF;
+         text-align: center; font-weight: bold; font-size: 12pt; line-height: 22pt; }
+.results h3 { font-size: 11pt; line-height: 16pt; margin: 0 0 4pt; overflow-wrap: anywhere; }
+.results a, .results .url { display: block; font-size: 10pt; line-height: 14pt; color: var(--secondary);
+             margin-bottom: 8pt; overflow-wrap: anywhere; }
+.results .desc { font-size: 10pt; line-height: 14pt; color: var(--text_secondary); margin: 0 0 0 20pt; }
+"""
+
+
+def safe_url(url):
+    """True if url is a link a preview may make clickable: one of SAFE_URL_SCHEMES"""
+    try:
+        return urlsplit(url.strip()).scheme.lower() in SAFE_URL_SCHEMES
+    except ValueError:
+        return False
+
+
+def _href(attrs):
+    """The href, entities decoded, of an <a> or <link> tag's attributes if safe_url() allows it, else None"""
+    href = HREF.search(attrs)
+    href = html.unescape(href.group(2)) if href else ''
+    return href if safe_url(href) else None
+
+
+def _html_markup(markup, links):
+    """
+    HTML for one INLINE_MARKUP match: entities pass through, tags are translated or dropped
+
+    links is the stack of open links, True for each one emitted as an <a>;
+    links with no safe href are dropped along with their closing tag.
+    """
+    if markup.startswith('&'):
+        return markup
+    closing, name, attrs = TAG.match(markup).groups()
+    name = name.lower()
+    if name == 'br':
+        return '<br>'
+    if name in ('a', 'link'):
+        if closing:
+            return '</a>' if links and links.pop() else ''
+        href = _href(attrs)
+        links.append(href is not None)
+        return f'<a href="{html.escape(href)}">' if href is not None else ''
+    if name in HTML_TAGS:
+        return f'<{closing}{HTML_TAGS[name]}>'
+    return ''
+
+
+def inline_html(text):
+    """HTML for text that may hold Paragraph inline markup, escaping everything else like escape_markup()"""
+    parts = []
+    links = []
+    last = 0
+    for match in INLINE_MARKUP.finditer(text):
+        parts.append(html.escape(text[last:match.start()], quote=False))
+        parts.append(_html_markup(match.group(), links))
+        last = match.end()
+    parts.append(html.escape(text[last:], quote=False))
+    return ''.join(parts)
+
+
+def inline_markdown(text):
+    """Markdown for text that may hold Paragraph inline markup; links with a safe_url() become [text](href)"""
+    parts = []
+    hrefs = []
+    last = 0
+    for match in INLINE_MARKUP.finditer(text):
+        parts.append(ANGLE_BRACKET.sub(r'\\\g<0>', text[last:match.start()]))
+        last = match.end()
+        markup = match.group()
+        if markup.startswith('&'):
+            parts.append(html.unescape(markup))
+            continue
+        closing, name, attrs = TAG.match(markup).groups()
+        name = name.lower()
+        if name == 'br':
+            parts.append('  \n')
+        elif name in ('a', 'link'):
+            if not closing:
+                href = _href(attrs)
+                hrefs.append(href)
+                if href is not None:
+                    parts.append('[')
+            elif hrefs:
+                href = hrefs.pop()
+                if href is not None:
+                    parts.append(f']({href})')
+        elif name in MARKDOWN_TAGS:
+            parts.append(MARKDOWN_TAGS[name])
+    parts.append(ANGLE_BRACKET.sub(r'\\\g<0>', text[last:]))
+    return ''.join(parts)
+
+
+def plain_text(text):
+    """Text with inline tags removed and entities decoded, for titles and headings"""
+    return INLINE_MARKUP.sub(lambda m: html.unescape(m.group()) if m.group().startswith('&') else '', text)
+
+
+def _markdown_literal(text):
+    """Escape the characters that would turn literal text into Markdown syntax"""
+    return re.sub(r'([\\`*_\[\]<>#|])', r'\\\1', ' '.join(text.split()))
+
+
+def _generated_on():
+    return f"Generated on {datetime.now().strftime('%B %d, %Y at %H:%M')}"
+
+
+def render_html(question, claude_answer, search_results, conclusion, long_report=False, timestamp=True):
+    """
+    Render a report as one self-contained HTML page
+
+    Sections, result numbering and colours follow the PDF; result titles,
+    URLs and descriptions are literal text there, so they are escaped here.
+
+    Returns:
+        str: HTML document
+    """
+    variables = ' '.join(f'--{name}: {value};' for name, value in COLOR_HEX.items())
+    out = [
+        '<!DOCTYPE html>',
+        '<html lang="en">',
+        '<head>',
+        '<meta charset="utf-8">',
+        '<meta name="viewport" content="width=device-width, initial-scale=1">',
+        f'<title>{html.escape(plain_text(question))}</title>',
+        f'<style>{PREVIEW_CSS % {"variables": variables}}</style>',
+        '</head>',
+        '<body>',
+        '<main>',
+    ]
+    if timestamp:
+        out.append(f'<p class="meta">{_generated_on()}</p>')
+    out.append(f'<h1>{inline_html(question)}</h1>')
+    out.append('<div class="divider"></div>')
+
+    out.append(f'<h2>{TITLE_ANSWER}</h2>')
+    out.extend(f'<p>{inline_html(para)}</p>' for para in text_paragraphs(claude_answer))
+
+    out.append(f'<h2>{TITLE_RESULTS}</h2>')
+    out.append('<ol class="results">')
+    for i, result in enumerate(shown_results(search_results, long_report), 1):
+        title, url, description = result_fields(result)
+        link = (f'<a href="{html.escape(url)}">{html.escape(url)}</a>' if safe_url(url)
+                else f'<span class="url">{html.escape(url)}</span>')
+        out.append(f'<li id="result-{i}"><span class="badge">#{i}</span><h3>{html.escape(title)}</h3>'
+                   f'{link}<p class="desc">{html.escape(description)}</p></li>')
+    out.append('</ol>')
+
+    out.append(f'<h2>{TITLE_CONCLUSION}</h2>')
+    out.extend(f'<p>{inline_html(para)}</p>' for para in text_paragraphs(conclusion))
+
+    out.extend(('</main>', '</body>', '</html>', ''))
+    return '\n'.join(out)
+
+
+def render_markdown(question, claude_answer, search_results, conclusion, long_report=False, timestamp=True):
+    """
+    Render a report as Markdown
+
+    Bold, italic, strike-through and links in the answer and conclusion
+    carry over; other inline tags are dropped, and Markdown has no colours.
+
+    Returns:
+        str: Markdown document
+    """
+    out = [f'# {inline_markdown(" ".join(question.split()))}', '']
+    if timestamp:
+        out.extend((f'*{_generated_on()}*', ''))
+
+    out.extend((f'## {TITLE_ANSWER}', ''))
+    for para in text_paragraphs(claude_answer):
+        out.extend((inline_markdown(para), ''))
+
+    out.extend((f'## {TITLE_RESULTS}', ''))
+    for i, result in enumerate(shown_results(search_results, long_report), 1):
+        title, url, description = result_fields(result)
+        out.extend((f'### {i}. {_markdown_literal(title)}', ''))
+        out.extend((f'<{url}>' if safe_url(url) and re.fullmatch(r'\w+://\S+', url) else _markdown_literal(url), ''))
+        out.extend((_markdown_literal(description), ''))
+
+    out.extend((f'## {TITLE_CONCLUSION}', ''))
+    for para in text_paragraphs(conclusion):
+        out.extend((inline_markdown(para), ''))
+    return '\n'.join(out)
+
+
+RENDERERS = {'html': render_html, 'md': render_markdown}
+
+
+def render_preview(data, fmt='html'):
+    """Render a job dict (see generate_report.py) in one of PREVIEW_FORMATS"""
+    validate_job(data)
+    return RENDERERS[fmt](
+        data['question'],
+        data['claude_answer'],
+        data['search_results'],
+        data['conclusion'],
+        long_report=data.get('long_report', False),
+        timestamp=data.get('timestamp', True)
+    )
+
+
+def preview_path(data, fmt):
+    """Preview next to the job's PDF: output_path with the format's extension"""
+    base = os.path.splitext(data.get('output_path', 'research_report.pdf'))[0]
+    return base + PREVIEW_FORMATS[fmt]
+
+
+def main():
+    """Main entry point for CLI usage"""
+    parser = argparse.ArgumentParser(
+        description="Preview a research report job as HTML or Markdown, without rendering the PDF"
+    )
+    parser.add_argument('data', help="JSON file describing one report (same format as generate_report.py)")
+    parser.add_argument('--format', choices=sorted(PREVIEW_FORMATS), default='html',
+                        help="preview format (default: html)")
+    parser.add_argument('--output',
+                        help="output path, '-' for stdout (default: the job's output_path "
+                             "with a .html or .md extension)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        with open(args.data, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        preview = render_preview(data, args.format)
+    except (OSError, ValueError) as e:
+        print(f"❌ {args.data}: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output == '-':
+        sys.stdout.write(preview)
+        return
+    output_path = args.output or preview_path(data, args.format)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(preview)
+    print(f"✅ Preview generated: {output_path} ({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Report Data Model
+Job schema, search result defaults and colour scheme shared by the PDF and
+preview renderers; plain Python, so importing it never loads ReportLab
+"""
+
+import re
+
+# Modern tech color scheme - Light background with blue accents, as hex for any renderer
+COLOR_HEX = {
+    'primary': '#1E40AF',  # Deep blue
+    'secondary': '#3B82F6',  # Bright blue
+    'accent': '#60A5FA',  # Light blue
+    'bg_light': '#F8FAFC',  # Very light gray/blue
+    'text_primary': '#1E293B',  # Dark slate
+    'text_secondary': '#475569',  # Medium slate
+    'border': '#E2E8F0',  # Light border
+}
+
+# Keys every report job must have
+REQUIRED_JOB_KEYS = ('question', 'claude_answer', 'search_results', 'conclusion')
+
+# Search results shown in a regular report; long reports show all of them
+MAX_SEARCH_RESULTS = 10
+
+# Section titles, in report order
+TITLE_ANSWER = 'Claude AI Analysis'
+TITLE_RESULTS = 'Top Search Results'
+TITLE_CONCLUSION = 'Conclusion'
+
+# Inline markup understood by Paragraph: known tags and character entities
+INLINE_MARKUP = re.compile(
+    r'</?(?:b|i|u|strike|strong|em|a|link|font|span|br|sup|super|sub|greek|img|seq\w*|ondraw|index)\b[^<>]*>'
+    r'|&(?:#\d+|#x[0-9a-fA-F]+|[a-zA-Z]\w*);',
+    re.IGNORECASE
+)
+
+
+# Keys of a job and of a search result that hold text
+JOB_TEXT_KEYS = ('question', 'claude_answer', 'conclusion')
+RESULT_TEXT_KEYS = ('title', 'url', 'description')
+
+# Optional keys of a job that switch rendering options on or off
+JOB_FLAG_KEYS = ('long_report', 'timestamp', 'appendable')
+
+
+def validate_job(data):
+    """
+    Raise ValueError unless data is a job dict with all of REQUIRED_JOB_KEYS
+
+    Text fields must be strings, JOB_FLAG_KEYS where given must be booleans,
+    and search_results a list of result dicts whose title, url and
+    description, where given, are strings.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("job must be a JSON object")
+    missing = [key for key in REQUIRED_JOB_KEYS if key not in data]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    for key in JOB_TEXT_KEYS:
+        if not isinstance(data[key], str):
+            raise ValueError(f"{key} must be a string")
+    for key in JOB_FLAG_KEYS:
+        if key in data and not isinstance(data[key], bool):
+            raise ValueError(f"{key} must be true or false")
+    if not isinstance(data['search_results'], list):
+        raise ValueError("search_results must be a list")
+    for i, result in enumerate(data['search_results'], 1):
+        if not isinstance(result, dict):
+            raise ValueError(f"search result {i} must be a JSON object")
+        for key in RESULT_TEXT_KEYS:
+            if not isinstance(result.get(key, ''), str):
+                raise ValueError(f"search result {i}: {key} must be a string")
+
+
+def result_fields(result):
+    """(title, url, description) of a search result dict, with defaults for missing keys"""
+    return (
+        result.get('title', 'No title'),
+        result.get('url', '#'),
+        result.get('description', 'No description available')
+    )
+
+
+def shown_results(search_results, long_report=False):
+    """The search results a report shows: all of them for a long report, else the first MAX_SEARCH_RESULTS"""
+    return search_results if long_report else search_results[:MAX_SEARCH_RESULTS]
+
+
+def text_paragraphs(text):
+    """Non-empty paragraphs of an answer or conclusion, split on blank lines"""
+    return [para.strip() for para in text.split('\n\n') if para.strip()]
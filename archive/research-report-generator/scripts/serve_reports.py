@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Research Report Render Service
+Serves render_pdf() over HTTP on localhost from a pool of warm worker processes
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from generate_report import create_styles, render_pdf, OUTPUT_PROFILES, JOB_FORMAT
+from report_model import validate_job
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Response bodies are written in chunks of this many bytes
+CHUNK_SIZE = 64 * 1024
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus exposition format"""
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.total += 1
+            self.sum += seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.counts[i] += 1
+
+    def render(self):
+        with self._lock:
+            lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+            for bound, count in zip(self.buckets, self.counts):
+                lines.append(f'{self.name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.total}')
+            lines.append(f"{self.name}_sum {self.sum:.6f}")
+            lines.append(f"{self.name}_count {self.total}")
+        return "\n".join(lines)
+
+
+class QueueFull(Exception):
+    """Raised when every render slot and queue place stays taken for the whole timeout"""
+
+
+class RenderService:
+    """
+    Worker pool plus the admission control in front of it
+
+    At most `workers` reports render at once and up to `queue_size` more
+    requests wait for a worker. A request that cannot get a slot within
+    `timeout` seconds, or whose report is not done by then, is rejected.
+    Workers render with one of OUTPUT_PROFILES.
+    """
+
+    def __init__(self, workers, queue_size, timeout, profile='default'):
+        self.timeout = timeout
+        self.pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(profile,))
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.request_latency = Histogram(
+            'report_request_seconds', 'Time from request to PDF ready, including queueing')
+        self.render_latency = Histogram(
+            'report_render_seconds', 'Time spent rendering in a worker')
+        self.queue_wait = Histogram(
+            'report_queue_wait_seconds', 'Time spent waiting for a free slot')
+        self.responses = {}
+        self.output_bytes = {}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def count_response(self, status):
+        with self._lock:
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+    def render(self, data):
+        """
+        Render one report in the pool
+
+        Returns:
+            bytes: The PDF
+
+        Raises:
+            QueueFull: No slot freed up within the timeout
+            TimeoutError: The report was not rendered within the timeout
+        """
+        start = time.perf_counter()
+        if not self.slots.acquire(timeout=self.timeout):
+            raise QueueFull()
+        self.queue_wait.observe(time.perf_counter() - start)
+
+        with self._lock:
+            self.in_flight += 1
+
+        released = []
+
+        def release(_=None):
+            # Free the slot once, whichever of the pool callbacks or the
+            # request's own timeout gets here first
+            with self._lock:
+                if released:
+                    return
+                released.append(True)
+                self.in_flight -= 1
+            self.slots.release()
+
+        # The pool calls neither callback if its worker process dies, so the
+        # bounded wait below releases the slot as well
+        result = self.pool.apply_async(_render_request, (data,), callback=release, error_callback=release)
+        remaining = max(self.timeout - (time.perf_counter() - start), 0)
+        try:
+            pdf, objects, render_seconds = result.get(timeout=remaining)
+        except multiprocessing.TimeoutError:
+            raise TimeoutError(f"report not rendered within {self.timeout}s")
+        finally:
+            release()
+        with self._lock:
+            for kind, (_, size) in objects.items():
+                self.output_bytes[kind] = self.output_bytes.get(kind, 0) + size
+        self.render_latency.observe(render_seconds)
+        self.request_latency.observe(time.perf_counter() - start)
+        return pdf
+
+    def metrics(self):
+        with self._lock:
+            lines = ["# HELP report_responses_total Responses by HTTP status",
+                     "# TYPE report_responses_total counter"]
+            lines += [f'report_responses_total{{status="{status}"}} {count}'
+                      for status, count in sorted(self.responses.items())]
+            lines += ["# HELP report_in_flight Reports queued in or rendering on the pool",
+                      "# TYPE report_in_flight gauge",
+                      f"report_in_flight {self.in_flight}"]
+            lines += ["# HELP report_output_bytes_total PDF bytes rendered, by kind of PDF object",
+                      "# TYPE report_output_bytes_total counter"]
+            lines += [f'report_output_bytes_total{{kind="{kind}"}} {size}'
+                      for kind, size in sorted(self.output_bytes.items())]
+        for histogram in (self.request_latency, self.render_latency, self.queue_wait):
+            lines.append(histogram.render())
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+# Stylesheet and output profile of each service worker, set up once by _init_worker()
+_styles = None
+_profile = 'default'
+
+
+def _init_worker(profile='default'):
+    """Warm up a worker: fonts are registered on import, styles built here"""
+    global _styles, _profile
+    _styles = create_styles()
+    _profile = profile
+
+
+def _render_request(data):
+    """Worker task: render a job in memory and report (pdf, bytes per object kind, seconds)"""
+    start = time.perf_counter()
+    pdf, stats = render_pdf(
+        data['question'],
+        data['claude_answer'],
+        data['search_results'],
+        data['conclusion'],
+        profile=_profile,
+        styles=_styles,
+        long_report=data.get('long_report', False),
+        timestamp=data.get('timestamp', True),
+        appendable=data.get('appendable', False)
+    )
+    return pdf, stats.objects, time.perf_counter() - start
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """POST /render with a job JSON body returns the PDF; GET /metrics and /healthz"""
+
+    service = None
+    max_body = 0
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            self._send(200, self.service.metrics().encode('utf-8'), 'text/plain; version=0.0.4')
+        elif self.path == '/healthz':
+            self._send(200, b'ok\n', 'text/plain')
+        else:
+            self._send_error(404, "not found")
+
+    def do_POST(self):
+        if self.path != '/render':
+            self._send_error(404, "not found")
+            return
+
+        header = self.headers.get('Content-Length')
+        if header is None:
+            self._send_error(411, "Content-Length required")
+            return
+        try:
+            length = int(header)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_error(400, f"invalid Content-Length: {header!r}")
+            return
+        if length > self.max_body:
+            self._send_error(413, f"request body larger than {self.max_body} bytes")
+            return
+        try:
+            data = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            self._send_error(400, f"invalid JSON: {e}")
+            return
+        try:
+            validate_job(data)
+        except ValueError as e:
+            self._send_error(400, f"invalid job: {e}")
+            return
+
+        try:
+            pdf = self.service.render(data)
+        except QueueFull:
+            self._send_error(503, "render queue full")
+        except TimeoutError as e:
+            self._send_error(504, str(e))
+        except Exception as e:
+            self._send_error(500, f"{type(e).__name__}: {e}")
+        else:
+            self._send(200, pdf, 'application/pdf')
+
+    def _send(self, status, body, content_type):
+        self.service.count_response(status)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        view = memoryview(body)
+        for offset in range(0, len(body), CHUNK_SIZE):
+            self.wfile.write(view[offset:offset + CHUNK_SIZE])
+
+    def _send_error(self, status, message):
+        self._send(status, json.dumps({"error": message}).encode('utf-8') + b'\n', 'application/json')
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"{self.address_string()} {format % args}\n")
+
+
+def main():
+    """Main entry point for CLI usage"""
+    parser = argparse.ArgumentParser(
+        description="Serve research report rendering over HTTP",
+        epilog="POST /render with a job in the JSON format below; the PDF is returned.\n"
+               "GET /metrics exposes Prometheus metrics.\n\n" + JOB_FORMAT,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--host', default='127.0.0.1', help="address to bind (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="reports rendered concurrently (default: CPU count)")
+    parser.add_argument('--queue-size', type=int, default=32,
+                        help="requests allowed to wait for a worker (default: 32)")
+    parser.add_argument('--timeout', type=float, default=60.0,
+                        help="seconds a request may wait and render before failing (default: 60)")
+    parser.add_argument('--max-body', type=int, default=16 * 1024 * 1024,
+                        help="largest accepted request body in bytes (default: 16 MiB)")
+    parser.add_argument('--profile', choices=sorted(OUTPUT_PROFILES), default='default',
+                        help="output profile: 'fast' spends the least CPU on compression, 'small' "
+                             "sends the smallest PDFs (default: ReportLab's defaults)")
+    args = parser.parse_args()
+
+    workers = args.workers or multiprocessing.cpu_count()
+    service = RenderService(workers, args.queue_size, args.timeout, args.profile)
+    RenderRequestHandler.service = service
+    RenderRequestHandler.max_body = args.max_body
+    server = ThreadingHTTPServer((args.host, args.port), RenderRequestHandler)
+    print(f"Serving reports on http://{args.host}:{args.port} with {workers} workers "
+          f"({args.profile} profile)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    main()